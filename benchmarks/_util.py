@@ -0,0 +1,45 @@
+"""Shared helpers for the benchmark scripts."""
+
+import importlib.util
+import statistics
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CLIENT_DIR = ROOT / "custom_components" / "one2track" / "client"
+
+sys.path.insert(0, str(ROOT / "tests"))
+
+
+def load_client():
+    """Import the API client package without Home Assistant.
+
+    ``custom_components.one2track`` imports Home Assistant in its __init__, but
+    the client package itself only needs aiohttp, so load it under its own name.
+    """
+    name = "one2track_client"
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            name, CLIENT_DIR / "__init__.py", submodule_search_locations=[str(CLIENT_DIR)]
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> str:
+    """Format p50/p99/mean of a list of durations in seconds."""
+    return (
+        f"p50 {percentile(samples, 50) * 1000:.1f} ms  "
+        f"p99 {percentile(samples, 99) * 1000:.1f} ms  "
+        f"mean {statistics.fmean(samples) * 1000:.1f} ms  (n={len(samples)})"
+    )
@@ -0,0 +1,63 @@
+"""Decode benchmark: full json.loads versus streaming device decoding.
+
+Builds realistic device-list payloads for accounts with 10, 100 and 1000
+devices and reports decode time and traced peak memory for both paths.
+
+    python benchmarks/bench_decode.py --sizes 10 100 1000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from _util import load_client
+from mock_server import make_device
+
+client = load_client()
+decoding = client.decoding
+
+
+def full_decode(body: bytes) -> list:
+    """The previous path: decode everything, then copy out each device."""
+    return [item["device"] for item in json.loads(body)]
+
+
+def streaming_decode(body: bytes) -> list:
+    return list(decoding.iter_devices(decoding.iter_chunks(body)))
+
+
+def measure(fn, body: bytes, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(body)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = fn(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'devices':>8} {'payload':>10} {'path':>10} {'best time':>11} {'peak mem':>10}")
+    for size in args.sizes:
+        body = json.dumps([make_device("acc", i) for i in range(size)]).encode()
+        for name, fn in (("json", full_decode), ("streaming", streaming_decode)):
+            best, peak = measure(fn, body, args.repeat)
+            print(
+                f"{size:>8} {len(body) / 1024:>8.1f}KB {name:>10} "
+                f"{best * 1000:>8.2f} ms {peak / 1024:>8.1f}KB"
+            )
+
+
+if __name__ == "__main__":
+    main()
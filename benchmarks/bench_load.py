@@ -0,0 +1,127 @@
+"""Load benchmark: drive GpsClient against the local One2Track stand-in.
+
+Runs N accounts with M devices each through a number of polling rounds (and
+optionally a command per device per round) and reports throughput, latency
+percentiles and memory use.
+
+    python benchmarks/bench_load.py --accounts 50 --devices 5 --rounds 20
+"""
+
+import argparse
+import asyncio
+import resource
+import time
+import tracemalloc
+
+from _util import load_client, summarize
+from aiohttp.test_utils import TestServer
+from mock_server import MockAccount, MockOne2Track
+
+client = load_client()
+
+
+async def _timed(latencies: list[float], errors: list[BaseException], coro) -> None:
+    start = time.perf_counter()
+    try:
+        await coro
+    except Exception as err:  # noqa: BLE001 - counted, not raised
+        errors.append(err)
+    latencies.append(time.perf_counter() - start)
+
+
+async def run(args: argparse.Namespace) -> None:
+    accounts = [
+        MockAccount(f"user{i}", "secret", f"acc{i}", device_count=args.devices)
+        for i in range(args.accounts)
+    ]
+    mock = MockOne2Track(
+        accounts,
+        latency=(args.latency_min / 1000, args.latency_max / 1000),
+        session_ttl=args.session_ttl,
+        seed=args.seed,
+    )
+    server = TestServer(mock.app)
+    await server.start_server()
+    base_url = str(server.make_url(""))
+
+    pool = client.session.SharedSession()
+    session = pool.acquire()
+    clients = [
+        client.GpsClient(
+            client.One2TrackConfig(a.username, a.password, a.account_id),
+            session,
+            base_url=base_url,
+            retry=client.RetryPolicy(attempts=args.attempts, base_delay=0.05),
+        )
+        for a in accounts
+    ]
+
+    tracemalloc.start()
+    await asyncio.gather(*(c.install() for c in clients))
+
+    poll_latencies: list[float] = []
+    command_latencies: list[float] = []
+    errors: list[BaseException] = []
+    mock.requests.clear()
+    mock.error_rate = args.error_rate
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        await asyncio.gather(*(_timed(poll_latencies, errors, c.update()) for c in clients))
+        if args.commands:
+            batches = await asyncio.gather(
+                *(
+                    c.send_commands(
+                        [
+                            client.DeviceCommand(d["device"]["uuid"], "force_update")
+                            for d in mock.devices(a)
+                        ],
+                        limit=args.command_limit,
+                    )
+                    for c, a in zip(clients, accounts, strict=True)
+                )
+            )
+            for result in (r for batch in batches for r in batch):
+                command_latencies.append(result.elapsed)
+                if not result.success:
+                    errors.append(RuntimeError(result.error))
+    elapsed = time.perf_counter() - start
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total_requests = sum(mock.requests.values())
+    print(f"accounts={args.accounts} devices/account={args.devices} rounds={args.rounds}")
+    print(f"elapsed:          {elapsed:.2f} s")
+    print(f"http requests:    {total_requests} ({total_requests / elapsed:.1f} req/s)")
+    for name, samples in (("poll", poll_latencies), ("command", command_latencies)):
+        if samples:
+            print(f"{name + ' latency:':<18}{summarize(samples)}")
+    print(f"errors:           {len(errors)}")
+    print(f"traced peak:      {peak / 1024 / 1024:.2f} MiB")
+    print(f"max RSS:          {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+    for endpoint, count in sorted(mock.requests.items()):
+        print(f"  {endpoint:<40} {count}")
+
+    await pool.release(session)
+    await server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--devices", type=int, default=5)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--commands", action="store_true", help="send a command per device")
+    parser.add_argument("--command-limit", type=int, default=8, help="commands in flight")
+    parser.add_argument("--latency-min", type=float, default=5.0, help="ms")
+    parser.add_argument("--latency-max", type=float, default=20.0, help="ms")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--session-ttl", type=float, default=None, help="seconds")
+    parser.add_argument("--attempts", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=None)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Memory benchmark: a simulated 24 hour run with and without string interning.
+
+Replays one poll per minute for a fleet. Every poll carries new timestamps,
+and a share of the watches report a new position and address, like a real
+account. The decoded device lists of the last ``--retain`` polls are kept
+alive, standing in for what Home Assistant holds on to between polls (the
+coordinator data, current and previous states, queued recorder rows).
+
+Reports traced memory still held at the end and the peak during the run;
+the times include the tracing overhead.
+
+    python benchmarks/bench_memory.py --devices 100 --polls 1440
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timedelta
+
+from _util import load_client
+from mock_server import make_device
+
+client = load_client()
+decoding = client.decoding
+
+START = datetime(2024, 3, 1, 0, 0)
+
+
+def build_payloads(devices: int, polls: int, moving: float, seed: int):
+    """Yield the body of each poll; positions drift for the moving share."""
+    rng = random.Random(seed)
+    fleet = [make_device("acc", i) for i in range(devices)]
+    for poll in range(polls):
+        now = (START + timedelta(minutes=poll)).isoformat(timespec="milliseconds")
+        for item in fleet:
+            location = item["device"]["last_location"]
+            location["last_communication"] = now
+            if rng.random() < moving:
+                location["last_location_update"] = now
+                location["latitude"] = (
+                    f"{float(location['latitude']) + rng.uniform(-1e-3, 1e-3):.6f}"
+                )
+                location["longitude"] = (
+                    f"{float(location['longitude']) + rng.uniform(-1e-3, 1e-3):.6f}"
+                )
+                location["address"] = f"Stationsplein {rng.randrange(200)}, 1012 AB Amsterdam"
+                location["battery_percentage"] = max(5, location["battery_percentage"] - 1)
+        yield json.dumps(fleet).encode()
+
+
+def run(payloads: list[bytes], retain: int, intern: bool) -> tuple[float, int, int]:
+    pool = decoding.StringPool() if intern else None
+    kept: deque[list] = deque(maxlen=retain)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for body in payloads:
+        devices = decoding.iter_devices(decoding.iter_chunks(body))
+        if pool is not None:
+            devices = [pool.intern(device) for device in devices]
+            pool.next_generation()
+        kept.append(list(devices))
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, current, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--polls", type=int, default=1440, help="one per simulated minute")
+    parser.add_argument("--retain", type=int, default=60, help="polls kept alive")
+    parser.add_argument("--moving", type=float, default=0.2, help="share of watches moving")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    payloads = list(build_payloads(args.devices, args.polls, args.moving, args.seed))
+    print(
+        f"{args.devices} devices, {args.polls} polls, last {args.retain} kept, "
+        f"{args.moving:.0%} moving per poll"
+    )
+    print(f"{'path':>10} {'time':>9} {'held':>10} {'peak':>10}")
+    for name, intern in (("plain", False), ("interned", True)):
+        elapsed, current, peak = run(payloads, args.retain, intern)
+        print(
+            f"{name:>10} {elapsed:>7.2f} s {current / 1024 / 1024:>7.2f}MB "
+            f"{peak / 1024 / 1024:>7.2f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
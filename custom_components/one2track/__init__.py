@@ -1,12 +1,34 @@
+from datetime import timedelta
+
 from aiohttp import ClientError
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.storage import Store
 
-from .client import AuthenticationError, GpsClient, One2TrackConfig, get_client
-from .common import CONF_ID, CONF_PASSWORD, CONF_USER_NAME, DOMAIN, LOGGER
+from .client import AuthenticationError, CommandResult, GpsClient, One2TrackConfig, get_client
+from .command_queue import SENT, CommandQueue, CommandWorker, QueuedCommand, outcome_event_data
+from .common import (
+    COMMAND_SAVE_DELAY,
+    CONF_ID,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_PASSWORD,
+    CONF_SUPPRESS_JITTER,
+    CONF_USER_NAME,
+    DEFAULT_MAX_UPDATE_RATE_MIN,
+    DEFAULT_SUPPRESS_JITTER,
+    DEFAULT_UPDATE_RATE_MIN,
+    DOMAIN,
+    EVENT_COMMAND,
+    LOGGER,
+    SESSION_SAVE_DELAY,
+    STORAGE_VERSION,
+)
 from .coordinator import GpsCoordinator
+from .device_index import get_device_index
+from .geofence import Geofence
 from .services import async_setup_services, async_unload_services
 
 PLATFORMS = [Platform.DEVICE_TRACKER, Platform.SENSOR, Platform.BINARY_SENSOR]
@@ -21,44 +43,129 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         id=entry.data[CONF_ID],
     )
     api = get_client(config)
+
+    store = _session_store(hass, entry)
+    api.on_session_update = lambda: store.async_delay_save(api.export_session, SESSION_SAVE_DELAY)
+
+    coordinator = GpsCoordinator(
+        hass,
+        api,
+        min_interval=timedelta(
+            minutes=entry.options.get(CONF_MIN_UPDATE_INTERVAL, DEFAULT_UPDATE_RATE_MIN)
+        ),
+        max_interval=timedelta(
+            minutes=entry.options.get(CONF_MAX_UPDATE_INTERVAL, DEFAULT_MAX_UPDATE_RATE_MIN)
+        ),
+        suppress_jitter=entry.options.get(CONF_SUPPRESS_JITTER, DEFAULT_SUPPRESS_JITTER),
+    )
+    geofence_store = _geofence_store(hass, entry)
+    for fence in (await geofence_store.async_load() or {}).get("fences", []):
+        coordinator.geofences.set_fence(Geofence.from_dict(fence))
+
     try:
-        account_id = await api.install()
-    except (ClientError, AuthenticationError) as ex:
-        LOGGER.error("Could not retrieve details from One2Track API")
-        raise ConfigEntryNotReady from ex
+        await _async_authenticate(api, entry, await store.async_load())
+        await coordinator.async_config_entry_first_refresh()
+    except Exception:
+        # Give the shared connection pool handle back before HA retries the setup.
+        await api.close()
+        raise
 
-    if account_id != entry.data[CONF_ID]:
-        LOGGER.error(
-            "Unexpected initial account id: %s. Expected: %s",
-            account_id,
-            entry.data[CONF_ID],
-        )
-        raise ConfigEntryNotReady
+    command_store = _command_store(hass, entry)
+    queue = CommandQueue(
+        await command_store.async_load(),
+        on_change=lambda: command_store.async_delay_save(queue.as_data, COMMAND_SAVE_DELAY),
+    )
+
+    @callback
+    def _command_outcome(command: QueuedCommand, status: str, result: CommandResult | None) -> None:
+        hass.bus.async_fire(EVENT_COMMAND, outcome_event_data(command, status, result))
+        if status == SENT and command.command == "force_update":
+            hass.async_create_task(coordinator.async_start_burst([command.device_uuid]))
 
-    coordinator = GpsCoordinator(hass, api)
-    await coordinator.async_config_entry_first_refresh()
+    worker = CommandWorker(queue, api.send_commands, _command_outcome)
 
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
         "api_client": api,
         "coordinator": coordinator,
+        "geofence_store": geofence_store,
+        "command_worker": worker,
     }
+    entry.async_create_background_task(
+        hass, worker.run(), f"{DOMAIN} command worker {entry.entry_id}"
+    )
+
+    index = get_device_index(hass)
+    index.set_devices(entry.entry_id, coordinator.data or {})
+    entry.async_on_unload(
+        coordinator.async_add_listener(
+            lambda: index.set_devices(entry.entry_id, coordinator.data or {})
+        )
+    )
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     await async_setup_services(hass)
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
 
     return True
 
 
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry so changed options take effect."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def _async_authenticate(api: GpsClient, entry: ConfigEntry, stored: dict | None) -> None:
+    if stored and stored.get("cookie") and stored.get("account_id") == entry.data[CONF_ID]:
+        # Reuse the previous session; the first refresh logs in again if it expired.
+        LOGGER.debug("Restoring stored One2Track session for %s", entry.data[CONF_ID])
+        api.restore_session(stored["cookie"], stored["account_id"])
+        return
+
+    try:
+        account_id = await api.install()
+    except (ClientError, AuthenticationError) as ex:
+        LOGGER.error("Could not retrieve details from One2Track API")
+        raise ConfigEntryNotReady from ex
+
+    if account_id != entry.data[CONF_ID]:
+        LOGGER.error(
+            "Unexpected initial account id: %s. Expected: %s",
+            account_id,
+            entry.data[CONF_ID],
+        )
+        raise ConfigEntryNotReady
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        get_device_index(hass).remove_entry(entry.entry_id)
         client: GpsClient = entry_data.get("api_client")
-        if client and hasattr(client, "session"):
-            await client.session.close()
+        if client:
+            await client.close()
         if not hass.data[DOMAIN]:
             await async_unload_services(hass)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored session, geofences and commands of a deleted config entry."""
+    await _session_store(hass, entry).async_remove()
+    await _geofence_store(hass, entry).async_remove()
+    await _command_store(hass, entry).async_remove()
+
+
+def _session_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.session", private=True)
+
+
+def _geofence_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.geofences")
+
+
+def _command_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.commands")
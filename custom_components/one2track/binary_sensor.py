@@ -1,18 +1,18 @@
 import logging
+from typing import Any
 
 from homeassistant.components.binary_sensor import (
     BinarySensorDeviceClass,
     BinarySensorEntity,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .client import TrackerDevice
 from .common import DOMAIN
 from .coordinator import GpsCoordinator
+from .entity import One2TrackEntity
+from .models import DeviceSnapshot
 
 LOGGER = logging.getLogger(__name__)
 
@@ -25,12 +25,12 @@ async def async_setup_entry(
     """Set up One2Track binary sensor entities."""
     coordinator: GpsCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
 
-    devices: list[TrackerDevice] = coordinator.data or []
+    devices = list((coordinator.data or {}).values())
 
     async_add_entities([One2TrackTumbleSensor(coordinator, device) for device in devices])
 
 
-class One2TrackTumbleSensor(CoordinatorEntity, BinarySensorEntity):
+class One2TrackTumbleSensor(One2TrackEntity, BinarySensorEntity):
     """Binary sensor for tumble/fall detection."""
 
     _attr_has_entity_name = True
@@ -40,32 +40,14 @@ class One2TrackTumbleSensor(CoordinatorEntity, BinarySensorEntity):
     def __init__(
         self,
         coordinator: GpsCoordinator,
-        device: TrackerDevice,
+        device: DeviceSnapshot,
     ) -> None:
-        super().__init__(coordinator)
-        self._device = device
-        self._attr_unique_id = f"{device['uuid']}_tumble"
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._device["uuid"])},
-            serial_number=self._device["serial_number"],
-            name=self._device["name"],
-        )
+        super().__init__(coordinator, device)
+        self._attr_unique_id = f"{device.uuid}_tumble"
 
     @property
     def is_on(self) -> bool | None:
-        meta = self._device.get("last_location", {}).get("meta_data")
-        if meta:
-            return meta.get("tumble") == "1"
-        return None
+        return self._device.tumble
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        new_data: list[TrackerDevice] = self.coordinator.data
-        if new_data:
-            me = next((x for x in new_data if x["uuid"] == self._device["uuid"]), None)
-            if me:
-                self._device = me
-        self.async_write_ha_state()
+    def _state_signature(self) -> tuple[Any, ...]:
+        return (*super()._state_signature(), self.is_on)
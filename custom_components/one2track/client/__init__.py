@@ -1,12 +1,19 @@
-from aiohttp import ClientSession, DummyCookieJar
+from aiohttp import ClientSession
 
 from .client_types import AuthenticationError as AuthenticationError
+from .client_types import CircuitOpenError as CircuitOpenError
+from .client_types import CommandResult as CommandResult
+from .client_types import DeviceCommand as DeviceCommand
 from .client_types import One2TrackConfig as One2TrackConfig
 from .client_types import TrackerDevice as TrackerDevice
 from .gps_client import GpsClient as GpsClient
+from .resilience import CircuitBreaker as CircuitBreaker
+from .resilience import RetryPolicy as RetryPolicy
+from .session import shared_session
 
 
 def get_client(config: One2TrackConfig, session: ClientSession | None = None) -> GpsClient:
+    """Create a client; without an explicit session it uses the shared connection pool."""
     if session is None:
-        session = ClientSession(cookie_jar=DummyCookieJar())
+        return GpsClient(config, shared_session.acquire(), release=shared_session.release)
     return GpsClient(config, session)
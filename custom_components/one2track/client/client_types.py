@@ -1,16 +1,41 @@
 from typing import NamedTuple, TypedDict
 
+from aiohttp import ClientError
+
 
 class AuthenticationError(Exception):
     """Authentication failed (wrong username/password or domain)."""
 
 
+class CircuitOpenError(ClientError):
+    """Requests are paused because the API kept failing."""
+
+
 class One2TrackConfig(NamedTuple):
     username: str
     password: str
     id: str | None = None
 
 
+class DeviceCommand(NamedTuple):
+    device_uuid: str
+    command: str  # power_off, force_update or send_message
+    message: str | None = None
+
+
+class CommandResult(NamedTuple):
+    device_uuid: str
+    command: str
+    success: bool
+    elapsed: float  # seconds
+    error: str | None = None
+    status: int | None = None  # HTTP status of the last POST
+    reauthenticated: bool = False  # a login was needed first
+    csrf_refreshed: bool = False  # a CSRF token had to be fetched
+    phases: dict[str, float] | None = None  # seconds spent in "auth", "csrf" and "request"
+    retryable: bool = False  # the command surely did not reach the portal, so resending is safe
+
+
 class Station(TypedDict):
     strength: str
     mnc: str
@@ -0,0 +1,122 @@
+import codecs
+import json
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from .client_types import TrackerDevice
+
+# Size of the text slices fed to the decoder
+CHUNK_SIZE = 16 * 1024
+
+# Raw cell tower and WiFi scan lists: large, and nothing in the integration reads them
+DROPPED_META_KEYS = ("stations", "routers")
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+
+
+def iter_chunks(body: bytes, size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Split a response body into chunks without copying it."""
+    view = memoryview(body)
+    for start in range(0, len(view), size):
+        yield view[start : start + size]
+
+
+def iter_devices(chunks: Iterable[bytes]) -> Iterator[TrackerDevice]:
+    """Decode a ``/users/{id}/devices`` payload one device at a time.
+
+    The payload is a JSON array of ``{"device": {...}}`` objects. Only the text
+    of the element being decoded is buffered, and unused ``meta_data`` subtrees
+    are dropped as soon as each device is built, so the full object tree of a
+    large fleet never exists at once.
+    """
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    started = False
+    exhausted = False
+
+    while True:
+        # Skip separators between elements
+        separators = _WHITESPACE + "," if started else _WHITESPACE
+        while pos < len(buffer) and buffer[pos] in separators:
+            pos += 1
+
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Device payload is not a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if exhausted:
+                    raise
+                # Element continues in the next chunk
+            else:
+                pos = end
+                yield _prune(item["device"])
+                continue
+
+        if exhausted:
+            raise ValueError("Truncated device payload")
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            text = utf8.decode(b"", final=True)
+        else:
+            text = utf8.decode(chunk)
+        buffer = buffer[pos:] + text
+        pos = 0
+
+
+def _prune(device: TrackerDevice) -> TrackerDevice:
+    meta = (device.get("last_location") or {}).get("meta_data")
+    if meta:
+        for key in DROPPED_META_KEYS:
+            meta.pop(key, None)
+    return device
+
+
+class StringPool:
+    """Hand out the string objects of the previous refresh for equal strings.
+
+    A decoded payload carries fresh copies of names, addresses, serial numbers
+    and the like on every poll. Passing each device through ``intern`` makes
+    equal strings share one object across refreshes. Strings not seen during a
+    generation are dropped at the next ``next_generation``, so the pool only
+    ever holds the strings of the latest payload.
+    """
+
+    def __init__(self) -> None:
+        self._previous: dict[str, str] = {}
+        self._current: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def intern(self, value: Any) -> Any:
+        """Return ``value`` with every string key and value taken from the pool."""
+        if isinstance(value, str):
+            return self._string(value)
+        if isinstance(value, dict):
+            return {self._string(key): self.intern(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.intern(item) for item in value]
+        return value
+
+    def next_generation(self) -> None:
+        self._previous = self._current
+        self._current = {}
+
+    def _string(self, value: str) -> str:
+        pooled = self._current.get(value)
+        if pooled is None:
+            pooled = self._previous.get(value, value)
+            self._current[pooled] = pooled
+        return pooled
@@ -1,87 +1,282 @@
+import asyncio
+import hashlib
 import logging
 import re
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine, Iterable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import partial
 from http.cookies import SimpleCookie
+from typing import Any
 
-from aiohttp import ClientSession
+from aiohttp import ClientConnectorError, ClientError, ClientResponse, ClientSession
 
-from .client_types import AuthenticationError, One2TrackConfig, TrackerDevice
+from .client_types import (
+    AuthenticationError,
+    CircuitOpenError,
+    CommandResult,
+    DeviceCommand,
+    One2TrackConfig,
+    TrackerDevice,
+)
+from .decoding import StringPool, iter_chunks, iter_devices
+from .resilience import CircuitBreaker, RetryPolicy
 
 _LOGGER = logging.getLogger(__name__)
 
 BASE_URL = "https://www.one2trackgps.com"
-LOGIN_URL = f"{BASE_URL}/auth/users/sign_in"
-DEVICE_URL = f"{BASE_URL}/users/{{account_id}}/devices"
+LOGIN_PATH = "/auth/users/sign_in"
+DEVICE_PATH = "/users/{account_id}/devices"
 SESSION_COOKIE = "_iadmin"
+# Rails answers a stale authenticity token with 422 (or 403 behind some proxies)
+CSRF_REJECTED_STATUSES = (403, 422)
+# Errors raised before a command's POST went out, so sending it again is safe
+UNSENT_ERRORS = (AuthenticationError, CircuitOpenError, ClientConnectorError)
+# Answers to a command POST that mean the portal did not act on it. Other 5xx
+# may come after the command was passed on to the watch, like a timeout.
+REFUSED_STATUSES = frozenset({401, 429, 503, *CSRF_REJECTED_STATUSES})
+DEFAULT_COMMAND_CONCURRENCY = 8
+
+FUNCTION_CODES = {
+    "power_off": ("0048", "Shutdown"),
+    "force_update": ("0039", "Actieve positioneringmodus"),
+}
+
+
+@dataclass(slots=True)
+class _CommandTrace:
+    """What it took to deliver one command, filled in along the request path."""
+
+    status: int | None = None
+    reauthenticated: bool = False
+    csrf_refreshed: bool = False
+    phases: dict[str, float] = field(default_factory=dict)
+
+    def copy(self) -> "_CommandTrace":
+        return _CommandTrace(
+            self.status, self.reauthenticated, self.csrf_refreshed, dict(self.phases)
+        )
+
+
+_trace: ContextVar[_CommandTrace | None] = ContextVar("one2track_command_trace", default=None)
+
+
+@contextmanager
+def _phase(name: str) -> Iterator[_CommandTrace | None]:
+    """Add the time spent in the block to phase ``name`` of the current trace."""
+    trace = _trace.get()
+    start = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        if trace is not None:
+            trace.phases[name] = trace.phases.get(name, 0.0) + time.perf_counter() - start
 
 
 class GpsClient:
-    def __init__(self, config: One2TrackConfig, session: ClientSession) -> None:
+    def __init__(
+        self,
+        config: One2TrackConfig,
+        session: ClientSession,
+        *,
+        release: Callable[[ClientSession], Awaitable[None]] | None = None,
+        base_url: str = BASE_URL,
+        retry: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
         self.config = config
+        self.base_url = base_url.rstrip("/")
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
         self.account_id: str = config.id or ""
         self.session = session
+        self._release = release
         self._cookie: str = ""
         self._csrf: str = ""
+        self._csrf_cookie: str = ""
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._devices: list[TrackerDevice] | None = None
+        self._strings = StringPool()
+        self._payload_digest: bytes = b""
+        self._etag: str = ""
+        self.on_session_update: Callable[[], None] | None = None
 
     async def install(self) -> str:
-        await self._get_csrf()
-        await self._login()
+        await self._login(await self._get_csrf())
         return await self._get_user_id()
 
+    async def close(self) -> None:
+        """Release the HTTP session handle; a caller-provided session is left open."""
+        release, self._release = self._release, None
+        if release is not None:
+            await release(self.session)
+
+    def restore_session(self, cookie: str, account_id: str) -> None:
+        """Reuse a session cookie from a previous run instead of logging in."""
+        self._cookie = cookie
+        self.account_id = account_id
+
+    def export_session(self) -> dict[str, str]:
+        """Return the session state that can be persisted between runs."""
+        return {"cookie": self._cookie, "account_id": self.account_id}
+
     async def update(self) -> list[TrackerDevice]:
+        had_session = bool(self._cookie)
         await self._ensure_authenticated()
-        return await self._get_device_data()
+        try:
+            return await self._get_device_data()
+        except AuthenticationError:
+            if not had_session:
+                raise
+            # A stored or long-lived session expired: log in once and retry.
+            _LOGGER.debug("Session expired, logging in again")
+            await self._ensure_authenticated()
+            return await self._get_device_data()
 
     async def power_off(self, device_uuid: str) -> bool:
         """Shut down the device remotely."""
-        return await self._send_function(device_uuid, "0048", "Shutdown")
+        return await self._send_function(device_uuid, *FUNCTION_CODES["power_off"])
 
     async def force_update(self, device_uuid: str) -> bool:
         """Activate positioning mode on the device for ~2 minutes."""
-        return await self._send_function(device_uuid, "0039", "Actieve positioneringmodus")
+        return await self._send_function(device_uuid, *FUNCTION_CODES["force_update"])
 
     async def send_message(self, device_uuid: str, message: str) -> bool:
         """Send a text message to a One2Track device."""
-        await self._ensure_authenticated()
-        csrf = await self._fresh_csrf_token()
-
-        url = f"{BASE_URL}/devices/{device_uuid}/messages"
+        url = f"{self.base_url}/devices/{device_uuid}/messages"
         headers = {
-            "x-csrf-token": csrf,
             "content-type": "application/x-www-form-urlencoded;charset=UTF-8",
             "accept": "text/vnd.turbo-stream.html, text/html, application/xhtml+xml",
         }
         data = {
             "utf8": "✓",
-            "authenticity_token": csrf,
             "device_message[message]": message,
         }
+        return await self._post_action(url, data, headers, token_in_body=True)
 
-        response = await self._request(url, data=data, extra_headers=headers)
-        return response.status == 200
+    async def send_commands(
+        self,
+        commands: Iterable[DeviceCommand],
+        *,
+        limit: int = DEFAULT_COMMAND_CONCURRENCY,
+    ) -> list[CommandResult]:
+        """Send many commands concurrently, at most ``limit`` in flight.
+
+        Login and the CSRF token are set up once for the whole batch. Failures
+        are reported per command instead of aborting the batch; results come
+        back in the order of ``commands``. Each result carries the HTTP status,
+        whether a login or CSRF token fetch was needed, and the time spent per
+        phase; the batch-wide login and token fetch count for every command.
+        """
+        commands = list(commands)
+        if not commands:
+            return []
+
+        batch = _CommandTrace()
+        token = _trace.set(batch)
+        try:
+            await self._ensure_authenticated()
+            await self._csrf_token()
+        finally:
+            _trace.reset(token)
+
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run(command: DeviceCommand) -> CommandResult:
+            async with semaphore:
+                # Each gathered command runs in its own task, so this trace is its own
+                trace = batch.copy()
+                _trace.set(trace)
+                start = time.perf_counter()
+                error = None
+                retryable = False
+                try:
+                    success = await self._dispatch(command)
+                except (ClientError, AuthenticationError, TimeoutError) as err:
+                    # A timeout or dropped connection may come after the portal
+                    # acted on the POST, so only errors from before it are retryable
+                    success, error = False, str(err) or type(err).__name__
+                    retryable = isinstance(err, UNSENT_ERRORS)
+                else:
+                    retryable = not success and trace.status in REFUSED_STATUSES
+                return CommandResult(
+                    command.device_uuid,
+                    command.command,
+                    success,
+                    time.perf_counter() - start,
+                    error,
+                    trace.status,
+                    trace.reauthenticated,
+                    trace.csrf_refreshed,
+                    trace.phases,
+                    retryable,
+                )
+
+        return await asyncio.gather(*(run(command) for command in commands))
+
+    async def _dispatch(self, command: DeviceCommand) -> bool:
+        if command.command == "send_message":
+            return await self.send_message(command.device_uuid, command.message or "")
+        if command.command in FUNCTION_CODES:
+            return await self._send_function(command.device_uuid, *FUNCTION_CODES[command.command])
+        raise ValueError(f"Unknown command {command.command!r}")
 
     # ------------------------------------------------------------------
     # Internal auth flow
     # ------------------------------------------------------------------
 
     async def _ensure_authenticated(self) -> None:
-        if not self._cookie:
-            _LOGGER.debug("No session cookie, performing login")
-            await self._get_csrf()
-            await self._login()
-            await self._get_user_id()
-
-    async def _get_csrf(self) -> None:
-        response = await self._request(LOGIN_URL)
-        if response.status != 200:
-            raise AuthenticationError("Login page unavailable")
-
-        html = await response.text()
+        """Log in when there is no session, sharing one login between concurrent callers."""
+        if self._cookie:
+            return
+
+        with _phase("auth") as trace:
+            if trace is not None:
+                trace.reauthenticated = True
+            await self._single_flight("login", self._login_flow)
+
+    async def _login_flow(self) -> None:
+        await self._login(await self._get_csrf())
+        await self._get_user_id()
+
+    async def _single_flight(self, key: str, factory: Callable[[], Coroutine]) -> Any:
+        """Run ``factory`` once for all concurrent callers using the same key."""
+        task = self._tasks.get(key)
+        if task is None:
+            _LOGGER.debug("Starting %s", key)
+            task = asyncio.get_running_loop().create_task(factory())
+            task.add_done_callback(partial(self._single_flight_done, key))
+            self._tasks[key] = task
+
+        # Shielded so a cancelled caller does not abort the work others wait for
+        return await asyncio.shield(task)
+
+    def _single_flight_done(self, key: str, task: asyncio.Task) -> None:
+        self._tasks.pop(key, None)
+        if not task.cancelled():
+            # Mark the error as retrieved even if every waiter was cancelled
+            task.exception()
+
+    async def _get_csrf(self) -> str:
+        """Fetch the sign-in page and return the cookie of its anonymous session.
+
+        The cookie is only used for the login POST; it never becomes the
+        client's session, so callers arriving mid-login keep waiting for it.
+        """
+        async with self._request(self.base_url + LOGIN_PATH) as response:
+            if response.status != 200:
+                raise AuthenticationError("Login page unavailable")
+
+            html = await response.text()
+            cookie = self._extract_cookie(response)
+
         self._csrf = self._parse_csrf(html)
-        cookie = self._extract_cookie(response)
-        if cookie:
-            self._cookie = cookie
+        self._csrf_cookie = cookie
+        return cookie
 
-    async def _login(self) -> None:
+    async def _login(self, cookie: str) -> None:
         login_data = {
             "authenticity_token": self._csrf,
             "user[login]": self.config.username,
@@ -89,45 +284,65 @@ class GpsClient:
             "gdpr": "1",
             "user[remember_me]": "1",
         }
-        response = await self._request(LOGIN_URL, data=login_data, allow_redirects=False)
-
-        if response.status == 302:
+        async with self._request(
+            self.base_url + LOGIN_PATH, data=login_data, allow_redirects=False, cookie=cookie
+        ) as response:
+            status = response.status
             new_cookie = self._extract_cookie(response)
-            if new_cookie:
-                self._cookie = new_cookie
-                return
+
+        if status == 302 and new_cookie:
+            self._set_cookie(new_cookie)
+            return
 
         raise AuthenticationError("Invalid username or password")
 
     async def _get_user_id(self) -> str:
-        response = await self._request(f"{BASE_URL}/", allow_redirects=False)
-        if response.status != 302 or "Location" not in response.headers:
-            raise AuthenticationError("Could not determine account ID")
+        async with self._request(f"{self.base_url}/", allow_redirects=False) as response:
+            if response.status != 302 or "Location" not in response.headers:
+                raise AuthenticationError("Could not determine account ID")
+
+            location = response.headers["Location"]
 
-        location = response.headers["Location"]
         self.account_id = location.split("/")[4]
+        self._notify_session_update()
         return self.account_id
 
+    async def _csrf_token(self) -> str:
+        """Return the CSRF token for the current session, fetching it when needed.
+
+        The token is cached until the session cookie changes or the server
+        rejects it, so a command normally costs a single request.
+        """
+        if self._csrf and self._csrf_cookie == self._cookie:
+            return self._csrf
+        with _phase("csrf") as trace:
+            if trace is not None:
+                trace.csrf_refreshed = True
+            return await self._single_flight("csrf", self._refresh_csrf_token)
+
+    async def _refresh_csrf_token(self) -> str:
+        csrf = await self._fresh_csrf_token()
+        self._csrf = csrf
+        self._csrf_cookie = self._cookie
+        return csrf
+
     async def _fresh_csrf_token(self) -> str:
-        """Fetch a fresh CSRF token (needed before each action request)."""
-        response = await self._request(LOGIN_URL)
-        if response.status != 200:
-            raise AuthenticationError("Could not get CSRF token")
+        """Fetch a fresh CSRF token from the login page."""
+        async with self._request(self.base_url + LOGIN_PATH) as response:
+            if response.status != 200:
+                raise AuthenticationError("Could not get CSRF token")
+
+            html = await response.text()
+            new_cookie = self._extract_cookie(response)
 
-        html = await response.text()
-        new_cookie = self._extract_cookie(response)
         if new_cookie:
-            self._cookie = new_cookie
+            self._set_cookie(new_cookie)
         return self._parse_csrf(html)
 
     async def _send_function(self, device_uuid: str, code: str, name: str) -> bool:
         """Send a function command to a device."""
-        await self._ensure_authenticated()
-        csrf = await self._fresh_csrf_token()
-
-        url = f"{BASE_URL}/api/devices/{device_uuid}/functions"
+        url = f"{self.base_url}/api/devices/{device_uuid}/functions"
         headers = {
-            "x-csrf-token": csrf,
             "x-requested-with": "XMLHttpRequest",
             "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
         }
@@ -136,28 +351,96 @@ class GpsClient:
             "function[code]": code,
             "function[name]": name,
         }
+        return await self._post_action(url, data, headers)
 
-        response = await self._request(url, data=data, extra_headers=headers)
-        return response.status == 200
+    async def _post_action(
+        self, url: str, data: dict, headers: dict, *, token_in_body: bool = False
+    ) -> bool:
+        """POST an action with the cached CSRF token, refreshing it once if rejected."""
+        await self._ensure_authenticated()
 
-    async def _get_device_data(self) -> list[TrackerDevice]:
-        url = DEVICE_URL.format(account_id=self.account_id)
-        response = await self._request(url, use_json=True)
+        for attempt in range(2):
+            csrf = await self._csrf_token()
+            cookie = self._cookie
+            payload = {**data, "authenticity_token": csrf} if token_in_body else data
+            with _phase("request") as trace:
+                async with self._request(
+                    url, data=payload, extra_headers={**headers, "x-csrf-token": csrf}
+                ) as response:
+                    status = response.status
+                    signed_out = status == 401 or (
+                        bool(response.history) and response.url.path == LOGIN_PATH
+                    )
+            if trace is not None:
+                trace.status = status
+
+            if signed_out:
+                self._drop_session(cookie)
+                raise AuthenticationError("Session expired")
+
+            if status not in CSRF_REJECTED_STATUSES or attempt:
+                return status == 200
+
+            _LOGGER.debug("CSRF token rejected with status %s, refreshing", status)
+            if self._csrf == csrf:
+                self._csrf = ""
+
+        return False
 
-        if response.status != 200:
-            _LOGGER.error("Cannot get devices, status %s", response.status)
-            self._cookie = ""
+    async def _get_device_data(self) -> list[TrackerDevice]:
+        url = self.base_url + DEVICE_PATH.format(account_id=self.account_id)
+        cookie = self._cookie
+        headers = {"If-None-Match": self._etag} if self._etag and self._devices else None
+        async with self._request(url, use_json=True, extra_headers=headers) as response:
+            if response.status == 304 and self._devices is not None:
+                _LOGGER.debug("Device list not modified")
+                return self._devices
+
+            if response.status != 200:
+                _LOGGER.error("Cannot get devices, status %s", response.status)
+                self._drop_session(cookie)
+                raise AuthenticationError(f"API returned status {response.status}")
+
+            body = await response.read()
+            self._etag = response.headers.get("ETag", "")
+
+        # Most polls return the exact same payload: hand back the previous list
+        # object so neither JSON decoding nor the coordinator's listeners run.
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        if digest == self._payload_digest and self._devices is not None:
+            _LOGGER.debug("Device payload unchanged")
+            return self._devices
+
+        self._devices = [self._strings.intern(device) for device in iter_devices(iter_chunks(body))]
+        self._strings.next_generation()
+        self._payload_digest = digest
+        _LOGGER.debug("Got %s devices", len(self._devices))
+        return self._devices
+
+    def _drop_session(self, cookie: str) -> None:
+        """Forget an expired session so the next request logs in again.
+
+        Only the session the failed request used is dropped; a concurrent
+        login may already have replaced it.
+        """
+        if self._cookie == cookie:
+            self._set_cookie("")
             self._csrf = ""
-            raise AuthenticationError(f"API returned status {response.status}")
 
-        data = await response.json(content_type=None)
-        _LOGGER.debug("Got %s devices", len(data))
-        return [item["device"] for item in data]
+    def _set_cookie(self, cookie: str) -> None:
+        if cookie != self._cookie:
+            self._cookie = cookie
+            self._notify_session_update()
+
+    def _notify_session_update(self) -> None:
+        if self.on_session_update is not None:
+            self.on_session_update()
 
     # ------------------------------------------------------------------
     # HTTP helper — sends cookies via raw header to avoid session jar issues
     # ------------------------------------------------------------------
 
+    @asynccontextmanager
     async def _request(
         self,
         url: str,
@@ -166,7 +449,17 @@ class GpsClient:
         allow_redirects: bool = True,
         use_json: bool = False,
         extra_headers: dict | None = None,
-    ):
+        cookie: str | None = None,
+    ) -> AsyncIterator[ClientResponse]:
+        """Perform a request and release the response when the block exits.
+
+        Callers must read everything they need from the response inside the
+        ``async with`` block; afterwards the connection is back in the pool.
+        GET requests are retried with backoff on network errors and 5xx
+        responses; POSTs are never repeated. All requests go through the
+        client's circuit breaker. ``cookie`` replaces the client's session
+        cookie for this request.
+        """
         headers: dict[str, str] = {}
 
         if data is not None:
@@ -179,18 +472,55 @@ class GpsClient:
 
         # Build cookie header manually so the session's cookie jar
         # never interferes with our authentication state.
+        if cookie is None:
+            cookie = self._cookie
         cookie_parts = ["accepted_cookies=true"]
-        if self._cookie:
-            cookie_parts.append(f"{SESSION_COOKIE}={self._cookie}")
+        if cookie:
+            cookie_parts.append(f"{SESSION_COOKIE}={cookie}")
         headers["Cookie"] = "; ".join(cookie_parts)
 
         _LOGGER.debug("[http] %s", url)
 
-        if data is not None:
-            return await self.session.post(
-                url, data=data, headers=headers, allow_redirects=allow_redirects
-            )
-        return await self.session.get(url, headers=headers, allow_redirects=allow_redirects)
+        retryable = data is None
+        attempt = 0
+        while True:
+            self.breaker.before_request()
+            try:
+                if data is not None:
+                    response = await self.session.post(
+                        url, data=data, headers=headers, allow_redirects=allow_redirects
+                    )
+                else:
+                    response = await self.session.get(
+                        url, headers=headers, allow_redirects=allow_redirects
+                    )
+            except (ClientError, TimeoutError) as err:
+                self.breaker.record_failure()
+                attempt += 1
+                if not retryable or attempt >= self.retry.attempts:
+                    raise
+                _LOGGER.debug("[http] %s failed (%s), retry %s", url, err, attempt)
+            except BaseException:
+                # Cancelled mid-request: no outcome, but never keep the probe slot
+                self.breaker.release_probe()
+                raise
+            else:
+                if response.status < 500:
+                    self.breaker.record_success()
+                    break
+                self.breaker.record_failure()
+                attempt += 1
+                if not retryable or attempt >= self.retry.attempts:
+                    break
+                _LOGGER.debug("[http] %s returned %s, retry %s", url, response.status, attempt)
+                response.release()
+
+            await asyncio.sleep(self.retry.delay(attempt - 1))
+
+        try:
+            yield response
+        finally:
+            response.release()
 
     # ------------------------------------------------------------------
     # Parsing helpers
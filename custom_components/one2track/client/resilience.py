@@ -0,0 +1,91 @@
+import logging
+import random
+import time
+from collections.abc import Callable
+from typing import NamedTuple
+
+from .client_types import CircuitOpenError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RetryPolicy(NamedTuple):
+    """Exponential backoff with full jitter for idempotent requests."""
+
+    attempts: int = 3
+    base_delay: float = 0.5  # seconds
+    max_delay: float = 8.0  # seconds
+
+    def delay(self, attempt: int) -> float:
+        """Return the sleep before retry number ``attempt`` (0-based)."""
+        # Full jitter spreads retries of many accounts instead of aligning them
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class CircuitBreaker:
+    """Stop calling the API after repeated failures and probe it again later.
+
+    closed -> open after ``failure_threshold`` consecutive failures. While open,
+    requests fail fast with CircuitOpenError. After ``reset_timeout`` seconds a
+    single half-open probe is let through; its outcome closes or re-opens the
+    circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.state = self.CLOSED
+
+    def before_request(self) -> None:
+        """Raise CircuitOpenError when a request is not allowed right now."""
+        if self.state == self.CLOSED:
+            return
+
+        if self.state == self.OPEN:
+            remaining = self._opened_at + self.reset_timeout - self._clock()
+            if remaining > 0:
+                raise CircuitOpenError(f"One2Track API unavailable, retrying in {remaining:.0f}s")
+            _LOGGER.debug("Circuit half-open, probing One2Track API")
+            self.state = self.HALF_OPEN
+
+        if self._probe_in_flight:
+            raise CircuitOpenError("One2Track API unavailable, probe in progress")
+        self._probe_in_flight = True
+
+    def release_probe(self) -> None:
+        """Give up a probe that ended without an outcome, e.g. when cancelled.
+
+        The circuit stays half-open, so the next request becomes the probe.
+        """
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            _LOGGER.info("One2Track API reachable again, closing circuit")
+        self.state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                _LOGGER.warning(
+                    "One2Track API failing, pausing requests for %ss", self.reset_timeout
+                )
+            self.state = self.OPEN
+            self._opened_at = self._clock()
@@ -0,0 +1,58 @@
+import logging
+
+from aiohttp import ClientSession, ClientTimeout, DummyCookieJar, TCPConnector
+
+_LOGGER = logging.getLogger(__name__)
+
+# All accounts talk to the same host, so a single pool is shared between them.
+CONNECTION_LIMIT = 20
+CONNECTION_LIMIT_PER_HOST = 8
+DNS_CACHE_TTL = 300  # seconds
+KEEPALIVE_TIMEOUT = 75  # seconds
+# Three attempts plus their backoff (at most 1.5 s) stay within the
+# coordinator's 30 s refresh budget
+REQUEST_TIMEOUT = 8  # seconds
+
+
+class SharedSession:
+    """Reference-counted aiohttp session shared by all GpsClient instances."""
+
+    def __init__(self) -> None:
+        self._session: ClientSession | None = None
+        self._refs = 0
+
+    @property
+    def refs(self) -> int:
+        return self._refs
+
+    def acquire(self) -> ClientSession:
+        """Return the shared session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            _LOGGER.debug("Creating shared One2Track HTTP session")
+            connector = TCPConnector(
+                limit=CONNECTION_LIMIT,
+                limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = ClientSession(
+                connector=connector,
+                cookie_jar=DummyCookieJar(),
+                timeout=ClientTimeout(total=REQUEST_TIMEOUT),
+            )
+            self._refs = 0
+        self._refs += 1
+        return self._session
+
+    async def release(self, session: ClientSession) -> None:
+        """Drop one reference and close the session when nobody uses it anymore."""
+        if session is not self._session or self._refs == 0:
+            return
+        self._refs -= 1
+        if self._refs == 0:
+            _LOGGER.debug("Closing shared One2Track HTTP session")
+            self._session = None
+            await session.close()
+
+
+shared_session = SharedSession()
@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, replace
+from typing import Any
+
+from aiohttp import ClientError
+
+from .client import AuthenticationError, CommandResult, DeviceCommand, RetryPolicy
+
+LOGGER = logging.getLogger(__name__)
+
+SENT = "sent"
+FAILED = "failed"
+EXPIRED = "expired"
+
+# Watches that are off or out of reach get a few minutes to come back
+COMMAND_RETRY = RetryPolicy(attempts=8, base_delay=15.0, max_delay=600.0)
+# A command still pending after this long is dropped instead of sent late
+COMMAND_MAX_AGE = 60 * 60  # seconds
+# Commands handed to the client per round, and the pause between rounds
+MAX_BATCH = 8
+MIN_ROUND_INTERVAL = 1.0  # seconds
+
+
+@dataclass(frozen=True, slots=True)
+class QueuedCommand:
+    command_id: str
+    device_uuid: str
+    command: str
+    message: str | None
+    created: float  # epoch seconds
+    attempts: int = 0
+    next_attempt: float = 0.0  # epoch seconds
+    error: str | None = None
+
+    @property
+    def key(self) -> tuple[str, str, str | None]:
+        return self.device_uuid, self.command, self.message
+
+    def as_device_command(self) -> DeviceCommand:
+        return DeviceCommand(self.device_uuid, self.command, self.message)
+
+
+class CommandQueue:
+    """Pending device commands in the order they were queued.
+
+    A command equal to one that is still pending (same device, command and
+    message) is merged into it. ``on_change`` is called after every change so
+    the owner can persist ``as_data()``.
+    """
+
+    def __init__(
+        self,
+        stored: dict[str, Any] | None = None,
+        *,
+        on_change: Callable[[], None] | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._pending: dict[str, QueuedCommand] = {}
+        for data in (stored or {}).get("commands", []):
+            command = QueuedCommand(**data)
+            self._pending[command.command_id] = command
+        self._on_change = on_change
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def as_data(self) -> dict[str, Any]:
+        return {"commands": [asdict(command) for command in self._pending.values()]}
+
+    def enqueue(self, device_uuid: str, command: str, message: str | None = None) -> QueuedCommand:
+        """Queue a command, or return the pending one it duplicates."""
+        key = (device_uuid, command, message)
+        for pending in self._pending.values():
+            if pending.key == key:
+                return pending
+
+        queued = QueuedCommand(uuid.uuid4().hex, device_uuid, command, message, self._clock())
+        self._pending[queued.command_id] = queued
+        self._changed()
+        return queued
+
+    def due(self, limit: int = MAX_BATCH) -> list[QueuedCommand]:
+        now = self._clock()
+        return [c for c in self._pending.values() if c.next_attempt <= now][:limit]
+
+    def next_attempt(self) -> float | None:
+        return min((c.next_attempt for c in self._pending.values()), default=None)
+
+    def complete(self, command_id: str) -> QueuedCommand | None:
+        command = self._pending.pop(command_id, None)
+        if command is not None:
+            self._changed()
+        return command
+
+    def fail(self, command_id: str, error: str | None) -> QueuedCommand | None:
+        """Schedule a retry; return the command if it will be retried."""
+        command = self._pending.get(command_id)
+        if command is None:
+            return None
+        attempts = command.attempts + 1
+        if attempts >= COMMAND_RETRY.attempts:
+            del self._pending[command_id]
+            self._changed()
+            return None
+        command = self._pending[command_id] = replace(
+            command,
+            attempts=attempts,
+            next_attempt=self._clock() + COMMAND_RETRY.delay(attempts - 1),
+            error=error,
+        )
+        self._changed()
+        return command
+
+    def expire(self) -> list[QueuedCommand]:
+        """Remove and return commands pending for longer than ``COMMAND_MAX_AGE``."""
+        cutoff = self._clock() - COMMAND_MAX_AGE
+        expired = [c for c in self._pending.values() if c.created < cutoff]
+        for command in expired:
+            del self._pending[command.command_id]
+        if expired:
+            self._changed()
+        return expired
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change()
+
+
+Outcome = Callable[[QueuedCommand, str, CommandResult | None], None]
+
+
+class CommandWorker:
+    """Drain a CommandQueue through the client in the background.
+
+    Every round sends up to ``MAX_BATCH`` due commands with ``send`` and
+    reports each final outcome (sent, failed, or expired) through
+    ``on_outcome``. Only failures the client marks retryable, i.e. where the
+    command surely did not reach the portal, are retried with exponential
+    backoff; anything else could deliver a command twice.
+    """
+
+    def __init__(
+        self,
+        queue: CommandQueue,
+        send: Callable[[list[DeviceCommand]], Awaitable[list[CommandResult]]],
+        on_outcome: Outcome,
+    ) -> None:
+        self.queue = queue
+        self._send = send
+        self._on_outcome = on_outcome
+        self._wakeup = asyncio.Event()
+        self._waiters: dict[str, list[asyncio.Future]] = {}
+
+    def wake(self) -> None:
+        """Look for due commands now, e.g. after enqueueing one."""
+        self._wakeup.set()
+
+    async def async_wait(
+        self, command_id: str, timeout: float
+    ) -> tuple[QueuedCommand, str, CommandResult | None] | None:
+        """Wait for the final outcome of a queued command, or None on timeout.
+
+        Retries keep going after a timeout; the outcome event still follows.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(command_id, []).append(future)
+        try:
+            async with asyncio.timeout(timeout):
+                return await future
+        except TimeoutError:
+            return None
+        finally:
+            waiters = self._waiters.get(command_id, [])
+            if future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._waiters[command_id]
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self._round()
+            except Exception:
+                # The queue must outlive any single bad round
+                LOGGER.exception("Unexpected error while sending queued commands")
+                await asyncio.sleep(MIN_ROUND_INTERVAL)
+
+    async def _round(self) -> None:
+        for command in self.queue.expire():
+            LOGGER.warning("Dropping expired %s for %s", command.command, command.device_uuid)
+            self._report(command, EXPIRED, None)
+
+        batch = self.queue.due()
+        if batch:
+            await self._send_batch(batch)
+            await asyncio.sleep(MIN_ROUND_INTERVAL)
+            return
+
+        next_attempt = self.queue.next_attempt()
+        timeout = None if next_attempt is None else max(0.0, next_attempt - time.time())
+        self._wakeup.clear()
+        try:
+            async with asyncio.timeout(timeout):
+                await self._wakeup.wait()
+        except TimeoutError:
+            pass
+
+    async def _send_batch(self, batch: list[QueuedCommand]) -> None:
+        try:
+            results = await self._send([command.as_device_command() for command in batch])
+        except (ClientError, AuthenticationError, TimeoutError) as err:
+            # Login or the CSRF token failed, so nothing was sent
+            results = self._batch_failed(batch, err, retryable=True)
+        except Exception as err:
+            # Some commands may have gone out before this, so none is resent
+            LOGGER.exception("Sending %s queued commands failed", len(batch))
+            results = self._batch_failed(batch, err, retryable=False)
+
+        for command, result in zip(batch, results, strict=True):
+            if result.success:
+                self.queue.complete(command.command_id)
+                self._report(command, SENT, result)
+            elif not result.retryable:
+                self.queue.complete(command.command_id)
+                LOGGER.warning(
+                    "Failed to send %s to %s: %s",
+                    command.command,
+                    command.device_uuid,
+                    result.error,
+                )
+                self._report(replace(command, error=result.error), FAILED, result)
+            elif self.queue.fail(command.command_id, result.error) is None:
+                LOGGER.warning(
+                    "Giving up on %s for %s: %s", command.command, command.device_uuid, result.error
+                )
+                self._report(replace(command, error=result.error), FAILED, result)
+            else:
+                LOGGER.debug("Will retry %s for %s", command.command, command.device_uuid)
+
+    @staticmethod
+    def _batch_failed(
+        batch: list[QueuedCommand], err: Exception, *, retryable: bool
+    ) -> list[CommandResult]:
+        error = str(err) or type(err).__name__
+        return [
+            CommandResult(
+                command.device_uuid, command.command, False, 0.0, error, retryable=retryable
+            )
+            for command in batch
+        ]
+
+    def _report(self, command: QueuedCommand, status: str, result: CommandResult | None) -> None:
+        try:
+            self._on_outcome(command, status, result)
+        except Exception:
+            LOGGER.exception("Error reporting the outcome of %s", command.command)
+        for future in self._waiters.pop(command.command_id, []):
+            if not future.done():
+                future.set_result((command, status, result))
+
+
+def result_data(result: CommandResult | None) -> dict[str, Any]:
+    """Describe how the last attempt of a command went, with phase times in ms."""
+    if result is None:
+        return {}
+    phases = result.phases or {}
+    return {
+        "http_status": result.status,
+        "reauthenticated": result.reauthenticated,
+        "csrf_refreshed": result.csrf_refreshed,
+        "latency_ms": {
+            **{phase: round(seconds * 1000, 1) for phase, seconds in phases.items()},
+            "total": round(result.elapsed * 1000, 1),
+        },
+    }
+
+
+def outcome_event_data(
+    command: QueuedCommand, status: str, result: CommandResult | None
+) -> dict[str, Any]:
+    """Build the data of the bus event that reports a command's outcome."""
+    return {
+        "command_id": command.command_id,
+        "device_uuid": command.device_uuid,
+        "command": command.command,
+        "status": status,
+        "attempts": command.attempts + (result is not None),
+        "error": None if status == SENT else command.error,
+        **result_data(result),
+    }
@@ -2,10 +2,34 @@ import logging
 
 DOMAIN = "one2track"
 DEFAULT_UPDATE_RATE_MIN = 1
+DEFAULT_MAX_UPDATE_RATE_MIN = 15
+
+# In-memory location history per device
+HISTORY_MAX_ENTRIES = 1440
+HISTORY_MAX_AGE_HOURS = 24
+
+# Persistent storage
+STORAGE_VERSION = 1
+SESSION_SAVE_DELAY = 10  # seconds
+COMMAND_SAVE_DELAY = 1  # seconds
+
+# hass.data key of the entity/device/config entry index shared by all entries
+DEVICE_INDEX = f"{DOMAIN}_device_index"
+
+# Bus event fired when a device enters, leaves or dwells in a geofence
+EVENT_GEOFENCE = f"{DOMAIN}_geofence"
+# Bus event fired when a queued command was sent, failed for good or expired
+EVENT_COMMAND = f"{DOMAIN}_command"
 
 # Config keys
 CONF_USER_NAME = "Username"
 CONF_PASSWORD = "Password"
 CONF_ID = "AccountID"
 
+# Option keys
+CONF_MIN_UPDATE_INTERVAL = "min_update_interval"  # minutes
+CONF_MAX_UPDATE_INTERVAL = "max_update_interval"  # minutes
+CONF_SUPPRESS_JITTER = "suppress_jitter"
+DEFAULT_SUPPRESS_JITTER = True
+
 LOGGER = logging.getLogger(__package__)
@@ -3,9 +3,21 @@ import logging
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.core import callback
 
 from .client import AuthenticationError, One2TrackConfig, get_client
-from .common import CONF_ID, CONF_PASSWORD, CONF_USER_NAME, DOMAIN
+from .common import (
+    CONF_ID,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_PASSWORD,
+    CONF_SUPPRESS_JITTER,
+    CONF_USER_NAME,
+    DEFAULT_MAX_UPDATE_RATE_MIN,
+    DEFAULT_SUPPRESS_JITTER,
+    DEFAULT_UPDATE_RATE_MIN,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -13,6 +25,11 @@ _LOGGER = logging.getLogger(__name__)
 class One2TrackConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return One2TrackOptionsFlow()
+
     async def async_step_user(self, user_input=None):
         errors = {}
         user_input = user_input or {}
@@ -39,8 +56,8 @@ class One2TrackConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             except AuthenticationError:
                 errors["base"] = "authentication_error"
             finally:
-                if client and hasattr(client, "session"):
-                    await client.session.close()
+                if client:
+                    await client.close()
 
         return self.async_show_form(
             step_id="user",
@@ -49,3 +66,35 @@ class One2TrackConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             ),
             errors=errors,
         )
+
+
+class One2TrackOptionsFlow(config_entries.OptionsFlow):
+    async def async_step_init(self, user_input=None):
+        errors = {}
+        if user_input is not None:
+            if user_input[CONF_MAX_UPDATE_INTERVAL] < user_input[CONF_MIN_UPDATE_INTERVAL]:
+                errors["base"] = "invalid_interval"
+            else:
+                return self.async_create_entry(data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_MIN_UPDATE_INTERVAL,
+                        default=options.get(CONF_MIN_UPDATE_INTERVAL, DEFAULT_UPDATE_RATE_MIN),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+                    vol.Required(
+                        CONF_MAX_UPDATE_INTERVAL,
+                        default=options.get(CONF_MAX_UPDATE_INTERVAL, DEFAULT_MAX_UPDATE_RATE_MIN),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=120)),
+                    vol.Required(
+                        CONF_SUPPRESS_JITTER,
+                        default=options.get(CONF_SUPPRESS_JITTER, DEFAULT_SUPPRESS_JITTER),
+                    ): bool,
+                }
+            ),
+            errors=errors,
+        )
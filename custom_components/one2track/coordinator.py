@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from collections.abc import Iterable
 from datetime import timedelta
 
 from aiohttp import ClientError
@@ -10,34 +11,127 @@ from homeassistant.helpers.update_coordinator import (
 )
 from homeassistant.util import dt as dt_util
 
-from .client import AuthenticationError, GpsClient
-from .common import DEFAULT_UPDATE_RATE_MIN
+from .client import AuthenticationError, GpsClient, TrackerDevice
+from .common import (
+    DEFAULT_MAX_UPDATE_RATE_MIN,
+    DEFAULT_UPDATE_RATE_MIN,
+    EVENT_GEOFENCE,
+    HISTORY_MAX_AGE_HOURS,
+    HISTORY_MAX_ENTRIES,
+)
+from .geofence import GeofenceEngine, GeofenceEvent
+from .history import LocationHistory
+from .models import DeviceSnapshot
+from .polling import AdaptivePollInterval
+from .trips import TripTracker, suppress_jitter
 
 LOGGER = logging.getLogger(__name__)
 
 
 class GpsCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass: HomeAssistant, gps_api: GpsClient):
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        gps_api: GpsClient,
+        min_interval: timedelta = timedelta(minutes=DEFAULT_UPDATE_RATE_MIN),
+        max_interval: timedelta = timedelta(minutes=DEFAULT_MAX_UPDATE_RATE_MIN),
+        suppress_jitter: bool = True,
+    ):
+        self.poll_interval = AdaptivePollInterval(min_interval, max_interval)
         super().__init__(
             hass,
             LOGGER,
             name="One2Track",
-            update_interval=timedelta(minutes=DEFAULT_UPDATE_RATE_MIN),
+            update_interval=self.poll_interval.interval,
             always_update=False,
         )
         self.gps_api = gps_api
+        self.suppress_jitter = suppress_jitter
         self.last_update = None
+        self._source: list[TrackerDevice] | None = None
+        self._raw: dict[str, TrackerDevice] = {}
+        self._by_uuid: dict[str, DeviceSnapshot] = {}
+        self.history: dict[str, LocationHistory] = {}
+        self.trips = TripTracker()
+        self.geofences = GeofenceEngine()
 
-    async def _async_update_data(self):
-        """Fetch data from API endpoint."""
+    async def _async_update_data(self) -> dict[str, DeviceSnapshot]:
+        """Fetch data from API endpoint, keyed by device uuid."""
         try:
             async with asyncio.timeout(30):
                 data = await self.gps_api.update()
 
                 LOGGER.debug("Update from the coordinator %s", data)
                 self.last_update = dt_util.utcnow()
-                return data
+                devices = self._index(data)
+                for history in self.history.values():
+                    history.evict_before(self.last_update)
+                self._fire_geofence_events(self.geofences.check_dwell(self.last_update))
+                interval = self.poll_interval.next_interval(devices.values(), self.last_update)
+                if interval != self.update_interval:
+                    LOGGER.debug("Polling One2Track every %s", interval)
+                    self.update_interval = interval
+                return devices
 
         except (ClientError, AuthenticationError, TimeoutError) as err:
             LOGGER.error("Error updating from One2Track API: %s", err)
             raise UpdateFailed(f"Error communicating with API: {err}") from err
+
+    async def async_start_burst(self, device_uuids: Iterable[str]) -> None:
+        """Poll this account fast while the given watches look for a fresh fix."""
+        devices = [self.data[uuid] for uuid in device_uuids if self.data and uuid in self.data]
+        interval = self.poll_interval.start_burst(devices, dt_util.utcnow())
+        if interval != self.update_interval:
+            LOGGER.debug("Burst polling One2Track every %s", interval)
+            self.update_interval = interval
+        await self.async_request_refresh()
+
+    def _index(self, devices: list[TrackerDevice]) -> dict[str, DeviceSnapshot]:
+        # The client hands back the same list when the payload did not change;
+        # reuse the index too so listeners are not triggered.
+        if devices is self._source:
+            return self._by_uuid
+
+        raw: dict[str, TrackerDevice] = {}
+        snapshots: dict[str, DeviceSnapshot] = {}
+        changed: list[DeviceSnapshot] = []
+        for device in devices:
+            uuid = device["uuid"]
+            raw[uuid] = device
+            previous = self._by_uuid.get(uuid)
+            if previous is not None and self._raw.get(uuid) == device:
+                # Unchanged watch: keep the already parsed snapshot
+                snapshots[uuid] = previous
+            else:
+                snapshot = DeviceSnapshot.from_device(device)
+                self._record_history(snapshot)
+                if self.suppress_jitter and previous is not None:
+                    snapshot = suppress_jitter(previous, snapshot)
+                snapshots[uuid] = snapshot
+                changed.append(snapshot)
+
+        self.trips.ingest(changed, dt_util.now().date())
+        self._fire_geofence_events(self.geofences.evaluate(changed))
+        for uuid in self.history.keys() - snapshots.keys():
+            del self.history[uuid]
+        for uuid in self._by_uuid.keys() - snapshots.keys():
+            self.trips.remove(uuid)
+            self.geofences.forget(uuid)
+
+        self._source = devices
+        self._raw = raw
+        self._by_uuid = snapshots
+        return snapshots
+
+    def _record_history(self, device: DeviceSnapshot) -> None:
+        history = self.history.get(device.uuid)
+        if history is None:
+            history = self.history[device.uuid] = LocationHistory(
+                HISTORY_MAX_ENTRIES, timedelta(hours=HISTORY_MAX_AGE_HOURS)
+            )
+        history.append(device)
+
+    def _fire_geofence_events(self, events: list[GeofenceEvent]) -> None:
+        for event in events:
+            LOGGER.debug("%s %s geofence %s", event.device.name, event.kind, event.fence.name)
+            self.hass.bus.async_fire(EVENT_GEOFENCE, event.as_event_data())
@@ -0,0 +1,55 @@
+from collections.abc import Iterable
+
+from homeassistant.core import HomeAssistant
+
+from .common import DEVICE_INDEX
+
+
+class DeviceIndex:
+    """Maps entity ids to device uuids and device uuids to their config entry.
+
+    Entities register themselves when added to Home Assistant, and every
+    config entry publishes its device uuids on setup and after each refresh
+    that changed them, so service calls resolve targets without scanning.
+    """
+
+    def __init__(self) -> None:
+        self._entities: dict[str, str] = {}  # entity_id -> device uuid
+        self._owners: dict[str, str] = {}  # device uuid -> config entry id
+        self._entry_devices: dict[str, frozenset[str]] = {}
+
+    def add_entity(self, entity_id: str, device_uuid: str) -> None:
+        self._entities[entity_id] = device_uuid
+
+    def remove_entity(self, entity_id: str) -> None:
+        self._entities.pop(entity_id, None)
+
+    def set_devices(self, entry_id: str, device_uuids: Iterable[str]) -> None:
+        devices = frozenset(device_uuids)
+        previous = self._entry_devices.get(entry_id, frozenset())
+        if devices == previous:
+            return
+        for device_uuid in previous - devices:
+            if self._owners.get(device_uuid) == entry_id:
+                del self._owners[device_uuid]
+        for device_uuid in devices:
+            self._owners[device_uuid] = entry_id
+        self._entry_devices[entry_id] = devices
+
+    def remove_entry(self, entry_id: str) -> None:
+        self.set_devices(entry_id, ())
+        self._entry_devices.pop(entry_id, None)
+
+    def device_uuid(self, entity_id: str) -> str | None:
+        return self._entities.get(entity_id)
+
+    def entry_id(self, device_uuid: str) -> str | None:
+        return self._owners.get(device_uuid)
+
+
+def get_device_index(hass: HomeAssistant) -> DeviceIndex:
+    """Return the index shared by all One2Track config entries."""
+    index = hass.data.get(DEVICE_INDEX)
+    if index is None:
+        index = hass.data[DEVICE_INDEX] = DeviceIndex()
+    return index
@@ -1,16 +1,24 @@
 import logging
+from typing import Any
 
 from homeassistant.components.device_tracker.config_entry import TrackerEntity
-from homeassistant.components.zone import async_active_zone
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_FRIENDLY_NAME, ATTR_LATITUDE, ATTR_LONGITUDE
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.event import TrackStates, async_track_state_change_filtered
 
-from .client import TrackerDevice
 from .common import DOMAIN
 from .coordinator import GpsCoordinator
+from .entity import One2TrackEntity
+from .geo import DEFAULT_ACCURACY_M
+from .models import DeviceSnapshot
+from .zones import ZoneArea, ZoneResolver, zone_lookup_changed
+
+ZONE_DOMAIN = "zone"
+# Attributes that describe the fix itself; while jitter is suppressed they are
+# those of the kept position, so the written state stays consistent
+FIX_ATTRIBUTES = ("last_location_update", "address", "altitude", "location_type")
 
 LOGGER = logging.getLogger(__name__)
 
@@ -25,33 +33,72 @@ async def async_setup_entry(
 
     coordinator: GpsCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
 
-    devices: list[TrackerDevice] = coordinator.data or []
+    devices = list((coordinator.data or {}).values())
 
     LOGGER.info("Adding %s found one2track devices", len(devices))
 
+    zones = ZoneResolver(lambda: _zone_areas(hass))
+
+    @callback
+    def _zones_changed(event) -> None:
+        # A zone's state and "persons" follow who is in it; only a changed
+        # position, radius or name invalidates the grid.
+        old_state = event.data.get("old_state")
+        new_state = event.data.get("new_state")
+        if zone_lookup_changed(
+            old_state and old_state.attributes, new_state and new_state.attributes
+        ):
+            zones.invalidate()
+
+    tracker = async_track_state_change_filtered(
+        hass, TrackStates(False, set(), {ZONE_DOMAIN}), _zones_changed
+    )
+    entry.async_on_unload(tracker.async_remove)
+
     async_add_entities(
-        [One2TrackDeviceTracker(coordinator, hass, device) for device in devices],
+        [One2TrackDeviceTracker(coordinator, zones, device) for device in devices],
         update_before_add=False,
     )
 
     LOGGER.debug("Done adding all trackers.")
 
 
-class One2TrackDeviceTracker(CoordinatorEntity, TrackerEntity):
-    _device: TrackerDevice
+def _zone_areas(hass: HomeAssistant) -> list[ZoneArea]:
+    areas = []
+    for state in hass.states.async_all(ZONE_DOMAIN):
+        attributes = state.attributes
+        try:
+            areas.append(
+                ZoneArea(
+                    state.entity_id,
+                    attributes.get(ATTR_FRIENDLY_NAME, state.entity_id),
+                    float(attributes[ATTR_LATITUDE]),
+                    float(attributes[ATTR_LONGITUDE]),
+                    float(attributes.get("radius", 0)),
+                    bool(attributes.get("passive", False)),
+                )
+            )
+        except (KeyError, TypeError, ValueError):
+            LOGGER.debug("Ignoring zone %s without a usable position", state.entity_id)
+    return areas
 
+
+class One2TrackDeviceTracker(One2TrackEntity, TrackerEntity):
     def __init__(
-        self, coordinator: GpsCoordinator, hass: HomeAssistant, device: TrackerDevice
+        self, coordinator: GpsCoordinator, zones: ZoneResolver, device: DeviceSnapshot
     ) -> None:
-        super().__init__(coordinator)
-        self._hass = hass
-        self._device = device
-        self._attr_unique_id = device["uuid"]
+        super().__init__(coordinator, device)
+        self._zones = zones
+        self._attr_unique_id = device.uuid
+
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+        self._zones.forget(self._device_uuid)
 
     @property
     def name(self):
         """Return the name of the device."""
-        return self._device["name"]
+        return self._device.name
 
     @property
     def source_type(self):
@@ -61,19 +108,9 @@ class One2TrackDeviceTracker(CoordinatorEntity, TrackerEntity):
     @property
     def location_accuracy(self):
         """Return the gps accuracy of the device in meters."""
-        meta = self._device.get("last_location", {}).get("meta_data")
-        if meta and "accuracy_meters" in meta:
-            return meta["accuracy_meters"]
-        return 10
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return the device_info of the device."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._device["uuid"])},
-            serial_number=self._device["serial_number"],
-            name=self._device["name"],
-        )
+        if self._device.position_accuracy is not None:
+            return self._device.position_accuracy
+        return DEFAULT_ACCURACY_M
 
     @property
     def icon(self):
@@ -82,77 +119,51 @@ class One2TrackDeviceTracker(CoordinatorEntity, TrackerEntity):
     @property
     def extra_state_attributes(self):
         """Return device specific attributes."""
-        location = self._device.get("last_location", {})
-        simcard = self._device.get("simcard", {})
+        anchor = self._device.anchor
+        if anchor is None:
+            return self._device.attributes
         return {
-            "serial_number": self._device["serial_number"],
-            "uuid": self._device["uuid"],
-            "name": self._device["name"],
-            "status": self._device["status"],
-            "phone_number": self._device["phone_number"],
-            "tariff_type": simcard.get("tariff_type"),
-            "balance_cents": simcard.get("balance_cents"),
-            "last_communication": location.get("last_communication"),
-            "last_location_update": location.get("last_location_update"),
-            "altitude": location.get("altitude"),
-            "location_type": location.get("location_type"),
-            "address": location.get("address"),
-            "signal_strength": location.get("signal_strength"),
-            "satellite_count": location.get("satellite_count"),
-            "host": location.get("host"),
-            "port": location.get("port"),
+            **self._device.attributes,
+            **{key: anchor.attributes.get(key) for key in FIX_ATTRIBUTES},
         }
 
     @property
     def battery_level(self):
         """Return battery value of the device."""
-        return self._device.get("last_location", {}).get("battery_percentage")
+        return self._device.battery
 
     @property
     def location_name(self):
         """Return a location name for the current location of the device."""
-        try:
-            if self.latitude is not None and self.longitude is not None:
-                zone_name = async_active_zone(
-                    self._hass, self.latitude, self.longitude, self.location_accuracy
-                )
-                if zone_name:
-                    return zone_name.name
-        except Exception as err:
-            LOGGER.error("Cannot get zone for tracker: %s", err)
+        if self.latitude is not None and self.longitude is not None:
+            zone = self._zones.resolve(
+                self._device_uuid, self.latitude, self.longitude, self.location_accuracy
+            )
+            if zone is not None:
+                return zone.name
 
-        return self._device.get("last_location", {}).get("address")
+        return (self._device.anchor or self._device).address
 
     @property
     def latitude(self):
         """Return latitude value of the device."""
-        val = self._device.get("last_location", {}).get("latitude")
-        if val is not None:
-            try:
-                return float(val)
-            except (ValueError, TypeError):
-                return None
-        return None
+        return self._device.latitude
 
     @property
     def longitude(self):
         """Return longitude value of the device."""
-        val = self._device.get("last_location", {}).get("longitude")
-        if val is not None:
-            try:
-                return float(val)
-            except (ValueError, TypeError):
-                return None
-        return None
-
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Respond to a DataUpdateCoordinator update."""
-        new_data: list[TrackerDevice] = self.coordinator.data
-        if new_data:
-            me = next((x for x in new_data if x["uuid"] == self.unique_id), None)
-            if me:
-                self._device = me
-            else:
-                LOGGER.error("Tracker %s not found in new data", self.unique_id)
-        self.async_write_ha_state()
+        return self._device.longitude
+
+    def _state_signature(self) -> tuple[Any, ...]:
+        # While the watch lies still the position fields above are pinned to the
+        # anchor, so a bounced fix alone does not change the signature.
+        return (
+            *super()._state_signature(),
+            self.name,
+            self.latitude,
+            self.longitude,
+            self.location_accuracy,
+            self.location_name,
+            self.battery_level,
+            self.extra_state_attributes,
+        )
@@ -0,0 +1,73 @@
+import logging
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .coordinator import GpsCoordinator
+from .device_index import get_device_index
+from .models import DeviceSnapshot
+
+LOGGER = logging.getLogger(__name__)
+
+
+class One2TrackEntity(CoordinatorEntity):
+    """Base class for entities that belong to a single One2Track device."""
+
+    coordinator: GpsCoordinator
+
+    def __init__(self, coordinator: GpsCoordinator, device: DeviceSnapshot) -> None:
+        super().__init__(coordinator)
+        self._device = device
+        self._device_uuid = device.uuid
+        self._device_missing = False
+        self._written_state: tuple[Any, ...] | None = None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self._written_state = self._state_signature()
+        get_device_index(self.hass).add_entity(self.entity_id, self._device_uuid)
+
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+        get_device_index(self.hass).remove_entity(self.entity_id)
+
+    @property
+    def available(self) -> bool:
+        return super().available and not self._device_missing
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        return self._device.device_info
+
+    def _state_signature(self) -> tuple[Any, ...]:
+        """Return the values that make up this entity's written state.
+
+        Platforms extend this with their state and attributes; a coordinator
+        update whose signature equals the last written one is not written.
+        """
+        return (self.available,)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Pick this entity's device from the coordinator's uuid index."""
+        device = (self.coordinator.data or {}).get(self._device_uuid)
+        if device is None:
+            if not self._device_missing:
+                LOGGER.warning("One2Track device %s is no longer in the account", self._device_uuid)
+            self._device_missing = True
+        else:
+            if self._device_missing:
+                LOGGER.info("One2Track device %s is back", self._device_uuid)
+            self._device_missing = False
+            self._device = device
+        self._write_state_if_changed()
+
+    @callback
+    def _write_state_if_changed(self) -> None:
+        signature = self._state_signature()
+        if signature == self._written_state:
+            return
+        self._written_state = signature
+        self.async_write_ha_state()
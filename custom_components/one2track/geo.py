@@ -0,0 +1,49 @@
+import math
+from collections.abc import Sequence
+
+EARTH_RADIUS_M = 6_371_008.8
+METERS_PER_DEG_LAT = 111_195.0
+# Grid cell edge in degrees, roughly 1.1 km of latitude
+CELL_DEG = 0.01
+# Accuracy assumed when the device does not report one
+DEFAULT_ACCURACY_M = 10.0
+
+
+def haversine_m(
+    lat1: Sequence[float],
+    lon1: Sequence[float],
+    lat2: Sequence[float],
+    lon2: Sequence[float],
+) -> list[float]:
+    """Great-circle distances in meters between paired coordinates, in one batch."""
+    radians = math.radians
+    sin, cos = math.sin, math.cos
+    result = []
+    for a_lat, a_lon, b_lat, b_lon in zip(
+        map(radians, lat1),
+        map(radians, lon1),
+        map(radians, lat2),
+        map(radians, lon2),
+        strict=True,
+    ):
+        h = sin((b_lat - a_lat) / 2) ** 2 + cos(a_lat) * cos(b_lat) * sin((b_lon - a_lon) / 2) ** 2
+        result.append(2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(1.0, h))))
+    return result
+
+
+def bounds_around(
+    latitude: float, longitude: float, meters: float
+) -> tuple[float, float, float, float]:
+    """Return (min_lat, min_lon, max_lat, max_lon) of a box reaching ``meters`` out."""
+    lat_span = meters / METERS_PER_DEG_LAT
+    lon_span = meters / (METERS_PER_DEG_LAT * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - lat_span, longitude - lon_span, latitude + lat_span, longitude + lon_span
+
+
+def grid_cells(bounds: tuple[float, float, float, float]) -> tuple[range, range]:
+    """Return the latitude and longitude cell ranges covering a bounding box."""
+    min_lat, min_lon, max_lat, max_lon = bounds
+    return (
+        range(math.floor(min_lat / CELL_DEG), math.floor(max_lat / CELL_DEG) + 1),
+        range(math.floor(min_lon / CELL_DEG), math.floor(max_lon / CELL_DEG) + 1),
+    )
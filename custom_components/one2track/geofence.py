@@ -0,0 +1,250 @@
+import math
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, NamedTuple
+
+from .geo import DEFAULT_ACCURACY_M, METERS_PER_DEG_LAT, bounds_around, grid_cells, haversine_m
+from .models import DeviceSnapshot
+
+ENTER = "enter"
+EXIT = "exit"
+DWELL = "dwell"
+
+DEFAULT_DWELL_S = 5 * 60
+# Fixes less precise than this never change a fence state
+MAX_FIX_ACCURACY_M = 250.0
+# Upper bound of the exit margin a poor fix can add
+MAX_HYSTERESIS_M = 100.0
+
+
+@dataclass(frozen=True, slots=True)
+class Geofence:
+    """A circle or polygon that a set of devices is tracked against.
+
+    A circle has ``latitude``, ``longitude`` and ``radius`` (meters); a
+    polygon has ``points`` as (latitude, longitude) pairs.
+    """
+
+    fence_id: str
+    name: str
+    device_uuids: frozenset[str]
+    latitude: float | None = None
+    longitude: float | None = None
+    radius: float | None = None
+    points: tuple[tuple[float, float], ...] = ()
+    dwell: float = DEFAULT_DWELL_S
+
+    def __post_init__(self) -> None:
+        if self.points:
+            if len(self.points) < 3:
+                raise ValueError("A polygon geofence needs at least three points")
+        elif self.latitude is None or self.longitude is None or not self.radius:
+            raise ValueError("A circle geofence needs a latitude, longitude and radius")
+        elif self.radius <= 0:
+            raise ValueError("The geofence radius must be positive")
+
+    @property
+    def bounds(self) -> tuple[float, float, float, float]:
+        if not self.points:
+            return bounds_around(self.latitude, self.longitude, self.radius)
+        latitudes = [lat for lat, _ in self.points]
+        longitudes = [lon for _, lon in self.points]
+        return min(latitudes), min(longitudes), max(latitudes), max(longitudes)
+
+    def signed_distance(self, latitude: float, longitude: float) -> float:
+        """Meters from the fence edge; negative inside the fence."""
+        if not self.points:
+            (distance,) = haversine_m([latitude], [longitude], [self.latitude], [self.longitude])
+            return distance - self.radius
+        return _polygon_signed_distance(self.points, latitude, longitude)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "fence_id": self.fence_id,
+            "name": self.name,
+            "device_uuids": sorted(self.device_uuids),
+            "latitude": self.latitude,
+            "longitude": self.longitude,
+            "radius": self.radius,
+            "points": [list(point) for point in self.points],
+            "dwell": self.dwell,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Geofence":
+        return cls(
+            fence_id=data["fence_id"],
+            name=data["name"],
+            device_uuids=frozenset(data.get("device_uuids", ())),
+            latitude=data.get("latitude"),
+            longitude=data.get("longitude"),
+            radius=data.get("radius"),
+            points=tuple((lat, lon) for lat, lon in data.get("points", ())),
+            dwell=data.get("dwell", DEFAULT_DWELL_S),
+        )
+
+
+def _polygon_signed_distance(
+    points: tuple[tuple[float, float], ...], latitude: float, longitude: float
+) -> float:
+    # Project onto a local plane in meters around the position, which puts
+    # the position at the origin.
+    scale = METERS_PER_DEG_LAT * math.cos(math.radians(latitude))
+    plane = [
+        ((lon - longitude) * scale, (lat - latitude) * METERS_PER_DEG_LAT) for lat, lon in points
+    ]
+
+    inside = False
+    nearest = math.inf
+    for (x1, y1), (x2, y2) in zip(plane, plane[1:] + plane[:1], strict=True):
+        if (y1 > 0) != (y2 > 0) and 0 < (x2 - x1) * -y1 / (y2 - y1) + x1:
+            inside = not inside
+        dx, dy = x2 - x1, y2 - y1
+        length = dx * dx + dy * dy
+        t = 0.0 if length == 0 else max(0.0, min(1.0, -(x1 * dx + y1 * dy) / length))
+        nearest = min(nearest, math.hypot(x1 + t * dx, y1 + t * dy))
+    return -nearest if inside else nearest
+
+
+class GeofenceEvent(NamedTuple):
+    kind: str
+    fence: Geofence
+    device: DeviceSnapshot
+    timestamp: datetime
+
+    def as_event_data(self) -> dict[str, Any]:
+        return {
+            "event": self.kind,
+            "fence_id": self.fence.fence_id,
+            "fence_name": self.fence.name,
+            "device_uuid": self.device.uuid,
+            "device_name": self.device.name,
+            "latitude": self.device.latitude,
+            "longitude": self.device.longitude,
+            "accuracy": self.device.position_accuracy,
+            "timestamp": self.timestamp.isoformat(),
+        }
+
+
+class GeofenceEngine:
+    """Track which devices are inside which fences and report transitions.
+
+    Fences are kept in the same grid as the zone lookup, so a position is only
+    measured against the fences near it. A device enters when its position is
+    inside the fence and only exits once it is further out than its accuracy
+    (capped at ``MAX_HYSTERESIS_M``), so a poor fix at the edge does not flap.
+    The first position seen for a device sets its state without events.
+    """
+
+    def __init__(self, fences: Iterable[Geofence] = ()) -> None:
+        self._fences: dict[str, Geofence] = {fence.fence_id: fence for fence in fences}
+        self._cells: dict[tuple[int, int], list[Geofence]] | None = None
+        # (device uuid, fence id) -> when the device entered
+        self._inside: dict[tuple[str, str], datetime] = {}
+        self._dwelled: set[tuple[str, str]] = set()
+        self._devices: dict[str, DeviceSnapshot] = {}
+
+    @property
+    def fences(self) -> list[Geofence]:
+        return list(self._fences.values())
+
+    def set_fence(self, fence: Geofence) -> None:
+        """Add a fence, replacing any fence with the same id."""
+        self.remove_fence(fence.fence_id)
+        self._fences[fence.fence_id] = fence
+        self._cells = None
+
+    def remove_fence(self, fence_id: str) -> bool:
+        if self._fences.pop(fence_id, None) is None:
+            return False
+        self._cells = None
+        for key in [key for key in self._inside if key[1] == fence_id]:
+            del self._inside[key]
+            self._dwelled.discard(key)
+        return True
+
+    def forget(self, uuid: str) -> None:
+        """Drop all state of a device that left the account."""
+        self._devices.pop(uuid, None)
+        for key in [key for key in self._inside if key[0] == uuid]:
+            del self._inside[key]
+            self._dwelled.discard(key)
+
+    def evaluate(self, devices: Iterable[DeviceSnapshot]) -> list[GeofenceEvent]:
+        """Test the new positions of ``devices`` and return the resulting events."""
+        events: list[GeofenceEvent] = []
+        for device in devices:
+            if (
+                device.latitude is None
+                or device.longitude is None
+                or device.last_location_update is None
+            ):
+                continue
+            accuracy = device.position_accuracy
+            if accuracy is None:
+                accuracy = DEFAULT_ACCURACY_M
+            if accuracy > MAX_FIX_ACCURACY_M:
+                continue
+            first_seen = device.uuid not in self._devices
+            self._devices[device.uuid] = device
+            margin = min(accuracy, MAX_HYSTERESIS_M)
+
+            # Fences the device is in come first, so an exit is reported
+            # before the enter of a neighbouring fence.
+            fences = {
+                fence_id: self._fences[fence_id]
+                for uuid, fence_id in self._inside
+                if uuid == device.uuid
+            }
+            for fence in self._nearby(device.latitude, device.longitude, margin):
+                if device.uuid in fence.device_uuids:
+                    fences.setdefault(fence.fence_id, fence)
+
+            timestamp = device.last_location_update
+            for fence in fences.values():
+                key = (device.uuid, fence.fence_id)
+                distance = fence.signed_distance(device.latitude, device.longitude)
+                if key in self._inside:
+                    if distance > margin:
+                        del self._inside[key]
+                        self._dwelled.discard(key)
+                        events.append(GeofenceEvent(EXIT, fence, device, timestamp))
+                elif distance <= 0:
+                    self._inside[key] = timestamp
+                    if first_seen:
+                        # Already inside when we started; do not report a dwell either
+                        self._dwelled.add(key)
+                    else:
+                        events.append(GeofenceEvent(ENTER, fence, device, timestamp))
+        return events
+
+    def check_dwell(self, now: datetime) -> list[GeofenceEvent]:
+        """Return a dwell event for every device inside a fence long enough."""
+        events = []
+        for key, since in self._inside.items():
+            if key in self._dwelled:
+                continue
+            fence = self._fences[key[1]]
+            if (now - since).total_seconds() >= fence.dwell:
+                self._dwelled.add(key)
+                events.append(GeofenceEvent(DWELL, fence, self._devices[key[0]], now))
+        return events
+
+    def _nearby(self, latitude: float, longitude: float, margin: float) -> list[Geofence]:
+        if self._cells is None:
+            self._cells = defaultdict(list)
+            for fence in self._fences.values():
+                lat_cells, lon_cells = grid_cells(fence.bounds)
+                for lat_cell in lat_cells:
+                    for lon_cell in lon_cells:
+                        self._cells[lat_cell, lon_cell].append(fence)
+
+        lat_cells, lon_cells = grid_cells(bounds_around(latitude, longitude, margin))
+        nearby: dict[str, Geofence] = {}
+        for lat_cell in lat_cells:
+            for lon_cell in lon_cells:
+                for fence in self._cells.get((lat_cell, lon_cell), ()):
+                    nearby[fence.fence_id] = fence
+        return list(nearby.values())
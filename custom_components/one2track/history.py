@@ -0,0 +1,118 @@
+import math
+from array import array
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from .models import DeviceSnapshot
+
+# Location types seen so far; the buffer stores an index into this list
+_LOCATION_TYPES: list[str | None] = [None]
+_LOCATION_TYPE_CODES: dict[str | None, int] = {None: 0}
+
+
+def _location_type_code(location_type: str | None) -> int:
+    code = _LOCATION_TYPE_CODES.get(location_type)
+    if code is None:
+        if len(_LOCATION_TYPES) > 255:
+            return 0
+        code = len(_LOCATION_TYPES)
+        _LOCATION_TYPES.append(location_type)
+        _LOCATION_TYPE_CODES[location_type] = code
+    return code
+
+
+def _optional(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+class LocationHistory:
+    """Bounded ring buffer of recent fixes for one device.
+
+    Every column is a preallocated ``array``, so the memory used per watch is
+    fixed by ``max_entries`` no matter how long Home Assistant runs. Entries
+    are evicted when the buffer is full or older than ``max_age``.
+    """
+
+    def __init__(self, max_entries: int, max_age: timedelta) -> None:
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._timestamps = array("d", bytes(8 * max_entries))
+        self._latitudes = array("d", bytes(8 * max_entries))
+        self._longitudes = array("d", bytes(8 * max_entries))
+        self._accuracies = array("d", bytes(8 * max_entries))
+        self._speeds = array("d", bytes(8 * max_entries))
+        self._batteries = array("h", bytes(2 * max_entries))
+        self._location_types = array("B", bytes(max_entries))
+        self._start = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def last_timestamp(self) -> float | None:
+        if not self._count:
+            return None
+        return self._timestamps[(self._start + self._count - 1) % self.max_entries]
+
+    def append(self, device: DeviceSnapshot) -> bool:
+        """Store the device's current fix if it is newer than the last one."""
+        if (
+            device.last_location_update is None
+            or device.latitude is None
+            or device.longitude is None
+        ):
+            return False
+        timestamp = device.last_location_update.timestamp()
+        last = self.last_timestamp
+        if last is not None and timestamp <= last:
+            return False
+
+        if self._count == self.max_entries:
+            self._start = (self._start + 1) % self.max_entries
+            self._count -= 1
+        index = (self._start + self._count) % self.max_entries
+        self._timestamps[index] = timestamp
+        self._latitudes[index] = device.latitude
+        self._longitudes[index] = device.longitude
+        self._accuracies[index] = math.nan if device.accuracy is None else device.accuracy
+        self._speeds[index] = math.nan if device.speed is None else device.speed
+        self._batteries[index] = -1 if device.battery is None else device.battery
+        self._location_types[index] = _location_type_code(device.location_type)
+        self._count += 1
+        return True
+
+    def evict_before(self, now: datetime) -> None:
+        """Drop entries older than ``max_age``."""
+        cutoff = (now - self.max_age).timestamp()
+        while self._count and self._timestamps[self._start] < cutoff:
+            self._start = (self._start + 1) % self.max_entries
+            self._count -= 1
+
+    def window(self, start: datetime | None = None, end: datetime | None = None) -> list[dict]:
+        """Return the fixes between ``start`` and ``end`` (inclusive), oldest first."""
+        low = start.timestamp() if start else -math.inf
+        high = end.timestamp() if end else math.inf
+        return [
+            self._entry(index)
+            for index in self._indices()
+            if low <= self._timestamps[index] <= high
+        ]
+
+    def _indices(self) -> range | list[int]:
+        end = self._start + self._count
+        if end <= self.max_entries:
+            return range(self._start, end)
+        return [*range(self._start, self.max_entries), *range(end - self.max_entries)]
+
+    def _entry(self, index: int) -> dict[str, Any]:
+        battery = self._batteries[index]
+        return {
+            "timestamp": datetime.fromtimestamp(self._timestamps[index], UTC).isoformat(),
+            "latitude": self._latitudes[index],
+            "longitude": self._longitudes[index],
+            "accuracy": _optional(self._accuracies[index]),
+            "speed": _optional(self._speeds[index]),
+            "battery": None if battery < 0 else battery,
+            "location_type": _LOCATION_TYPES[self._location_types[index]],
+        }
@@ -0,0 +1,127 @@
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from types import MappingProxyType
+from typing import Any
+
+from homeassistant.helpers.device_registry import DeviceInfo
+
+from .client import TrackerDevice
+from .common import DOMAIN
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceSnapshot:
+    """A device as seen in one refresh, parsed once for every platform."""
+
+    uuid: str
+    name: str
+    serial_number: str
+    status: str | None
+    latitude: float | None
+    longitude: float | None
+    accuracy: float | None  # meters
+    altitude: float | None
+    speed: float | None  # km/h
+    battery: int | None
+    signal_strength: int | None
+    satellite_count: int | None
+    steps: int | None
+    tumble: bool | None
+    location_type: str | None
+    address: str | None
+    last_communication: datetime | None
+    last_location_update: datetime | None
+    balance: float | None  # EUR
+    device_info: DeviceInfo
+    attributes: Mapping[str, Any]  # tracker state attributes, as reported by the API
+    # Set by the coordinator when this fix only bounced around the last accepted
+    # fix; latitude and longitude are then those of the anchor, everything else
+    # (accuracy included) is as reported.
+    anchor: "DeviceSnapshot | None" = None
+
+    @property
+    def jitter(self) -> bool:
+        return self.anchor is not None
+
+    @property
+    def position_accuracy(self) -> float | None:
+        """Accuracy of ``latitude`` and ``longitude``, which may be the anchor's."""
+        return self.accuracy if self.anchor is None else self.anchor.accuracy
+
+    @classmethod
+    def from_device(cls, device: TrackerDevice) -> "DeviceSnapshot":
+        location = device.get("last_location") or {}
+        meta = location.get("meta_data") or {}
+        simcard = device.get("simcard") or {}
+        uuid = device["uuid"]
+        cents = simcard.get("balance_cents")
+
+        return cls(
+            uuid=uuid,
+            name=device["name"],
+            serial_number=device["serial_number"],
+            status=device.get("status"),
+            latitude=_parse(float, location.get("latitude"), uuid, "latitude"),
+            longitude=_parse(float, location.get("longitude"), uuid, "longitude"),
+            accuracy=_parse(float, meta.get("accuracy_meters"), uuid, "accuracy"),
+            altitude=_parse(float, location.get("altitude"), uuid, "altitude"),
+            speed=_parse(float, location.get("speed"), uuid, "speed"),
+            battery=_parse(int, location.get("battery_percentage"), uuid, "battery"),
+            signal_strength=_parse(int, location.get("signal_strength"), uuid, "signal"),
+            satellite_count=_parse(int, location.get("satellite_count"), uuid, "satellites"),
+            steps=_parse(int, meta.get("steps"), uuid, "steps"),
+            tumble=meta.get("tumble") == "1" if meta else None,
+            location_type=location.get("location_type"),
+            address=location.get("address"),
+            last_communication=_parse(
+                _timestamp, location.get("last_communication"), uuid, "communication"
+            ),
+            last_location_update=_parse(
+                _timestamp, location.get("last_location_update"), uuid, "location"
+            ),
+            balance=round(cents / 100, 2) if isinstance(cents, int | float) else None,
+            device_info=DeviceInfo(
+                identifiers={(DOMAIN, uuid)},
+                serial_number=device["serial_number"],
+                name=device["name"],
+            ),
+            attributes=MappingProxyType(
+                {
+                    "serial_number": device["serial_number"],
+                    "uuid": uuid,
+                    "name": device["name"],
+                    "status": device.get("status"),
+                    "phone_number": device.get("phone_number"),
+                    "tariff_type": simcard.get("tariff_type"),
+                    "balance_cents": cents,
+                    "last_communication": location.get("last_communication"),
+                    "last_location_update": location.get("last_location_update"),
+                    "altitude": location.get("altitude"),
+                    "location_type": location.get("location_type"),
+                    "address": location.get("address"),
+                    "signal_strength": location.get("signal_strength"),
+                    "satellite_count": location.get("satellite_count"),
+                    "host": location.get("host"),
+                    "port": location.get("port"),
+                }
+            ),
+        )
+
+
+def _parse(convert, value, uuid: str, field: str):
+    if value is None or value == "":
+        return None
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        LOGGER.debug("Ignoring invalid %s %r for device %s", field, value, uuid)
+        return None
+
+
+def _timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=UTC)
@@ -0,0 +1,108 @@
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from .models import DeviceSnapshot
+
+# Intermediate back-off steps between the configured bounds, in minutes
+BACKOFF_STEPS_MIN = (5, 15)
+# Consecutive idle polls at one step before moving to the next
+IDLE_POLLS_PER_STEP = 3
+# A location update younger than this counts as movement
+RECENT_LOCATION_UPDATE = timedelta(minutes=5)
+# Polling while watches are in their active positioning window after force_update
+BURST_INTERVAL = timedelta(seconds=15)
+BURST_WINDOW = timedelta(minutes=2)
+
+
+class AdaptivePollInterval:
+    """Pick the coordinator update interval from how much the devices move.
+
+    Any sign of motion (non-zero speed, a changed position or a fresh
+    ``last_location_update``) snaps back to the minimum interval. While every
+    device is stationary or offline the interval steps up towards the maximum.
+
+    A burst, started after asking watches for a fresh fix, polls every
+    ``BURST_INTERVAL`` until each of those watches reported a newer location
+    or ``BURST_WINDOW`` has passed.
+    """
+
+    def __init__(self, min_interval: timedelta, max_interval: timedelta) -> None:
+        max_interval = max(min_interval, max_interval)
+        steps = [timedelta(minutes=m) for m in BACKOFF_STEPS_MIN]
+        self.steps = [
+            min_interval,
+            *(s for s in steps if min_interval < s < max_interval),
+        ]
+        if max_interval > min_interval:
+            self.steps.append(max_interval)
+        self._step = 0
+        self._idle_polls = 0
+        self._positions: dict[str, tuple[float | None, float | None]] = {}
+        # Device uuid -> last_location_update when the burst started
+        self._burst_devices: dict[str, datetime | None] = {}
+        self._burst_until: datetime | None = None
+
+    @property
+    def interval(self) -> timedelta:
+        if self._burst_until is not None:
+            return min(BURST_INTERVAL, self.steps[self._step])
+        return self.steps[self._step]
+
+    def start_burst(self, devices: Iterable[DeviceSnapshot], now: datetime) -> timedelta:
+        """Poll fast until ``devices`` report a newer location or the window closes."""
+        for device in devices:
+            self._burst_devices.setdefault(device.uuid, device.last_location_update)
+        if self._burst_devices:
+            self._burst_until = now + BURST_WINDOW
+        return self.interval
+
+    def next_interval(self, devices: Iterable[DeviceSnapshot], now: datetime) -> timedelta:
+        """Record a poll result and return the interval until the next poll."""
+        devices = list(devices)
+        if self._any_moving(devices, now):
+            self._step = 0
+            self._idle_polls = 0
+        else:
+            self._idle_polls += 1
+            if self._idle_polls >= IDLE_POLLS_PER_STEP and self._step < len(self.steps) - 1:
+                self._step += 1
+                self._idle_polls = 0
+        self._update_burst(devices, now)
+        return self.interval
+
+    def _update_burst(self, devices: Iterable[DeviceSnapshot], now: datetime) -> None:
+        if self._burst_until is None:
+            return
+        for device in devices:
+            if device.uuid not in self._burst_devices:
+                continue
+            baseline = self._burst_devices[device.uuid]
+            updated = device.last_location_update
+            if updated is not None and (baseline is None or updated > baseline):
+                del self._burst_devices[device.uuid]
+        if not self._burst_devices or now >= self._burst_until:
+            self._burst_devices.clear()
+            self._burst_until = None
+
+    def _any_moving(self, devices: Iterable[DeviceSnapshot], now: datetime) -> bool:
+        moving = False
+        positions = {}
+        for device in devices:
+            position = (device.latitude, device.longitude)
+            positions[device.uuid] = position
+
+            if (device.status or "").upper() == "OFFLINE":
+                continue
+            previous = self._positions.get(device.uuid)
+            if (
+                (previous is not None and previous != position)
+                or (device.speed or 0) > 0
+                or (
+                    device.last_location_update is not None
+                    and now - device.last_location_update < RECENT_LOCATION_UPDATE
+                )
+            ):
+                moving = True
+
+        self._positions = positions
+        return moving
@@ -1,7 +1,7 @@
 import logging
 from collections.abc import Callable
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
 from typing import Any
 
 from homeassistant.components.sensor import (
@@ -15,15 +15,18 @@ from homeassistant.const import (
     PERCENTAGE,
     UnitOfLength,
     UnitOfSpeed,
+    UnitOfTime,
 )
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.util import dt as dt_util
 
-from .client import TrackerDevice
 from .common import DOMAIN
 from .coordinator import GpsCoordinator
+from .entity import One2TrackEntity
+from .models import DeviceSnapshot
+from .trips import TripStats
 
 LOGGER = logging.getLogger(__name__)
 
@@ -32,77 +35,14 @@ LOGGER = logging.getLogger(__name__)
 class One2TrackSensorDescription(SensorEntityDescription):
     """Describes a One2Track sensor."""
 
-    value_fn: Callable[[TrackerDevice], Any]
+    value_fn: Callable[[DeviceSnapshot], Any]
 
 
-def _get_battery(device: TrackerDevice) -> int | None:
-    return device.get("last_location", {}).get("battery_percentage")
-
-
-def _get_balance(device: TrackerDevice) -> float | None:
-    cents = device.get("simcard", {}).get("balance_cents")
-    if cents is not None:
-        return round(cents / 100, 2)
-    return None
-
-
-def _get_last_location_update(device: TrackerDevice) -> datetime | None:
-    val = device.get("last_location", {}).get("last_location_update")
-    if val:
-        return datetime.fromisoformat(val)
-    return None
-
-
-def _get_last_communication(device: TrackerDevice) -> datetime | None:
-    val = device.get("last_location", {}).get("last_communication")
-    if val:
-        return datetime.fromisoformat(val)
-    return None
-
-
-def _get_signal_strength(device: TrackerDevice) -> int | None:
-    return device.get("last_location", {}).get("signal_strength")
-
-
-def _get_satellite_count(device: TrackerDevice) -> int | None:
-    return device.get("last_location", {}).get("satellite_count")
-
-
-def _get_speed(device: TrackerDevice) -> float | None:
-    val = device.get("last_location", {}).get("speed")
-    if val is not None:
-        return float(val)
-    return None
-
-
-def _get_altitude(device: TrackerDevice) -> float | None:
-    val = device.get("last_location", {}).get("altitude")
-    if val is not None:
-        return float(val)
-    return None
-
-
-def _get_steps(device: TrackerDevice) -> int | None:
-    meta = device.get("last_location", {}).get("meta_data")
-    if meta:
-        val = meta.get("steps")
-        if val is not None:
-            return int(val)
-    return None
-
-
-def _get_accuracy(device: TrackerDevice) -> float | None:
-    meta = device.get("last_location", {}).get("meta_data")
-    if meta:
-        return meta.get("accuracy_meters")
-    return None
-
+@dataclass(frozen=True, kw_only=True)
+class One2TrackTripSensorDescription(SensorEntityDescription):
+    """Describes a sensor derived from the coordinator's trip statistics."""
 
-def _get_status(device: TrackerDevice) -> str | None:
-    val = device.get("status")
-    if val is not None:
-        return val.lower()
-    return None
+    value_fn: Callable[[TripStats, date], Any]
 
 
 SENSOR_DESCRIPTIONS: list[One2TrackSensorDescription] = [
@@ -112,7 +52,7 @@ SENSOR_DESCRIPTIONS: list[One2TrackSensorDescription] = [
         native_unit_of_measurement=PERCENTAGE,
         device_class=SensorDeviceClass.BATTERY,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=_get_battery,
+        value_fn=lambda device: device.battery,
     ),
     One2TrackSensorDescription(
         key="sim_balance",
@@ -121,19 +61,19 @@ SENSOR_DESCRIPTIONS: list[One2TrackSensorDescription] = [
         device_class=SensorDeviceClass.MONETARY,
         state_class=SensorStateClass.TOTAL,
         icon="mdi:sim",
-        value_fn=_get_balance,
+        value_fn=lambda device: device.balance,
     ),
     One2TrackSensorDescription(
         key="last_location_update",
         translation_key="last_location_update",
         device_class=SensorDeviceClass.TIMESTAMP,
-        value_fn=_get_last_location_update,
+        value_fn=lambda device: device.last_location_update,
     ),
     One2TrackSensorDescription(
         key="last_communication",
         translation_key="last_communication",
         device_class=SensorDeviceClass.TIMESTAMP,
-        value_fn=_get_last_communication,
+        value_fn=lambda device: device.last_communication,
     ),
     One2TrackSensorDescription(
         key="signal_strength",
@@ -141,14 +81,14 @@ SENSOR_DESCRIPTIONS: list[One2TrackSensorDescription] = [
         native_unit_of_measurement=PERCENTAGE,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:signal",
-        value_fn=_get_signal_strength,
+        value_fn=lambda device: device.signal_strength,
     ),
     One2TrackSensorDescription(
         key="satellite_count",
         translation_key="satellite_count",
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:satellite-variant",
-        value_fn=_get_satellite_count,
+        value_fn=lambda device: device.satellite_count,
     ),
     One2TrackSensorDescription(
         key="speed",
@@ -156,7 +96,7 @@ SENSOR_DESCRIPTIONS: list[One2TrackSensorDescription] = [
         native_unit_of_measurement=UnitOfSpeed.KILOMETERS_PER_HOUR,
         device_class=SensorDeviceClass.SPEED,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=_get_speed,
+        value_fn=lambda device: device.speed,
     ),
     One2TrackSensorDescription(
         key="altitude",
@@ -165,7 +105,7 @@ SENSOR_DESCRIPTIONS: list[One2TrackSensorDescription] = [
         device_class=SensorDeviceClass.DISTANCE,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:altimeter",
-        value_fn=_get_altitude,
+        value_fn=lambda device: device.altitude,
     ),
     One2TrackSensorDescription(
         key="steps",
@@ -173,7 +113,7 @@ SENSOR_DESCRIPTIONS: list[One2TrackSensorDescription] = [
         native_unit_of_measurement="steps",
         state_class=SensorStateClass.TOTAL_INCREASING,
         icon="mdi:shoe-print",
-        value_fn=_get_steps,
+        value_fn=lambda device: device.steps,
     ),
     One2TrackSensorDescription(
         key="accuracy",
@@ -182,7 +122,7 @@ SENSOR_DESCRIPTIONS: list[One2TrackSensorDescription] = [
         device_class=SensorDeviceClass.DISTANCE,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:crosshairs-gps",
-        value_fn=_get_accuracy,
+        value_fn=lambda device: device.accuracy,
     ),
     One2TrackSensorDescription(
         key="status",
@@ -190,7 +130,36 @@ SENSOR_DESCRIPTIONS: list[One2TrackSensorDescription] = [
         device_class=SensorDeviceClass.ENUM,
         options=["gps", "wifi", "offline"],
         icon="mdi:access-point-network",
-        value_fn=_get_status,
+        value_fn=lambda device: device.status.lower() if device.status else None,
+    ),
+]
+
+
+TRIP_SENSOR_DESCRIPTIONS: list[One2TrackTripSensorDescription] = [
+    One2TrackTripSensorDescription(
+        key="distance_today",
+        translation_key="distance_today",
+        native_unit_of_measurement=UnitOfLength.KILOMETERS,
+        device_class=SensorDeviceClass.DISTANCE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:map-marker-distance",
+        value_fn=lambda stats, today: stats.distance_km(today),
+    ),
+    One2TrackTripSensorDescription(
+        key="trips_today",
+        translation_key="trips_today",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:routes",
+        value_fn=lambda stats, today: stats.trips(today),
+    ),
+    One2TrackTripSensorDescription(
+        key="moving_time_today",
+        translation_key="moving_time_today",
+        native_unit_of_measurement=UnitOfTime.MINUTES,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:run",
+        value_fn=lambda stats, today: stats.moving_minutes(today),
     ),
 ]
 
@@ -203,17 +172,19 @@ async def async_setup_entry(
     """Set up One2Track sensor entities."""
     coordinator: GpsCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
 
-    devices: list[TrackerDevice] = coordinator.data or []
+    devices = list((coordinator.data or {}).values())
 
     entities = []
     for device in devices:
         for description in SENSOR_DESCRIPTIONS:
             entities.append(One2TrackSensorEntity(coordinator, device, description))
+        for description in TRIP_SENSOR_DESCRIPTIONS:
+            entities.append(One2TrackTripSensorEntity(coordinator, device, description))
 
     async_add_entities(entities)
 
 
-class One2TrackSensorEntity(CoordinatorEntity, SensorEntity):
+class One2TrackSensorEntity(One2TrackEntity, SensorEntity):
     """A sensor entity for One2Track device data."""
 
     entity_description: One2TrackSensorDescription
@@ -222,31 +193,55 @@ class One2TrackSensorEntity(CoordinatorEntity, SensorEntity):
     def __init__(
         self,
         coordinator: GpsCoordinator,
-        device: TrackerDevice,
+        device: DeviceSnapshot,
         description: One2TrackSensorDescription,
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, device)
         self.entity_description = description
-        self._device = device
-        self._attr_unique_id = f"{device['uuid']}_{description.key}"
+        self._attr_unique_id = f"{device.uuid}_{description.key}"
 
     @property
-    def device_info(self) -> DeviceInfo:
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._device["uuid"])},
-            serial_number=self._device["serial_number"],
-            name=self._device["name"],
+    def native_value(self) -> Any:
+        return self.entity_description.value_fn(self._device)
+
+    def _state_signature(self) -> tuple[Any, ...]:
+        return (*super()._state_signature(), self.native_value)
+
+
+class One2TrackTripSensorEntity(One2TrackEntity, SensorEntity):
+    """A sensor for the distance and trips a device made today."""
+
+    entity_description: One2TrackTripSensorDescription
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: GpsCoordinator,
+        device: DeviceSnapshot,
+        description: One2TrackTripSensorDescription,
+    ) -> None:
+        super().__init__(coordinator, device)
+        self.entity_description = description
+        self._attr_unique_id = f"{device.uuid}_{description.key}"
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # A watch that does not change is not polled into new stats, so the
+        # day's totals are rolled over here rather than on the next update
+        self.async_on_remove(
+            async_track_time_change(self.hass, self._handle_new_day, hour=0, minute=0, second=0)
         )
 
+    @callback
+    def _handle_new_day(self, now: datetime) -> None:
+        self._write_state_if_changed()
+
     @property
     def native_value(self) -> Any:
-        return self.entity_description.value_fn(self._device)
+        stats = self.coordinator.trips.stats.get(self._device_uuid)
+        if stats is None:
+            return None
+        return self.entity_description.value_fn(stats, dt_util.now().date())
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        new_data: list[TrackerDevice] = self.coordinator.data
-        if new_data:
-            me = next((x for x in new_data if x["uuid"] == self._device["uuid"]), None)
-            if me:
-                self._device = me
-        self.async_write_ha_state()
+    def _state_signature(self) -> tuple[Any, ...]:
+        return (*super()._state_signature(), self.native_value)
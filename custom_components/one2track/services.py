@@ -1,63 +1,120 @@
+import asyncio
 import logging
 
+import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
 
-from .client import GpsClient, TrackerDevice
+from .command_queue import CommandWorker, QueuedCommand, outcome_event_data
 from .common import DOMAIN
 from .coordinator import GpsCoordinator
+from .device_index import get_device_index
+from .geofence import DEFAULT_DWELL_S, Geofence
 
 LOGGER = logging.getLogger(__name__)
 
 SERVICE_SEND_MESSAGE = "send_message"
 SERVICE_FORCE_UPDATE = "force_update"
 SERVICE_POWER_OFF = "power_off"
+SERVICE_GET_LOCATION_HISTORY = "get_location_history"
+SERVICE_ADD_GEOFENCE = "add_geofence"
+SERVICE_REMOVE_GEOFENCE = "remove_geofence"
 ATTR_MESSAGE = "message"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_NAME = "name"
+ATTR_LATITUDE = "latitude"
+ATTR_LONGITUDE = "longitude"
+ATTR_RADIUS = "radius"
+ATTR_POINTS = "points"
+ATTR_DWELL = "dwell"
+ATTR_WAIT = "wait"
 
+# How long a service call with wait set waits for its commands
+COMMAND_WAIT_TIMEOUT = 30  # seconds
 
-def _resolve_device_uuid(hass: HomeAssistant, entity_ids: list[str]) -> str:
+
+def _resolve_device_uuid(hass: HomeAssistant, entity_id: str) -> str:
     """Resolve a target entity ID to a One2Track device UUID."""
+    device_uuid = get_device_index(hass).device_uuid(entity_id)
+    if device_uuid is None:
+        raise HomeAssistantError(f"Could not resolve One2Track device from {entity_id}")
+    return device_uuid
+
+
+def _resolve_device_uuids(hass: HomeAssistant, entity_ids: list[str]) -> list[str]:
+    """Resolve every target entity ID, one UUID per device, in target order."""
     if not entity_ids:
         raise HomeAssistantError("No target entity specified")
 
-    registry = er.async_get(hass)
-
-    for entity_id in entity_ids:
-        entry = registry.async_get(entity_id)
-        if entry and entry.platform == DOMAIN:
-            unique_id = entry.unique_id
-            # device_tracker unique_id is the raw UUID, but sensor entities
-            # use {uuid}_{key} format — match against known device UUIDs
-            for entry_data in hass.data.get(DOMAIN, {}).values():
-                if not isinstance(entry_data, dict):
-                    continue
-                coordinator = entry_data.get("coordinator")
-                if coordinator and coordinator.data:
-                    for device in coordinator.data:
-                        device_uuid = device.get("uuid", "")
-                        if unique_id == device_uuid or unique_id.startswith(f"{device_uuid}_"):
-                            return device_uuid
-            # Fall back to raw unique_id if no coordinator match
-            return unique_id
-
-    raise HomeAssistantError(f"Could not resolve One2Track device from {entity_ids}")
-
-
-def _get_client_for_uuid(hass: HomeAssistant, device_uuid: str) -> GpsClient:
-    """Find the API client that manages a given device UUID."""
-    for entry_data in hass.data.get(DOMAIN, {}).values():
-        if not isinstance(entry_data, dict):
-            continue
-        coordinator: GpsCoordinator = entry_data.get("coordinator")
-        if coordinator and coordinator.data:
-            devices: list[TrackerDevice] = coordinator.data
-            for device in devices:
-                if device.get("uuid") == device_uuid:
-                    return entry_data["api_client"]
-
-    raise HomeAssistantError(f"No One2Track client found for device {device_uuid}")
+    index = get_device_index(hass)
+    unresolved = [entity_id for entity_id in entity_ids if index.device_uuid(entity_id) is None]
+    if unresolved:
+        raise HomeAssistantError(f"Could not resolve One2Track devices from {unresolved}")
+    return list(dict.fromkeys(index.device_uuid(entity_id) for entity_id in entity_ids))
+
+
+def _get_entry_id_for_uuid(hass: HomeAssistant, device_uuid: str) -> str:
+    """Find the config entry whose coordinator polls a given device UUID."""
+    entry_id = get_device_index(hass).entry_id(device_uuid)
+    if entry_id is None or entry_id not in hass.data.get(DOMAIN, {}):
+        raise HomeAssistantError(f"No One2Track config entry found for device {device_uuid}")
+    return entry_id
+
+
+def _get_coordinator_for_uuid(hass: HomeAssistant, device_uuid: str) -> GpsCoordinator:
+    """Find the coordinator that polls a given device UUID."""
+    return hass.data[DOMAIN][_get_entry_id_for_uuid(hass, device_uuid)]["coordinator"]
+
+
+async def _async_queue_commands(
+    hass: HomeAssistant,
+    command: str,
+    device_uuids: list[str],
+    message: str | None = None,
+    *,
+    wait: bool = False,
+) -> ServiceResponse:
+    """Queue a command for every device with the worker of its account.
+
+    With ``wait`` the response holds each command's outcome, HTTP status and
+    per-phase latency; commands still pending after ``COMMAND_WAIT_TIMEOUT``
+    are reported as pending.
+    """
+    # Find every worker first so a target without an account queues nothing
+    workers: list[CommandWorker] = [
+        hass.data[DOMAIN][_get_entry_id_for_uuid(hass, device_uuid)]["command_worker"]
+        for device_uuid in device_uuids
+    ]
+    queued: list[tuple[CommandWorker, QueuedCommand]] = []
+    for worker, device_uuid in zip(workers, device_uuids, strict=True):
+        queued.append((worker, worker.queue.enqueue(device_uuid, command, message)))
+        worker.wake()
+
+    responses = [
+        {"command_id": item.command_id, "device_uuid": item.device_uuid, "command": command}
+        for _, item in queued
+    ]
+    if wait:
+        outcomes = await asyncio.gather(
+            *(worker.async_wait(item.command_id, COMMAND_WAIT_TIMEOUT) for worker, item in queued)
+        )
+        for response, outcome in zip(responses, outcomes, strict=True):
+            if outcome is None:
+                response["status"] = "pending"
+            else:
+                response.update(outcome_event_data(*outcome))
+    return {"commands": responses}
+
+
+async def _async_save_geofences(entry_data: dict) -> None:
+    coordinator: GpsCoordinator = entry_data["coordinator"]
+    await entry_data["geofence_store"].async_save(
+        {"fences": [fence.as_dict() for fence in coordinator.geofences.fences]}
+    )
 
 
 async def async_setup_services(hass: HomeAssistant) -> None:
@@ -65,52 +122,110 @@ async def async_setup_services(hass: HomeAssistant) -> None:
     if hass.services.has_service(DOMAIN, SERVICE_SEND_MESSAGE):
         return
 
-    async def handle_send_message(call: ServiceCall) -> None:
+    async def handle_send_message(call: ServiceCall) -> ServiceResponse:
         entity_ids = call.data.get("entity_id", [])
         if isinstance(entity_ids, str):
             entity_ids = [entity_ids]
 
         message = call.data[ATTR_MESSAGE]
-        device_uuid = _resolve_device_uuid(hass, entity_ids)
-        client = _get_client_for_uuid(hass, device_uuid)
+        device_uuids = _resolve_device_uuids(hass, entity_ids)
 
-        LOGGER.info("Sending message to %s: %s", device_uuid, message)
-        success = await client.send_message(device_uuid, message)
-        if not success:
-            raise HomeAssistantError("Failed to send message to One2Track device")
+        LOGGER.info("Queueing message to %s: %s", device_uuids, message)
+        return await _async_queue_commands(
+            hass, SERVICE_SEND_MESSAGE, device_uuids, message, wait=call.data[ATTR_WAIT]
+        )
 
-    async def handle_force_update(call: ServiceCall) -> None:
+    async def handle_force_update(call: ServiceCall) -> ServiceResponse:
         entity_ids = call.data.get("entity_id", [])
         if isinstance(entity_ids, str):
             entity_ids = [entity_ids]
 
-        device_uuid = _resolve_device_uuid(hass, entity_ids)
-        client = _get_client_for_uuid(hass, device_uuid)
+        device_uuids = _resolve_device_uuids(hass, entity_ids)
 
-        LOGGER.info("Requesting force update for %s", device_uuid)
-        success = await client.force_update(device_uuid)
-        if not success:
-            raise HomeAssistantError("Failed to activate positioning mode on One2Track device")
+        # The account starts burst polling once the command was sent
+        LOGGER.info("Queueing force update for %s", device_uuids)
+        return await _async_queue_commands(
+            hass, SERVICE_FORCE_UPDATE, device_uuids, wait=call.data[ATTR_WAIT]
+        )
 
-        for entry_data in hass.data.get(DOMAIN, {}).values():
-            if not isinstance(entry_data, dict):
-                continue
-            coordinator: GpsCoordinator = entry_data.get("coordinator")
-            if coordinator:
-                await coordinator.async_request_refresh()
+    async def handle_power_off(call: ServiceCall) -> ServiceResponse:
+        entity_ids = call.data.get("entity_id", [])
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+
+        device_uuids = _resolve_device_uuids(hass, entity_ids)
 
-    async def handle_power_off(call: ServiceCall) -> None:
+        LOGGER.info("Queueing power off for %s", device_uuids)
+        return await _async_queue_commands(
+            hass, SERVICE_POWER_OFF, device_uuids, wait=call.data[ATTR_WAIT]
+        )
+
+    async def handle_get_location_history(call: ServiceCall) -> ServiceResponse:
         entity_ids = call.data.get("entity_id", [])
         if isinstance(entity_ids, str):
             entity_ids = [entity_ids]
+        start = call.data.get(ATTR_START)
+        end = call.data.get(ATTR_END)
+
+        devices = {}
+        for entity_id in entity_ids:
+            device_uuid = _resolve_device_uuid(hass, entity_id)
+            coordinator = _get_coordinator_for_uuid(hass, device_uuid)
+            history = coordinator.history.get(device_uuid)
+            devices[entity_id] = (
+                history.window(
+                    dt_util.as_utc(start) if start else None,
+                    dt_util.as_utc(end) if end else None,
+                )
+                if history
+                else []
+            )
+        return {"devices": devices}
+
+    async def handle_add_geofence(call: ServiceCall) -> None:
+        entity_ids = call.data.get("entity_id", [])
+        if isinstance(entity_ids, str):
+            entity_ids = [entity_ids]
+        name = call.data[ATTR_NAME]
+
+        # A fence belongs to one config entry; targets may span several.
+        targets: dict[str, set[str]] = {}
+        for device_uuid in _resolve_device_uuids(hass, entity_ids):
+            targets.setdefault(_get_entry_id_for_uuid(hass, device_uuid), set()).add(device_uuid)
 
-        device_uuid = _resolve_device_uuid(hass, entity_ids)
-        client = _get_client_for_uuid(hass, device_uuid)
+        for entry_id, device_uuids in targets.items():
+            try:
+                fence = Geofence(
+                    fence_id=slugify(name),
+                    name=name,
+                    device_uuids=frozenset(device_uuids),
+                    latitude=call.data.get(ATTR_LATITUDE),
+                    longitude=call.data.get(ATTR_LONGITUDE),
+                    radius=call.data.get(ATTR_RADIUS),
+                    points=tuple(tuple(point) for point in call.data.get(ATTR_POINTS, ())),
+                    dwell=call.data[ATTR_DWELL] * 60,
+                )
+            except ValueError as err:
+                raise HomeAssistantError(str(err)) from err
 
-        LOGGER.info("Sending power off to %s", device_uuid)
-        success = await client.power_off(device_uuid)
-        if not success:
-            raise HomeAssistantError("Failed to power off One2Track device")
+            LOGGER.info("Setting geofence %s for %s", name, sorted(device_uuids))
+            entry_data = hass.data[DOMAIN][entry_id]
+            entry_data["coordinator"].geofences.set_fence(fence)
+            await _async_save_geofences(entry_data)
+
+    async def handle_remove_geofence(call: ServiceCall) -> None:
+        fence_id = slugify(call.data[ATTR_NAME])
+
+        removed = False
+        for entry_data in hass.data.get(DOMAIN, {}).values():
+            if not isinstance(entry_data, dict):
+                continue
+            if entry_data["coordinator"].geofences.remove_fence(fence_id):
+                removed = True
+                await _async_save_geofences(entry_data)
+
+        if not removed:
+            raise HomeAssistantError(f"No One2Track geofence named {call.data[ATTR_NAME]}")
 
     hass.services.async_register(
         DOMAIN,
@@ -120,8 +235,10 @@ async def async_setup_services(hass: HomeAssistant) -> None:
             {
                 vol.Required("entity_id"): vol.Any(str, [str]),
                 vol.Required(ATTR_MESSAGE): str,
+                vol.Optional(ATTR_WAIT, default=False): cv.boolean,
             }
         ),
+        supports_response=SupportsResponse.OPTIONAL,
     )
 
     hass.services.async_register(
@@ -131,8 +248,10 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         schema=vol.Schema(
             {
                 vol.Required("entity_id"): vol.Any(str, [str]),
+                vol.Optional(ATTR_WAIT, default=False): cv.boolean,
             }
         ),
+        supports_response=SupportsResponse.OPTIONAL,
     )
 
     hass.services.async_register(
@@ -142,13 +261,58 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         schema=vol.Schema(
             {
                 vol.Required("entity_id"): vol.Any(str, [str]),
+                vol.Optional(ATTR_WAIT, default=False): cv.boolean,
+            }
+        ),
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_LOCATION_HISTORY,
+        handle_get_location_history,
+        schema=vol.Schema(
+            {
+                vol.Required("entity_id"): vol.Any(str, [str]),
+                vol.Optional(ATTR_START): cv.datetime,
+                vol.Optional(ATTR_END): cv.datetime,
+            }
+        ),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ADD_GEOFENCE,
+        handle_add_geofence,
+        schema=vol.Schema(
+            {
+                vol.Required("entity_id"): vol.Any(str, [str]),
+                vol.Required(ATTR_NAME): cv.string,
+                vol.Optional(ATTR_LATITUDE): cv.latitude,
+                vol.Optional(ATTR_LONGITUDE): cv.longitude,
+                vol.Optional(ATTR_RADIUS): vol.All(vol.Coerce(float), vol.Range(min=1)),
+                vol.Optional(ATTR_POINTS): [vol.ExactSequence([cv.latitude, cv.longitude])],
+                vol.Optional(ATTR_DWELL, default=DEFAULT_DWELL_S // 60): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                ),
             }
         ),
     )
 
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REMOVE_GEOFENCE,
+        handle_remove_geofence,
+        schema=vol.Schema({vol.Required(ATTR_NAME): cv.string}),
+    )
+
 
 async def async_unload_services(hass: HomeAssistant) -> None:
     """Unload One2Track services."""
     hass.services.async_remove(DOMAIN, SERVICE_SEND_MESSAGE)
     hass.services.async_remove(DOMAIN, SERVICE_FORCE_UPDATE)
     hass.services.async_remove(DOMAIN, SERVICE_POWER_OFF)
+    hass.services.async_remove(DOMAIN, SERVICE_GET_LOCATION_HISTORY)
+    hass.services.async_remove(DOMAIN, SERVICE_ADD_GEOFENCE)
+    hass.services.async_remove(DOMAIN, SERVICE_REMOVE_GEOFENCE)
@@ -0,0 +1,171 @@
+import dataclasses
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+
+from .geo import DEFAULT_ACCURACY_M, haversine_m
+from .models import DeviceSnapshot
+
+# Fixes less precise than this are not used for distance at all
+MAX_ACCURACY_M = 100.0
+# WiFi positions wander by tens of meters while the watch lies still
+WIFI_JITTER_M = 75.0
+# Stationary time after which the next movement counts as a new trip
+TRIP_END_GAP_S = 15 * 60
+
+
+@dataclass(slots=True)
+class _Fix:
+    timestamp: float
+    latitude: float
+    longitude: float
+    accuracy: float
+    wifi: bool
+
+
+@dataclass(slots=True)
+class TripStats:
+    """Distance, trip count and moving time of one device for one day."""
+
+    day: date | None = None
+    distance_m: float = 0.0
+    trip_count: int = 0
+    moving_seconds: float = 0.0
+    anchor: _Fix | None = None  # last accepted position
+    last_fix: float | None = None  # timestamp of the last usable fix
+    last_moved: float | None = None  # timestamp of the last accepted movement
+
+    def distance_km(self, today: date) -> float:
+        return round(self.distance_m / 1000, 2) if self.day == today else 0.0
+
+    def trips(self, today: date) -> int:
+        return self.trip_count if self.day == today else 0
+
+    def moving_minutes(self, today: date) -> float:
+        return round(self.moving_seconds / 60, 1) if self.day == today else 0.0
+
+    def start_day(self, today: date) -> None:
+        self.day = today
+        self.distance_m = 0.0
+        self.trip_count = 0
+        self.moving_seconds = 0.0
+
+
+class TripTracker:
+    """Derive per-device trip statistics from the fixes seen at ingest.
+
+    All candidate movements of one refresh are measured with a single
+    ``haversine_m`` call. A fix that stays within the combined accuracy of
+    the last accepted position (or the WiFi jitter radius) is treated as
+    noise and does not move the anchor.
+    """
+
+    def __init__(self) -> None:
+        self.stats: dict[str, TripStats] = {}
+
+    def ingest(self, devices: Iterable[DeviceSnapshot], today: date) -> None:
+        pending: list[tuple[TripStats, _Fix]] = []
+        for device in devices:
+            stats = self.stats.get(device.uuid)
+            if stats is None:
+                stats = self.stats[device.uuid] = TripStats()
+            if stats.day != today:
+                stats.start_day(today)
+
+            fix = _to_fix(device)
+            if fix is None or (stats.last_fix is not None and fix.timestamp <= stats.last_fix):
+                continue
+            if stats.anchor is None:
+                stats.anchor = fix
+                stats.last_fix = fix.timestamp
+                continue
+            pending.append((stats, fix))
+
+        if not pending:
+            return
+
+        distances = haversine_m(
+            [stats.anchor.latitude for stats, _ in pending],
+            [stats.anchor.longitude for stats, _ in pending],
+            [fix.latitude for _, fix in pending],
+            [fix.longitude for _, fix in pending],
+        )
+        for (stats, fix), distance in zip(pending, distances, strict=True):
+            _apply(stats, fix, distance)
+
+    def remove(self, uuid: str) -> None:
+        self.stats.pop(uuid, None)
+
+
+def is_stationary_jitter(anchor: DeviceSnapshot, device: DeviceSnapshot) -> bool:
+    """Return whether ``device`` lies within the combined accuracy of ``anchor``.
+
+    Only fixes without a reported speed count; a moving watch is never
+    suppressed.
+    """
+    if device.speed or None in (
+        anchor.latitude,
+        anchor.longitude,
+        device.latitude,
+        device.longitude,
+    ):
+        return False
+    (distance,) = haversine_m(
+        [anchor.latitude], [anchor.longitude], [device.latitude], [device.longitude]
+    )
+    threshold = (DEFAULT_ACCURACY_M if anchor.accuracy is None else anchor.accuracy) + (
+        DEFAULT_ACCURACY_M if device.accuracy is None else device.accuracy
+    )
+    return distance <= threshold
+
+
+def suppress_jitter(previous: DeviceSnapshot, device: DeviceSnapshot) -> DeviceSnapshot:
+    """Keep the last accepted position while a still watch's fix bounces around it."""
+    anchor = previous.anchor or previous
+    if not is_stationary_jitter(anchor, device):
+        return device
+    return dataclasses.replace(
+        device, latitude=anchor.latitude, longitude=anchor.longitude, anchor=anchor
+    )
+
+
+def _to_fix(device: DeviceSnapshot) -> _Fix | None:
+    if device.latitude is None or device.longitude is None or device.last_location_update is None:
+        return None
+    accuracy = device.position_accuracy
+    if accuracy is None:
+        accuracy = DEFAULT_ACCURACY_M
+    if accuracy > MAX_ACCURACY_M:
+        return None
+    return _Fix(
+        device.last_location_update.timestamp(),
+        device.latitude,
+        device.longitude,
+        accuracy,
+        (device.location_type or "").upper() == "WIFI",
+    )
+
+
+def _apply(stats: TripStats, fix: _Fix, distance: float) -> None:
+    anchor = stats.anchor
+    threshold = anchor.accuracy + fix.accuracy
+    if anchor.wifi or fix.wifi:
+        threshold = max(threshold, WIFI_JITTER_M)
+
+    previous_fix = stats.last_fix
+    stats.last_fix = fix.timestamp
+    if distance <= threshold:
+        return
+
+    # A new trip starts after the device was seen standing still, or was not
+    # seen at all, for longer than the gap
+    if (
+        stats.last_moved is None
+        or previous_fix - stats.last_moved >= TRIP_END_GAP_S
+        or fix.timestamp - previous_fix >= TRIP_END_GAP_S
+    ):
+        stats.trip_count += 1
+    stats.distance_m += distance
+    stats.moving_seconds += min(fix.timestamp - previous_fix, TRIP_END_GAP_S)
+    stats.last_moved = fix.timestamp
+    stats.anchor = fix
@@ -0,0 +1,121 @@
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any, NamedTuple
+
+from .geo import bounds_around, grid_cells, haversine_m
+
+# Queries spanning more cells than this (huge accuracy circles) scan all zones
+MAX_QUERY_CELLS = 400
+# Zone attributes the lookup depends on; others, like "persons", only track
+# who is in the zone
+ZONE_LOOKUP_ATTRIBUTES = ("latitude", "longitude", "radius", "passive", "friendly_name")
+
+
+class ZoneArea(NamedTuple):
+    """A Home Assistant zone reduced to what the lookup needs."""
+
+    entity_id: str
+    name: str
+    latitude: float
+    longitude: float
+    radius: float
+    passive: bool = False
+
+
+def zone_lookup_changed(old: Mapping[str, Any] | None, new: Mapping[str, Any] | None) -> bool:
+    """Whether a zone state change affects the lookup; ``None`` is an added or removed zone."""
+    if old is None or new is None:
+        return True
+    return any(old.get(key) != new.get(key) for key in ZONE_LOOKUP_ATTRIBUTES)
+
+
+class ZoneIndex:
+    """A uniform grid over the active zones.
+
+    Every zone is registered in each cell its circle overlaps, so a lookup
+    only measures the zones near the position instead of all of them.
+    """
+
+    def __init__(self, zones: Iterable[ZoneArea]) -> None:
+        self.zones = [zone for zone in zones if not zone.passive]
+        self._cells: dict[tuple[int, int], list[ZoneArea]] = defaultdict(list)
+        for zone in self.zones:
+            lat_cells, lon_cells = grid_cells(
+                bounds_around(zone.latitude, zone.longitude, zone.radius)
+            )
+            for lat_cell in lat_cells:
+                for lon_cell in lon_cells:
+                    self._cells[lat_cell, lon_cell].append(zone)
+
+    def candidates(self, latitude: float, longitude: float, accuracy: float) -> list[ZoneArea]:
+        lat_cells, lon_cells = grid_cells(bounds_around(latitude, longitude, accuracy))
+        if len(lat_cells) * len(lon_cells) > MAX_QUERY_CELLS:
+            return self.zones
+        found: dict[str, ZoneArea] = {}
+        for lat_cell in lat_cells:
+            for lon_cell in lon_cells:
+                for zone in self._cells.get((lat_cell, lon_cell), ()):
+                    found[zone.entity_id] = zone
+        return list(found.values())
+
+    def active_zone(self, latitude: float, longitude: float, accuracy: float) -> ZoneArea | None:
+        """Return the zone HA would consider active for this position.
+
+        Same rule as ``homeassistant.components.zone.async_active_zone``: the
+        closest zone whose edge is within the accuracy, the smaller zone on a tie.
+        """
+        candidates = self.candidates(latitude, longitude, accuracy)
+        if not candidates:
+            return None
+        distances = haversine_m(
+            [latitude] * len(candidates),
+            [longitude] * len(candidates),
+            [zone.latitude for zone in candidates],
+            [zone.longitude for zone in candidates],
+        )
+        closest: ZoneArea | None = None
+        closest_distance = 0.0
+        for zone, distance in zip(candidates, distances, strict=True):
+            if distance - zone.radius >= accuracy:
+                continue
+            if (
+                closest is None
+                or distance < closest_distance
+                or (distance == closest_distance and zone.radius < closest.radius)
+            ):
+                closest = zone
+                closest_distance = distance
+        return closest
+
+
+class ZoneResolver:
+    """Resolve the active zone per device, cached until the position or zones change.
+
+    ``load_zones`` is called lazily to rebuild the grid after ``invalidate``.
+    """
+
+    def __init__(self, load_zones: Callable[[], Iterable[ZoneArea]]) -> None:
+        self._load_zones = load_zones
+        self._index: ZoneIndex | None = None
+        self._cache: dict[str, tuple[tuple[float, float, float], ZoneArea | None]] = {}
+
+    def invalidate(self) -> None:
+        self._index = None
+        self._cache.clear()
+
+    def resolve(
+        self, key: str, latitude: float, longitude: float, accuracy: float
+    ) -> ZoneArea | None:
+        position = (latitude, longitude, accuracy)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == position:
+            return cached[1]
+
+        if self._index is None:
+            self._index = ZoneIndex(self._load_zones())
+        zone = self._index.active_zone(latitude, longitude, accuracy)
+        self._cache[key] = (position, zone)
+        return zone
+
+    def forget(self, key: str) -> None:
+        self._cache.pop(key, None)
@@ -1,7 +1,10 @@
 """Pytest configuration for One2Track tests."""
 
 import sys
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
+from typing import Any
 from unittest.mock import MagicMock
 
 # Add the repo root to sys.path so custom_components is importable
@@ -21,6 +24,8 @@ sys.modules.setdefault("homeassistant.helpers.config_validation", ha_mock)
 sys.modules.setdefault("homeassistant.helpers.device_registry", ha_mock)
 sys.modules.setdefault("homeassistant.helpers.entity_platform", ha_mock)
 sys.modules.setdefault("homeassistant.helpers.entity_registry", ha_mock)
+sys.modules.setdefault("homeassistant.helpers.event", ha_mock)
+sys.modules.setdefault("homeassistant.helpers.storage", ha_mock)
 sys.modules.setdefault("homeassistant.helpers.update_coordinator", ha_mock)
 sys.modules.setdefault("homeassistant.components.zone", ha_mock)
 sys.modules.setdefault("homeassistant.components.device_tracker", ha_mock)
@@ -30,3 +35,105 @@ sys.modules.setdefault("homeassistant.components.binary_sensor", ha_mock)
 sys.modules.setdefault("homeassistant.util", ha_mock)
 sys.modules.setdefault("homeassistant.util.dt", ha_mock)
 sys.modules.setdefault("voluptuous", MagicMock())
+
+
+# Entity platforms subclass these, so they must be real classes for the
+# entities to be built in tests
+class _CoordinatorEntity:
+    def __init__(self, coordinator) -> None:
+        self.coordinator = coordinator
+        self.on_remove: list = []
+
+    @property
+    def available(self) -> bool:
+        return self.coordinator.last_update_success
+
+    async def async_added_to_hass(self) -> None:
+        pass
+
+    async def async_will_remove_from_hass(self) -> None:
+        pass
+
+    def async_on_remove(self, func) -> None:
+        self.on_remove.append(func)
+
+    def async_write_ha_state(self) -> None:
+        pass
+
+
+class _DataUpdateCoordinator:
+    def __init__(self, hass, logger, *, name, update_interval=None, always_update=True) -> None:
+        self.hass = hass
+        self.logger = logger
+        self.name = name
+        self.update_interval = update_interval
+        self.always_update = always_update
+        self.data = None
+        self.last_update_success = True
+
+    async def async_request_refresh(self) -> None:
+        pass
+
+
+@dataclass(frozen=True, kw_only=True)
+class _EntityDescription:
+    key: str
+    translation_key: str | None = None
+    device_class: Any = None
+    icon: str | None = None
+    native_unit_of_measurement: str | None = None
+    state_class: Any = None
+    options: list[str] | None = None
+
+
+ha_mock.callback = lambda func: func
+ha_mock.CoordinatorEntity = _CoordinatorEntity
+ha_mock.DataUpdateCoordinator = _DataUpdateCoordinator
+ha_mock.HomeAssistantError = type("HomeAssistantError", (Exception,), {})
+ha_mock.UpdateFailed = type("UpdateFailed", (Exception,), {})
+ha_mock.SensorEntityDescription = _EntityDescription
+ha_mock.TrackerEntity = type("TrackerEntity", (), {})
+ha_mock.SensorEntity = type("SensorEntity", (), {})
+ha_mock.BinarySensorEntity = type("BinarySensorEntity", (), {})
+
+
+# Imported only now, after Home Assistant is mocked
+from custom_components.one2track.models import DeviceSnapshot  # noqa: E402
+
+START = datetime(2024, 3, 1, 8, 0, tzinfo=UTC)
+
+
+def device_payload(
+    minute: float = 0,
+    lat: float | str = 52.0,
+    lon: float | str = 4.9,
+    *,
+    accuracy: float | None = 10.0,
+    uuid: str = "dev-1",
+    status: str | None = None,
+    **location: Any,
+) -> dict[str, Any]:
+    """A device as the portal reports it, with a fix ``minute`` minutes after ``START``.
+
+    Extra keyword arguments are set on (or override) its ``last_location``.
+    """
+    last_location = {
+        "latitude": str(lat),
+        "longitude": str(lon),
+        "location_type": "GPS",
+        "last_location_update": (START + timedelta(minutes=minute)).isoformat(),
+        "meta_data": {} if accuracy is None else {"accuracy_meters": accuracy},
+        **location,
+    }
+    return {
+        "uuid": uuid,
+        "name": "Watch",
+        "serial_number": "SN1",
+        "status": status or last_location["location_type"],
+        "last_location": last_location,
+    }
+
+
+def make_snapshot(*args: Any, **kwargs: Any) -> DeviceSnapshot:
+    """Parse ``device_payload(*args, **kwargs)``."""
+    return DeviceSnapshot.from_device(device_payload(*args, **kwargs))
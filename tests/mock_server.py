@@ -0,0 +1,237 @@
+"""Local stand-in for the One2Track web portal.
+
+Implements just enough of www.one2trackgps.com for GpsClient: the sign-in page
+with its csrf-token meta tag, the 302 login, the account redirect, the device
+list JSON and the function/message endpoints. Latency, error rate, session
+expiry and fleet size are configurable so it can back both tests and load
+benchmarks.
+"""
+
+import asyncio
+import random
+import secrets
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+SESSION_COOKIE = "_iadmin"
+
+
+@dataclass
+class MockAccount:
+    username: str
+    password: str
+    account_id: str
+    device_count: int = 2
+
+
+@dataclass
+class _Session:
+    csrf: str
+    account: MockAccount | None = None
+    created: float = field(default_factory=time.monotonic)
+
+
+def make_device(account_id: str, index: int) -> dict:
+    """Build a device entry shaped like the real /users/{id}/devices payload."""
+    return {
+        "device": {
+            "id": index,
+            "serial_number": f"{account_id}-SN{index:05d}",
+            "name": f"Watch {index}",
+            "phone_number": f"+3160000{index:04d}",
+            "status": "GPS",
+            "uuid": f"{account_id}-uuid-{index:05d}",
+            "last_location": {
+                "id": index,
+                "last_communication": "2024-03-01T12:00:00.000+01:00",
+                "last_location_update": "2024-03-01T11:59:00.000+01:00",
+                "address": f"Stationsplein {index}, 1012 AB Amsterdam",
+                "latitude": f"{52.37 + index * 1e-4:.6f}",
+                "longitude": f"{4.89 + index * 1e-4:.6f}",
+                "altitude": "4.0",
+                "location_type": "GPS",
+                "signal_strength": 80,
+                "satellite_count": 7,
+                "speed": "0.0",
+                "battery_percentage": 85,
+                "meta_data": {
+                    "tumble": "0",
+                    "steps": "1234",
+                    "course": 0.0,
+                    "accuracy_meters": 10.0,
+                    "stations": [
+                        {"strength": "-70", "mnc": "8", "mcc": "204", "lac": "1", "cid": str(c)}
+                        for c in range(4)
+                    ],
+                    "routers": [
+                        {
+                            "signalStrength": "-60",
+                            "name": f"Router {r}",
+                            "macAddress": f"aa:bb:cc:dd:ee:{r:02x}",
+                        }
+                        for r in range(4)
+                    ],
+                },
+                "host": "gw.one2trackgps.com",
+                "port": 5000,
+            },
+            "simcard": {"balance_cents": 1000, "tariff_type": "prepaid"},
+        }
+    }
+
+
+class MockOne2Track:
+    """aiohttp application emulating the One2Track portal.
+
+    ``latency`` is a (min, max) range in seconds added to every request,
+    ``error_rate`` the fraction of requests answered with a 500 and
+    ``session_ttl`` the number of seconds after which a logged-in session
+    stops being accepted.
+    """
+
+    def __init__(
+        self,
+        accounts: list[MockAccount] | None = None,
+        *,
+        latency: tuple[float, float] = (0.0, 0.0),
+        error_rate: float = 0.0,
+        session_ttl: float | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.accounts = {a.username: a for a in accounts or []}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.session_ttl = session_ttl
+        self.requests: Counter[str] = Counter()
+        self._sessions: dict[str, _Session] = {}
+        self._random = random.Random(seed)
+        self._devices: dict[str, list[dict]] = {}
+
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.router.add_get("/auth/users/sign_in", self._sign_in_page)
+        self.app.router.add_post("/auth/users/sign_in", self._sign_in)
+        self.app.router.add_get("/", self._root)
+        self.app.router.add_get("/users/{account_id}/devices", self._devices_list)
+        self.app.router.add_post("/api/devices/{uuid}/functions", self._function)
+        self.app.router.add_post("/devices/{uuid}/messages", self._message)
+
+    def add_account(self, account: MockAccount) -> None:
+        self.accounts[account.username] = account
+
+    def devices(self, account: MockAccount) -> list[dict]:
+        if account.account_id not in self._devices:
+            self._devices[account.account_id] = [
+                make_device(account.account_id, i) for i in range(account.device_count)
+            ]
+        return self._devices[account.account_id]
+
+    def expire_sessions(self) -> None:
+        """Invalidate every logged-in session, as the portal does eventually."""
+        self._sessions = {k: v for k, v in self._sessions.items() if v.account is None}
+
+    # ------------------------------------------------------------------
+    # Plumbing
+    # ------------------------------------------------------------------
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        resource = request.match_info.route.resource
+        self.requests[f"{request.method} {resource.canonical if resource else request.path}"] += 1
+        low, high = self.latency
+        if high > 0:
+            await asyncio.sleep(self._random.uniform(low, high))
+        if self.error_rate and self._random.random() < self.error_rate:
+            return web.Response(status=500, text="Internal Server Error")
+        return await handler(request)
+
+    def _session(self, request: web.Request) -> _Session | None:
+        session = self._sessions.get(request.cookies.get(SESSION_COOKIE, ""))
+        if session is None:
+            return None
+        if (
+            session.account is not None
+            and self.session_ttl is not None
+            and time.monotonic() - session.created > self.session_ttl
+        ):
+            return None
+        return session
+
+    def _new_session(self, response: web.StreamResponse, account=None) -> _Session:
+        session_id = secrets.token_hex(16)
+        session = _Session(csrf=secrets.token_urlsafe(32), account=account)
+        self._sessions[session_id] = session
+        response.set_cookie(SESSION_COOKIE, session_id, path="/", httponly=True)
+        return session
+
+    # ------------------------------------------------------------------
+    # Endpoints
+    # ------------------------------------------------------------------
+
+    async def _sign_in_page(self, request: web.Request) -> web.Response:
+        response = web.Response(content_type="text/html")
+        session = self._session(request)
+        if session is None:
+            session = self._new_session(response)
+        response.text = (
+            "<html><head>"
+            f'<meta name="csrf-token" content="{session.csrf}" />'
+            "</head><body>sign in</body></html>"
+        )
+        return response
+
+    async def _sign_in(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        session = self._session(request)
+        account = self.accounts.get(form.get("user[login]", ""))
+        if (
+            session is None
+            or form.get("authenticity_token") != session.csrf
+            or account is None
+            or form.get("user[password]") != account.password
+        ):
+            return web.Response(status=200, text="Invalid login", content_type="text/html")
+
+        response = web.Response(status=302, headers={"Location": "/"})
+        self._new_session(response, account)
+        return response
+
+    async def _root(self, request: web.Request) -> web.Response:
+        session = self._session(request)
+        if session is None or session.account is None:
+            location = "/auth/users/sign_in"
+        else:
+            location = f"/users/{session.account.account_id}/devices"
+        return web.Response(status=302, headers={"Location": f"{request.url.origin()}{location}"})
+
+    async def _devices_list(self, request: web.Request) -> web.Response:
+        session = self._session(request)
+        if session is None or session.account is None:
+            return web.json_response({"error": "unauthorized"}, status=401)
+        if session.account.account_id != request.match_info["account_id"]:
+            return web.json_response({"error": "forbidden"}, status=403)
+        return web.json_response(self.devices(session.account))
+
+    def _authorized_action(self, request: web.Request, token: str | None) -> web.Response | None:
+        session = self._session(request)
+        if session is None or session.account is None:
+            return web.Response(status=401)
+        if token != session.csrf:
+            return web.Response(status=422, text="InvalidAuthenticityToken")
+        return None
+
+    async def _function(self, request: web.Request) -> web.Response:
+        error = self._authorized_action(request, request.headers.get("x-csrf-token"))
+        if error is not None:
+            return error
+        form = await request.post()
+        return web.json_response({"code": form.get("function[code]"), "status": "sent"})
+
+    async def _message(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        error = self._authorized_action(request, form.get("authenticity_token"))
+        if error is not None:
+            return error
+        return web.Response(text="<turbo-stream></turbo-stream>", content_type="text/html")
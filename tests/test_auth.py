@@ -1,5 +1,6 @@
 """Tests for authentication and cookie/CSRF parsing."""
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -132,7 +133,8 @@ class TestRequestCookieHeader:
 
         response = MagicMock()
         response.status = 200
-        response.json = AsyncMock(return_value=[])
+        response.read = AsyncMock(return_value=b"[]")
+        response.headers = {}
         session.get = AsyncMock(return_value=response)
 
         client = GpsClient(config, session)
@@ -147,3 +149,214 @@ class TestRequestCookieHeader:
         assert "accepted_cookies=true" in headers["Cookie"]
         # No cookies= kwarg should be passed
         assert "cookies" not in call_args[1]
+
+
+class TestSessionRestore:
+    def _csrf_response(self):
+        response = MagicMock()
+        response.status = 200
+        response.text = AsyncMock(return_value='<meta name="csrf-token" content="csrf123" />')
+        response.headers = MagicMock()
+        response.headers.getall = MagicMock(return_value=["_iadmin=fresh1; path=/"])
+        return response
+
+    def _devices_response(self, status: int):
+        response = MagicMock()
+        response.status = status
+        response.read = AsyncMock(return_value=b'[{"device": {"uuid": "dev-1"}}]')
+        response.headers = {}
+        return response
+
+    @pytest.mark.asyncio
+    async def test_restored_session_skips_login(self):
+        config = One2TrackConfig(username="user", password="pass", id="acc")
+        session = AsyncMock()
+        session.get = AsyncMock(return_value=self._devices_response(200))
+        session.post = AsyncMock()
+
+        client = GpsClient(config, session)
+        client.restore_session("stored_cookie", "acc")
+        devices = await client.update()
+
+        assert devices == [{"uuid": "dev-1"}]
+        assert session.get.call_count == 1
+        session.post.assert_not_called()
+        assert "_iadmin=stored_cookie" in session.get.call_args[1]["headers"]["Cookie"]
+
+    @pytest.mark.asyncio
+    async def test_expired_session_logs_in_and_retries(self):
+        config = One2TrackConfig(username="user", password="pass", id="acc")
+        session = AsyncMock()
+
+        login_response = MagicMock()
+        login_response.status = 302
+        login_response.headers = MagicMock()
+        login_response.headers.getall = MagicMock(return_value=["_iadmin=fresh2; path=/"])
+
+        redirect_response = MagicMock()
+        redirect_response.status = 302
+        redirect_response.headers = {"Location": "https://www.one2trackgps.com/users/acc/devices"}
+
+        session.get = AsyncMock(
+            side_effect=[
+                self._devices_response(401),
+                self._csrf_response(),
+                redirect_response,
+                self._devices_response(200),
+            ]
+        )
+        session.post = AsyncMock(return_value=login_response)
+
+        client = GpsClient(config, session)
+        client.restore_session("expired_cookie", "acc")
+        updates = []
+        client.on_session_update = lambda: updates.append(client.export_session())
+
+        devices = await client.update()
+
+        assert devices == [{"uuid": "dev-1"}]
+        assert client._cookie == "fresh2"
+        assert updates[-1] == {"cookie": "fresh2", "account_id": "acc"}
+
+    @pytest.mark.asyncio
+    async def test_fresh_login_failure_is_not_retried(self):
+        config = One2TrackConfig(username="user", password="pass", id="acc")
+        session = AsyncMock()
+
+        login_response = MagicMock()
+        login_response.status = 302
+        login_response.headers = MagicMock()
+        login_response.headers.getall = MagicMock(return_value=["_iadmin=fresh2; path=/"])
+
+        redirect_response = MagicMock()
+        redirect_response.status = 302
+        redirect_response.headers = {"Location": "https://www.one2trackgps.com/users/acc/devices"}
+
+        session.get = AsyncMock(
+            side_effect=[self._csrf_response(), redirect_response, self._devices_response(403)]
+        )
+        session.post = AsyncMock(return_value=login_response)
+
+        client = GpsClient(config, session)
+
+        with pytest.raises(AuthenticationError):
+            await client.update()
+        assert session.post.call_count == 1
+
+
+class TestSingleFlightLogin:
+    def _session(self, login_status: int = 302):
+        def logged_in(headers) -> bool:
+            return "_iadmin=new_session" in (headers or {}).get("Cookie", "")
+
+        async def get(url, headers=None, allow_redirects=True):
+            await asyncio.sleep(0.01)
+            response = MagicMock()
+            response.headers = MagicMock()
+            if url.endswith("/auth/users/sign_in"):
+                # Like the portal, the sign-in page starts an anonymous session
+                cookies = [] if logged_in(headers) else ["_iadmin=anonymous; path=/"]
+                response.status = 200
+                response.text = AsyncMock(
+                    return_value='<meta name="csrf-token" content="csrf123" />'
+                )
+                response.headers.getall = MagicMock(return_value=cookies)
+            elif url.endswith("/devices"):
+                response.status = 200 if logged_in(headers) else 401
+                response.read = AsyncMock(return_value=b"[]")
+                response.headers = {}
+            else:
+                response.status = 302
+                response.headers = {"Location": "https://www.one2trackgps.com/users/acc/devices"}
+            return response
+
+        async def post(url, data=None, headers=None, allow_redirects=True):
+            await asyncio.sleep(0.01)
+            response = MagicMock()
+            if "sign_in" in url:
+                response.status = login_status
+            else:
+                response.status = 200 if logged_in(headers) else 401
+            response.headers = MagicMock()
+            response.headers.getall = MagicMock(return_value=["_iadmin=new_session; path=/"])
+            return response
+
+        session = MagicMock()
+        session.get = AsyncMock(side_effect=get)
+        session.post = AsyncMock(side_effect=post)
+        return session
+
+    def _login_posts(self, session) -> int:
+        return sum(1 for call in session.post.call_args_list if "sign_in" in call[0][0])
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_login(self):
+        session = self._session()
+        client = GpsClient(One2TrackConfig(username="user", password="pass", id="acc"), session)
+
+        results = await asyncio.gather(
+            client.update(),
+            client.force_update("dev-1"),
+            client.send_message("dev-2", "hi"),
+        )
+
+        assert results == [[], True, True]
+        assert self._login_posts(session) == 1
+        assert client._cookie == "new_session"
+        assert not client._tasks
+
+    @pytest.mark.asyncio
+    async def test_caller_arriving_mid_login_waits_for_it(self):
+        session = self._session()
+        client = GpsClient(One2TrackConfig(username="user", password="pass", id="acc"), session)
+
+        update = asyncio.ensure_future(client.update())
+        # Let the sign-in page load so the login POST is in flight
+        while not session.post.call_count:
+            await asyncio.sleep(0)
+
+        assert await client.force_update("dev-1") is True
+        assert await update == []
+        assert self._login_posts(session) == 1
+        assert client._cookie == "new_session"
+
+    @pytest.mark.asyncio
+    async def test_failed_login_leaves_no_session(self):
+        session = self._session(login_status=200)
+        client = GpsClient(One2TrackConfig(username="user", password="pass", id="acc"), session)
+
+        with pytest.raises(AuthenticationError):
+            await client.update()
+        assert client._cookie == ""
+
+    @pytest.mark.asyncio
+    async def test_failed_login_propagates_to_all_waiters(self):
+        session = self._session(login_status=200)
+        client = GpsClient(One2TrackConfig(username="user", password="pass", id="acc"), session)
+
+        results = await asyncio.gather(
+            client.update(), client.power_off("dev-1"), return_exceptions=True
+        )
+
+        assert all(isinstance(r, AuthenticationError) for r in results)
+        assert self._login_posts(session) == 1
+        assert not client._tasks
+
+    @pytest.mark.asyncio
+    async def test_stale_failure_keeps_newer_session(self):
+        session = self._session()
+        client = GpsClient(One2TrackConfig(username="user", password="pass", id="acc"), session)
+        client._cookie = "old_session"
+
+        async def expired_get(url, headers=None, allow_redirects=True):
+            # The session is replaced while the device request is in flight
+            client._cookie = "replaced_session"
+            response = MagicMock()
+            response.status = 401
+            return response
+
+        session.get = AsyncMock(side_effect=expired_get)
+        with pytest.raises(AuthenticationError):
+            await client._get_device_data()
+
+        assert client._cookie == "replaced_session"
@@ -0,0 +1,284 @@
+"""Tests for the persistent outbound command queue."""
+
+import asyncio
+import time
+
+import pytest
+from aiohttp import ClientError
+
+from custom_components.one2track import command_queue
+from custom_components.one2track.client import RetryPolicy
+from custom_components.one2track.client.client_types import CommandResult
+from custom_components.one2track.command_queue import (
+    COMMAND_MAX_AGE,
+    COMMAND_RETRY,
+    EXPIRED,
+    FAILED,
+    SENT,
+    CommandQueue,
+    CommandWorker,
+    outcome_event_data,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _stored(device_uuid: str) -> dict:
+    return {
+        "command_id": f"id-{device_uuid}",
+        "device_uuid": device_uuid,
+        "command": "force_update",
+        "message": None,
+        "created": time.time(),
+    }
+
+
+class TestCommandQueue:
+    def test_merges_duplicate_pending_commands(self, clock):
+        queue = CommandQueue(clock=clock)
+        first = queue.enqueue("dev-1", "force_update")
+        second = queue.enqueue("dev-1", "force_update")
+        other = queue.enqueue("dev-2", "force_update")
+
+        assert second.command_id == first.command_id
+        assert other.command_id != first.command_id
+        assert len(queue) == 2
+
+    def test_different_messages_are_not_merged(self, clock):
+        queue = CommandQueue(clock=clock)
+        queue.enqueue("dev-1", "send_message", "Dinner!")
+        queue.enqueue("dev-1", "send_message", "Come home")
+
+        assert len(queue) == 2
+
+    def test_round_trips_through_stored_data(self, clock):
+        saves = []
+        queue = CommandQueue(clock=clock, on_change=lambda: saves.append(1))
+        queued = queue.enqueue("dev-1", "send_message", "Dinner!")
+
+        restored = CommandQueue(queue.as_data(), clock=clock)
+        assert restored.due() == [queued]
+        assert saves == [1]
+
+    def test_failure_backs_off_then_gives_up(self, clock):
+        queue = CommandQueue(clock=clock)
+        queued = queue.enqueue("dev-1", "power_off")
+
+        retried = queue.fail(queued.command_id, "offline")
+        assert retried.attempts == 1
+        assert retried.error == "offline"
+        assert retried.next_attempt >= clock.now
+        clock.now = retried.next_attempt
+        assert queue.due() == [retried]
+
+        for _ in range(COMMAND_RETRY.attempts - 2):
+            assert queue.fail(queued.command_id, "offline") is not None
+        assert queue.fail(queued.command_id, "offline") is None
+        assert len(queue) == 0
+
+    def test_due_respects_backoff(self, clock, monkeypatch):
+        monkeypatch.setattr(command_queue, "COMMAND_RETRY", RetryPolicy(8, 10.0, 10.0))
+        monkeypatch.setattr(command_queue.RetryPolicy, "delay", lambda self, attempt: 10.0)
+        queue = CommandQueue(clock=clock)
+        queued = queue.enqueue("dev-1", "power_off")
+        queue.fail(queued.command_id, "offline")
+
+        assert queue.due() == []
+        assert queue.next_attempt() == clock.now + 10
+        clock.now += 10
+        assert [c.command_id for c in queue.due()] == [queued.command_id]
+
+    def test_expires_old_commands(self, clock):
+        queue = CommandQueue(clock=clock)
+        queued = queue.enqueue("dev-1", "force_update")
+        clock.now += COMMAND_MAX_AGE + 1
+
+        assert queue.expire() == [queued]
+        assert len(queue) == 0
+
+
+class TestCommandWorker:
+    @pytest.fixture(autouse=True)
+    def no_pause(self, monkeypatch):
+        monkeypatch.setattr(command_queue, "MIN_ROUND_INTERVAL", 0)
+
+    async def _run_until(self, worker: CommandWorker, condition) -> None:
+        task = asyncio.create_task(worker.run())
+        try:
+            async with asyncio.timeout(5):
+                while not condition():
+                    await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_sends_queued_commands_and_reports_outcome(self):
+        sent = []
+        outcomes = []
+
+        async def send(commands):
+            sent.append(commands)
+            return [CommandResult(c.device_uuid, c.command, True, 0.1) for c in commands]
+
+        queue = CommandQueue()
+        queued = queue.enqueue("dev-1", "send_message", "Dinner!")
+        worker = CommandWorker(queue, send, lambda *outcome: outcomes.append(outcome))
+        await self._run_until(worker, lambda: outcomes)
+
+        assert [c.message for c in sent[0]] == ["Dinner!"]
+        assert outcomes[0][0] == queued
+        assert outcomes[0][1] == SENT
+        assert len(queue) == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_send_is_kept_for_retry(self):
+        async def send(commands):
+            raise ClientError("portal down")
+
+        queue = CommandQueue()
+        queue.enqueue("dev-1", "power_off")
+        worker = CommandWorker(queue, send, lambda *outcome: None)
+        await self._run_until(worker, lambda: queue.next_attempt() > 0)
+
+        (pending,) = queue.as_data()["commands"]
+        assert pending["attempts"] == 1
+        assert pending["error"] == "portal down"
+
+    @pytest.mark.asyncio
+    async def test_possibly_delivered_command_is_not_retried(self):
+        outcomes = []
+
+        async def send(commands):
+            return [
+                CommandResult("dev-1", "send_message", False, 0.1, "refused", 422, retryable=True),
+                CommandResult("dev-2", "send_message", False, 0.1, "timed out"),
+            ]
+
+        queue = CommandQueue()
+        queue.enqueue("dev-1", "send_message", "Dinner!")
+        queue.enqueue("dev-2", "send_message", "Dinner!")
+        worker = CommandWorker(queue, send, lambda *outcome: outcomes.append(outcome))
+        await self._run_until(worker, lambda: outcomes)
+
+        ((command, status, _),) = outcomes
+        assert (command.device_uuid, status, command.error) == ("dev-2", FAILED, "timed out")
+        (pending,) = queue.as_data()["commands"]
+        assert (pending["device_uuid"], pending["attempts"]) == ("dev-1", 1)
+
+    @pytest.mark.asyncio
+    async def test_survives_unexpected_errors(self):
+        outcomes = []
+
+        async def send(commands):
+            if commands[0].command == "reboot":
+                raise ValueError("Unknown command 'reboot'")
+            return [CommandResult(c.device_uuid, c.command, True, 0.1) for c in commands]
+
+        def on_outcome(*outcome):
+            outcomes.append(outcome)
+            raise RuntimeError("listener broke")
+
+        queue = CommandQueue({"commands": [{**_stored("dev-1"), "command": "reboot"}]})
+        worker = CommandWorker(queue, send, on_outcome)
+        task = asyncio.create_task(worker.run())
+        try:
+            async with asyncio.timeout(5):
+                while not outcomes:
+                    await asyncio.sleep(0.01)
+                queue.enqueue("dev-2", "force_update")
+                worker.wake()
+                while len(outcomes) < 2:
+                    await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+
+        assert [(c.command, status) for c, status, _ in outcomes] == [
+            ("reboot", FAILED),
+            ("force_update", SENT),
+        ]
+        assert len(queue) == 0
+
+    @pytest.mark.asyncio
+    async def test_wakes_up_for_new_commands(self):
+        outcomes = []
+
+        async def send(commands):
+            return [CommandResult(c.device_uuid, c.command, True, 0.1) for c in commands]
+
+        queue = CommandQueue()
+        worker = CommandWorker(queue, send, lambda *outcome: outcomes.append(outcome))
+        task = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.01)
+        queue.enqueue("dev-1", "force_update")
+        worker.wake()
+        try:
+            async with asyncio.timeout(5):
+                while not outcomes:
+                    await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+
+    @pytest.mark.asyncio
+    async def test_waiters_get_the_outcome(self):
+        release = asyncio.Event()
+
+        async def send(commands):
+            await release.wait()
+            return [CommandResult(c.device_uuid, c.command, True, 0.1, None, 200) for c in commands]
+
+        queue = CommandQueue()
+        queued = queue.enqueue("dev-1", "force_update")
+        worker = CommandWorker(queue, send, lambda *outcome: None)
+        task = asyncio.create_task(worker.run())
+        try:
+            assert await worker.async_wait(queued.command_id, 0.05) is None
+            waiters = [
+                asyncio.create_task(worker.async_wait(queued.command_id, 5)) for _ in range(2)
+            ]
+            await asyncio.sleep(0)
+            release.set()
+            outcomes = await asyncio.gather(*waiters)
+        finally:
+            task.cancel()
+
+        for command, status, result in outcomes:
+            assert command.command_id == queued.command_id
+            assert status == SENT
+            assert result.status == 200
+        assert worker._waiters == {}
+
+
+class TestOutcomeEventData:
+    def test_reports_attempts_and_error(self, clock):
+        queue = CommandQueue(clock=clock)
+        queued = queue.enqueue("dev-1", "power_off")
+        result = CommandResult(
+            "dev-1", "power_off", True, 0.2, None, 200, False, True, {"csrf": 0.05, "request": 0.15}
+        )
+
+        assert outcome_event_data(queued, SENT, result) == {
+            "command_id": queued.command_id,
+            "device_uuid": "dev-1",
+            "command": "power_off",
+            "status": SENT,
+            "attempts": 1,
+            "error": None,
+            "http_status": 200,
+            "reauthenticated": False,
+            "csrf_refreshed": True,
+            "latency_ms": {"csrf": 50.0, "request": 150.0, "total": 200.0},
+        }
+        failed = queue.fail(queued.command_id, "offline")
+        assert outcome_event_data(failed, FAILED, result)["attempts"] == 2
+        assert outcome_event_data(failed, EXPIRED, None)["error"] == "offline"
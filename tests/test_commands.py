@@ -1,10 +1,17 @@
 """Tests for device command services (power_off, force_update)."""
 
+import asyncio
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from aiohttp import ClientConnectionError, ClientSession, DummyCookieJar, TCPConnector, web
+from aiohttp.test_utils import TestServer
 
-from custom_components.one2track.client.client_types import One2TrackConfig
+from custom_components.one2track.client.client_types import (
+    CircuitOpenError,
+    DeviceCommand,
+    One2TrackConfig,
+)
 from custom_components.one2track.client.gps_client import GpsClient
 
 
@@ -83,3 +90,283 @@ class TestSendFunction:
 
         result = await client.power_off("device-uuid")
         assert result is False
+
+
+class TestCsrfCache:
+    @pytest.fixture
+    def client(self):
+        config = One2TrackConfig(username="user", password="pass", id="test_id")
+        session = AsyncMock()
+        c = GpsClient(config, session)
+        c._cookie = "existing_session"
+        return c
+
+    def _csrf_response(self, token: str):
+        response = MagicMock()
+        response.status = 200
+        response.text = AsyncMock(return_value=f'<meta name="csrf-token" content="{token}" />')
+        response.headers = MagicMock()
+        response.headers.getall = MagicMock(return_value=[])
+        return response
+
+    def _status_response(self, status: int):
+        response = MagicMock()
+        response.status = status
+        return response
+
+    @pytest.mark.asyncio
+    async def test_token_reused_across_commands(self, client):
+        client.session.get = AsyncMock(return_value=self._csrf_response("tok1"))
+        client.session.post = AsyncMock(return_value=self._status_response(200))
+
+        assert await client.force_update("dev-1") is True
+        assert await client.force_update("dev-2") is True
+        assert await client.send_message("dev-1", "hi") is True
+
+        assert client.session.get.call_count == 1
+        assert client.session.post.call_count == 3
+        message_call = client.session.post.call_args
+        assert message_call[1]["data"]["authenticity_token"] == "tok1"
+        assert message_call[1]["headers"]["x-csrf-token"] == "tok1"
+
+    @pytest.mark.asyncio
+    async def test_token_refreshed_once_when_rejected(self, client):
+        client.session.get = AsyncMock(
+            side_effect=[self._csrf_response("stale"), self._csrf_response("fresh")]
+        )
+        client.session.post = AsyncMock(
+            side_effect=[self._status_response(422), self._status_response(200)]
+        )
+
+        assert await client.power_off("dev-1") is True
+        assert client.session.get.call_count == 2
+        assert client.session.post.call_args[1]["headers"]["x-csrf-token"] == "fresh"
+        assert client._csrf == "fresh"
+
+    @pytest.mark.asyncio
+    async def test_token_refetched_when_session_changes(self, client):
+        client.session.get = AsyncMock(
+            side_effect=[self._csrf_response("tok1"), self._csrf_response("tok2")]
+        )
+        client.session.post = AsyncMock(return_value=self._status_response(200))
+
+        await client.force_update("dev-1")
+        client._cookie = "new_session"
+        await client.force_update("dev-1")
+
+        assert client.session.get.call_count == 2
+        assert client.session.post.call_args[1]["headers"]["x-csrf-token"] == "tok2"
+
+
+class TestResponseRelease:
+    @pytest.fixture
+    async def server(self):
+        async def sign_in(request):
+            # Large enough that the body is not consumed together with the headers
+            padding = "x" * 256 * 1024
+            return web.Response(
+                text=f'<meta name="csrf-token" content="tok" />{padding}',
+                content_type="text/html",
+            )
+
+        async def functions(request):
+            return web.json_response({"result": "ok", "padding": "y" * 1024 * 1024})
+
+        app = web.Application()
+        app.router.add_get("/auth/users/sign_in", sign_in)
+        app.router.add_post("/api/devices/{uuid}/functions", functions)
+
+        server = TestServer(app)
+        await server.start_server()
+        yield server
+        await server.close()
+
+    @pytest.mark.asyncio
+    async def test_no_connections_held_after_command_loop(self, server):
+        connector = TCPConnector(limit=4)
+        async with ClientSession(connector=connector, cookie_jar=DummyCookieJar()) as session:
+            config = One2TrackConfig(username="user", password="pass", id="acc")
+            client = GpsClient(config, session, base_url=str(server.make_url("")))
+            client._cookie = "existing_session"
+
+            # Leaked responses would exhaust the 4-connection pool and block here
+            async with asyncio.timeout(30):
+                for i in range(200):
+                    client._csrf = ""  # force a page download on every iteration
+                    assert await client.force_update(f"dev-{i}") is True
+
+            assert len(connector._acquired) == 0
+
+
+class TestSendCommands:
+    @pytest.fixture
+    def client(self):
+        config = One2TrackConfig(username="user", password="pass", id="test_id")
+        c = GpsClient(config, AsyncMock())
+        c._cookie = "existing_session"
+        return c
+
+    def _fake_session(self, client, fail_uuid: str | None = None):
+        state = {"in_flight": 0, "max_in_flight": 0}
+
+        async def get(url, headers=None, allow_redirects=True):
+            response = MagicMock()
+            response.status = 200
+            response.text = AsyncMock(return_value='<meta name="csrf-token" content="tok" />')
+            response.headers = MagicMock()
+            response.headers.getall = MagicMock(return_value=[])
+            return response
+
+        async def post(url, data=None, headers=None, allow_redirects=True):
+            state["in_flight"] += 1
+            state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+            await asyncio.sleep(0.01)
+            state["in_flight"] -= 1
+            if fail_uuid and fail_uuid in url:
+                raise ClientConnectionError("connection reset")
+            response = MagicMock()
+            response.status = 200
+            return response
+
+        client.session.get = AsyncMock(side_effect=get)
+        client.session.post = AsyncMock(side_effect=post)
+        return state
+
+    @pytest.mark.asyncio
+    async def test_runs_concurrently_under_limit(self, client):
+        state = self._fake_session(client)
+        commands = [DeviceCommand(f"dev-{i}", "force_update") for i in range(20)]
+
+        results = await client.send_commands(commands, limit=4)
+
+        assert [r.device_uuid for r in results] == [f"dev-{i}" for i in range(20)]
+        assert all(r.success and r.elapsed > 0 for r in results)
+        assert state["max_in_flight"] == 4
+        assert client.session.get.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_mixed_commands_and_per_device_errors(self, client):
+        self._fake_session(client, fail_uuid="dev-2")
+        commands = [
+            DeviceCommand("dev-1", "send_message", "Dinner!"),
+            DeviceCommand("dev-2", "power_off"),
+            DeviceCommand("dev-3", "force_update"),
+        ]
+
+        results = await client.send_commands(commands)
+
+        assert [r.success for r in results] == [True, False, True]
+        assert results[1].error == "connection reset"
+        assert "messages" in client.session.post.call_args_list[0][0][0]
+
+    @pytest.mark.asyncio
+    async def test_only_unsent_failures_are_retryable(self, client):
+        self._fake_session(client)
+        outcomes = {
+            "dev-1": CircuitOpenError("paused"),
+            "dev-2": TimeoutError(),
+            "dev-3": 503,
+            "dev-4": 404,
+            "dev-5": 500,
+            "dev-6": 502,
+            "dev-7": 429,
+        }
+
+        async def post(url, data=None, headers=None, allow_redirects=True):
+            outcome = outcomes[url.split("/")[-2]]
+            if isinstance(outcome, Exception):
+                raise outcome
+            response = MagicMock()
+            response.status = outcome
+            return response
+
+        client.session.post = AsyncMock(side_effect=post)
+
+        results = await client.send_commands([DeviceCommand(d, "power_off") for d in outcomes])
+
+        assert not any(r.success for r in results)
+        assert [r.retryable for r in results] == [True, False, True, False, False, False, True]
+
+    @pytest.mark.asyncio
+    async def test_server_error_is_final(self, client):
+        # Rails may have passed the command on to the watch before failing
+        self._fake_session(client)
+        response = MagicMock()
+        response.status = 500
+        client.session.post = AsyncMock(return_value=response)
+
+        (result,) = await client.send_commands([DeviceCommand("dev-1", "send_message", "Hi")])
+
+        assert (result.success, result.status, result.retryable) == (False, 500, False)
+        assert client.session.post.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_session_is_dropped(self, client):
+        self._fake_session(client)
+
+        async def post(url, data=None, headers=None, allow_redirects=True):
+            response = MagicMock()
+            response.status = 401
+            return response
+
+        client.session.post = AsyncMock(side_effect=post)
+
+        (result,) = await client.send_commands([DeviceCommand("dev-1", "force_update")])
+
+        assert (result.success, result.status, result.retryable) == (False, 401, True)
+        assert result.error == "Session expired"
+        assert client._cookie == ""
+        assert client._csrf == ""
+
+    @pytest.mark.asyncio
+    async def test_empty_batch(self, client):
+        assert await client.send_commands([]) == []
+        client.session.get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_results_report_status_and_phases(self, client):
+        self._fake_session(client)
+
+        (result,) = await client.send_commands([DeviceCommand("dev-1", "force_update")])
+
+        assert result.status == 200
+        assert result.csrf_refreshed is True
+        assert result.reauthenticated is False
+        assert set(result.phases) == {"csrf", "request"}
+        assert result.phases["request"] >= 0.01
+
+    @pytest.mark.asyncio
+    async def test_results_report_csrf_rejection(self, client):
+        self._fake_session(client)
+        client._csrf = "stale"
+        client._csrf_cookie = client._cookie
+        statuses = iter([422, 200])
+
+        async def post(url, data=None, headers=None, allow_redirects=True):
+            response = MagicMock()
+            response.status = next(statuses)
+            return response
+
+        client.session.post = AsyncMock(side_effect=post)
+
+        (result,) = await client.send_commands([DeviceCommand("dev-1", "power_off")])
+
+        assert result.success is True
+        assert result.status == 200
+        assert result.csrf_refreshed is True
+        assert client.session.post.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_results_report_login(self, client):
+        self._fake_session(client)
+        client._cookie = ""
+
+        async def login():
+            client._cookie = "new_session"
+
+        client._login_flow = login
+
+        (result,) = await client.send_commands([DeviceCommand("dev-1", "power_off")])
+
+        assert result.reauthenticated is True
+        assert "auth" in result.phases
@@ -0,0 +1,73 @@
+"""Tests for how the coordinator indexes each refresh."""
+
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from conftest import device_payload
+
+from custom_components.one2track import coordinator as coordinator_module
+from custom_components.one2track.coordinator import GpsCoordinator
+from custom_components.one2track.geofence import Geofence
+
+
+@pytest.fixture
+def coordinator(monkeypatch):
+    monkeypatch.setattr(
+        coordinator_module.dt_util, "now", lambda: SimpleNamespace(date=lambda: date(2024, 3, 1))
+    )
+    return GpsCoordinator(SimpleNamespace(bus=MagicMock()), MagicMock())
+
+
+class TestIndex:
+    def test_unchanged_list_returns_same_index(self, coordinator):
+        devices = [device_payload()]
+        first = coordinator._index(devices)
+
+        assert coordinator._index(devices) is first
+
+    def test_unchanged_device_reuses_snapshot(self, coordinator):
+        first = coordinator._index([device_payload(uuid="a"), device_payload(uuid="b")])
+        second = coordinator._index(
+            [device_payload(uuid="a"), device_payload(uuid="b", lat=52.01, minute=5)]
+        )
+
+        assert second is not first
+        assert second["a"] is first["a"]
+        assert second["b"].latitude == 52.01
+        assert len(coordinator.history["a"]) == 1
+        assert len(coordinator.history["b"]) == 2
+
+    def test_jitter_is_held_against_the_accepted_fix(self, coordinator):
+        accepted = coordinator._index([device_payload(accuracy=30)])["dev-1"]
+        coordinator._index([device_payload(lat=52.0002, accuracy=5, minute=1)])
+        # 33 m from the accepted fix, but 22 m beyond the reach of the last fix alone
+        device = coordinator._index([device_payload(lat=52.0003, accuracy=5, minute=2)])["dev-1"]
+
+        assert device.anchor is accepted
+        assert (device.latitude, device.accuracy, device.position_accuracy) == (52.0, 5.0, 30.0)
+        # The history keeps what the watch reported
+        assert coordinator.history["dev-1"].window()[-1]["latitude"] == 52.0003
+
+    def test_jitter_suppression_can_be_turned_off(self, coordinator):
+        coordinator.suppress_jitter = False
+        coordinator._index([device_payload(accuracy=30)])
+        device = coordinator._index([device_payload(lat=52.0002, minute=1)])["dev-1"]
+
+        assert (device.jitter, device.latitude) == (False, 52.0002)
+
+    def test_removed_device_drops_its_state(self, coordinator):
+        coordinator.geofences.set_fence(
+            Geofence(
+                "home", "Home", frozenset({"a", "b"}), latitude=52.0, longitude=4.9, radius=100
+            )
+        )
+        coordinator._index([device_payload(uuid="a"), device_payload(uuid="b")])
+
+        coordinator._index([device_payload(uuid="a", minute=1)])
+
+        assert coordinator.history.keys() == {"a"}
+        assert coordinator.trips.stats.keys() == {"a"}
+        assert coordinator.geofences._devices.keys() == {"a"}
+        assert {uuid for uuid, _ in coordinator.geofences._inside} == {"a"}
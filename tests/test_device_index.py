@@ -0,0 +1,57 @@
+"""Tests for the entity/device/config entry index used by the services."""
+
+from custom_components.one2track.device_index import DeviceIndex
+
+
+class TestDeviceIndex:
+    def test_resolves_entities_and_owners(self):
+        index = DeviceIndex()
+        index.set_devices("entry-1", ["uuid-a", "uuid-b"])
+        index.add_entity("device_tracker.watch_a", "uuid-a")
+        index.add_entity("sensor.watch_a_battery", "uuid-a")
+
+        assert index.device_uuid("device_tracker.watch_a") == "uuid-a"
+        assert index.device_uuid("sensor.watch_a_battery") == "uuid-a"
+        assert index.device_uuid("sensor.unknown") is None
+        assert index.entry_id("uuid-b") == "entry-1"
+
+    def test_refresh_updates_owned_devices(self):
+        index = DeviceIndex()
+        index.set_devices("entry-1", ["uuid-a", "uuid-b"])
+        index.set_devices("entry-1", ["uuid-b", "uuid-c"])
+
+        assert index.entry_id("uuid-a") is None
+        assert index.entry_id("uuid-c") == "entry-1"
+
+    def test_device_moved_to_other_entry(self):
+        index = DeviceIndex()
+        index.set_devices("entry-1", ["uuid-a"])
+        index.set_devices("entry-2", ["uuid-a"])
+        index.set_devices("entry-1", [])
+
+        assert index.entry_id("uuid-a") == "entry-2"
+
+    def test_remove_entry(self):
+        index = DeviceIndex()
+        index.set_devices("entry-1", ["uuid-a"])
+        index.set_devices("entry-2", ["uuid-b"])
+        index.remove_entry("entry-1")
+
+        assert index.entry_id("uuid-a") is None
+        assert index.entry_id("uuid-b") == "entry-2"
+
+    def test_remove_entry_without_devices(self):
+        index = DeviceIndex()
+        index.set_devices("entry-1", [])
+        index.remove_entry("entry-1")
+        index.remove_entry("entry-2")
+
+        assert index.entry_id("uuid-a") is None
+
+    def test_remove_entity(self):
+        index = DeviceIndex()
+        index.add_entity("device_tracker.watch_a", "uuid-a")
+        index.remove_entity("device_tracker.watch_a")
+        index.remove_entity("device_tracker.watch_a")
+
+        assert index.device_uuid("device_tracker.watch_a") is None
@@ -0,0 +1,187 @@
+"""Tests for fetching and decoding the device list."""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.one2track.client.client_types import One2TrackConfig
+from custom_components.one2track.client.decoding import StringPool, iter_chunks, iter_devices
+from custom_components.one2track.client.gps_client import GpsClient
+
+
+def _devices_payload(*names: str) -> bytes:
+    return json.dumps(
+        [{"device": {"uuid": f"uuid-{name}", "name": name}} for name in names]
+    ).encode()
+
+
+def _response(status: int = 200, body: bytes = b"[]", headers: dict | None = None):
+    response = MagicMock()
+    response.status = status
+    response.read = AsyncMock(return_value=body)
+    response.headers = headers or {}
+    return response
+
+
+@pytest.fixture
+def client():
+    config = One2TrackConfig(username="user", password="pass", id="acc")
+    c = GpsClient(config, AsyncMock())
+    c._cookie = "existing_session"
+    return c
+
+
+class TestUnchangedPayload:
+    @pytest.mark.asyncio
+    async def test_identical_payload_returns_previous_list(self, client):
+        client.session.get = AsyncMock(side_effect=[_response(body=_devices_payload("a", "b"))] * 2)
+
+        first = await client._get_device_data()
+        with patch("custom_components.one2track.client.gps_client.iter_devices") as decode:
+            second = await client._get_device_data()
+
+        assert second is first
+        decode.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_changed_payload_is_decoded(self, client):
+        client.session.get = AsyncMock(
+            side_effect=[
+                _response(body=_devices_payload("a")),
+                _response(body=_devices_payload("a", "b")),
+            ]
+        )
+
+        first = await client._get_device_data()
+        second = await client._get_device_data()
+
+        assert second is not first
+        assert [d["name"] for d in second] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_etag_is_revalidated(self, client):
+        client.session.get = AsyncMock(
+            side_effect=[
+                _response(body=_devices_payload("a"), headers={"ETag": 'W/"v1"'}),
+                _response(status=304),
+            ]
+        )
+
+        first = await client._get_device_data()
+        second = await client._get_device_data()
+
+        assert second is first
+        assert client.session.get.call_args[1]["headers"]["If-None-Match"] == 'W/"v1"'
+        assert client._cookie == "existing_session"
+
+    @pytest.mark.asyncio
+    async def test_no_conditional_request_without_cached_devices(self, client):
+        client._etag = 'W/"v1"'
+        client.session.get = AsyncMock(return_value=_response(body=_devices_payload("a")))
+
+        await client._get_device_data()
+
+        assert "If-None-Match" not in client.session.get.call_args[1]["headers"]
+
+
+class TestStringPool:
+    def test_reuses_strings_of_previous_generation(self):
+        pool = StringPool()
+        first = pool.intern(json.loads('{"address": "Dam 1, Amsterdam", "meta": ["GPS"]}'))
+        pool.next_generation()
+        second = pool.intern(json.loads('{"address": "Dam 1, Amsterdam", "meta": ["GPS"]}'))
+
+        assert second == first
+        assert second["address"] is first["address"]
+        assert second["meta"][0] is first["meta"][0]
+        assert next(iter(second)) is next(iter(first))
+
+    def test_drops_strings_not_seen_in_a_generation(self):
+        pool = StringPool()
+        old = pool.intern("".join(["Kalverstraat", " 12"]))
+        pool.next_generation()
+        pool.intern("Dam 1")
+        pool.next_generation()
+        fresh = "".join(["Kalverstraat", " 12"])
+
+        assert pool.intern(fresh) is fresh
+        assert fresh is not old
+
+    def test_leaves_other_values_alone(self):
+        pool = StringPool()
+
+        assert pool.intern({"battery": 80, "tumble": None, "speed": 1.5}) == {
+            "battery": 80,
+            "tumble": None,
+            "speed": 1.5,
+        }
+
+    @pytest.mark.asyncio
+    async def test_client_shares_strings_between_refreshes(self, client):
+        client.session.get = AsyncMock(
+            side_effect=[
+                _response(body=_devices_payload("watch-a", "watch-b")),
+                _response(body=_devices_payload("watch-a", "watch-c")),
+            ]
+        )
+
+        first = await client._get_device_data()
+        second = await client._get_device_data()
+
+        assert second[0]["uuid"] is first[0]["uuid"]
+        assert second[0]["name"] is first[0]["name"]
+
+
+class TestStreamingDecode:
+    def _payload(self) -> bytes:
+        devices = [
+            {
+                "device": {
+                    "uuid": f"uuid-{i}",
+                    "name": f"Horloge Zoë {i}",
+                    "last_location": {
+                        "address": "Straße 1",
+                        "meta_data": {
+                            "tumble": "0",
+                            "stations": [{"cid": "1"}],
+                            "routers": [{"name": "home", "macAddress": "aa:bb"}],
+                        },
+                    },
+                }
+            }
+            for i in range(5)
+        ]
+        return json.dumps(devices, ensure_ascii=False, indent=1).encode()
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 100_000])
+    def test_decodes_across_chunk_boundaries(self, chunk_size):
+        devices = list(iter_devices(iter_chunks(self._payload(), chunk_size)))
+
+        assert [d["uuid"] for d in devices] == [f"uuid-{i}" for i in range(5)]
+        assert devices[4]["name"] == "Horloge Zoë 4"
+        assert devices[0]["last_location"]["address"] == "Straße 1"
+
+    def test_drops_unused_meta_data(self):
+        device = next(iter_devices([self._payload()]))
+        assert device["last_location"]["meta_data"] == {"tumble": "0"}
+
+    def test_empty_list(self):
+        assert list(iter_devices([b" [ ] "])) == []
+
+    def test_rejects_non_array(self):
+        with pytest.raises(ValueError):
+            list(iter_devices([b'{"error": "unauthorized"}']))
+
+    def test_rejects_truncated_payload(self):
+        with pytest.raises(ValueError):
+            list(iter_devices(iter_chunks(self._payload()[:-40], 16)))
+
+    def test_matches_plain_json_decode(self):
+        body = self._payload()
+        expected = [item["device"] for item in json.loads(body)]
+        for device in expected:
+            for key in ("stations", "routers"):
+                device["last_location"]["meta_data"].pop(key)
+
+        assert list(iter_devices(iter_chunks(body, 5))) == expected
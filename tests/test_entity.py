@@ -0,0 +1,179 @@
+"""Tests for skipping state writes of unchanged entities."""
+
+import logging
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from conftest import make_snapshot
+
+from custom_components.one2track import sensor as sensor_platform
+from custom_components.one2track.device_tracker import One2TrackDeviceTracker
+from custom_components.one2track.models import DeviceSnapshot
+from custom_components.one2track.sensor import (
+    SENSOR_DESCRIPTIONS,
+    TRIP_SENSOR_DESCRIPTIONS,
+    One2TrackSensorEntity,
+    One2TrackTripSensorEntity,
+)
+from custom_components.one2track.trips import TripTracker, suppress_jitter
+from custom_components.one2track.zones import ZoneResolver
+
+BATTERY = next(d for d in SENSOR_DESCRIPTIONS if d.key == "battery")
+DISTANCE = next(d for d in TRIP_SENSOR_DESCRIPTIONS if d.key == "distance_today")
+
+
+def _device(**location) -> DeviceSnapshot:
+    location = {
+        "last_location_update": "2024-03-01T11:59:00.000+01:00",
+        "address": "Dam 1, Amsterdam",
+        "battery_percentage": 85,
+        **location,
+    }
+    return make_snapshot(lat=52.373, lon=4.893, accuracy=12.0, **location)
+
+
+def _coordinator(device: DeviceSnapshot) -> SimpleNamespace:
+    return SimpleNamespace(data={device.uuid: device}, last_update_success=True)
+
+
+async def _added(entity):
+    entity.hass = SimpleNamespace(data={})
+    entity.entity_id = "sensor.watch"
+    entity.async_write_ha_state = MagicMock()
+    await entity.async_added_to_hass()
+    return entity
+
+
+class TestCoordinatorUpdate:
+    @pytest.fixture
+    async def sensor(self):
+        device = _device()
+        return await _added(One2TrackSensorEntity(_coordinator(device), device, BATTERY))
+
+    @pytest.mark.asyncio
+    async def test_unchanged_device_is_not_written(self, sensor):
+        # A new snapshot of the same values, as after a refresh with other changes
+        sensor.coordinator.data = {"dev-1": _device()}
+        sensor._handle_coordinator_update()
+
+        sensor.async_write_ha_state.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_changed_value_is_written_once(self, sensor):
+        sensor.coordinator.data = {"dev-1": _device(battery_percentage=84)}
+        sensor._handle_coordinator_update()
+        sensor._handle_coordinator_update()
+
+        assert sensor.native_value == 84
+        sensor.async_write_ha_state.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_availability_flip_is_written(self, sensor):
+        sensor.coordinator.last_update_success = False
+        sensor._handle_coordinator_update()
+        sensor.coordinator.last_update_success = True
+        sensor._handle_coordinator_update()
+
+        assert sensor.async_write_ha_state.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_missing_device_is_logged_once(self, sensor, caplog):
+        sensor.coordinator.data = {}
+        with caplog.at_level(logging.WARNING):
+            sensor._handle_coordinator_update()
+            sensor._handle_coordinator_update()
+
+        assert caplog.text.count("no longer in the account") == 1
+        assert sensor.available is False
+        sensor.async_write_ha_state.assert_called_once()
+
+        sensor.coordinator.data = {"dev-1": _device()}
+        sensor._handle_coordinator_update()
+        assert sensor.available is True
+        assert sensor.async_write_ha_state.call_count == 2
+
+
+class TestTrackerSignature:
+    @pytest.fixture
+    async def tracker(self):
+        device = _device()
+        zones = ZoneResolver(lambda: [])
+        return await _added(One2TrackDeviceTracker(_coordinator(device), zones, device))
+
+    @pytest.mark.asyncio
+    async def test_new_position_is_written(self, tracker):
+        tracker.coordinator.data = {"dev-1": _device(latitude="52.374")}
+        tracker._handle_coordinator_update()
+
+        tracker.async_write_ha_state.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_jitter_does_not_move_the_tracker(self, tracker):
+        bounced = _device(
+            latitude="52.3731",
+            last_location_update="2024-03-01T12:09:00.000+01:00",
+            address="Dam 2, Amsterdam",
+            meta_data={"accuracy_meters": 8.0},
+        )
+        tracker.coordinator.data = {"dev-1": suppress_jitter(tracker._device, bounced)}
+        tracker._handle_coordinator_update()
+
+        tracker.async_write_ha_state.assert_not_called()
+        assert (tracker.latitude, tracker.location_accuracy) == (52.373, 12.0)
+        assert tracker.location_name == "Dam 1, Amsterdam"
+
+    @pytest.mark.asyncio
+    async def test_jitter_still_writes_battery(self, tracker):
+        bounced = _device(latitude="52.3731", battery_percentage=84)
+        tracker.coordinator.data = {"dev-1": suppress_jitter(tracker._device, bounced)}
+        tracker._handle_coordinator_update()
+
+        tracker.async_write_ha_state.assert_called_once()
+        assert (tracker.latitude, tracker.battery_level) == (52.373, 84)
+
+    @pytest.mark.asyncio
+    async def test_jitter_still_writes_availability(self, tracker):
+        bounced = _device(latitude="52.3731")
+        tracker.coordinator.data = {"dev-1": suppress_jitter(tracker._device, bounced)}
+        tracker.coordinator.last_update_success = False
+        tracker._handle_coordinator_update()
+
+        tracker.async_write_ha_state.assert_called_once()
+
+
+class TestTripSensorRollover:
+    @pytest.fixture
+    async def distance(self, monkeypatch):
+        today = date(2024, 3, 1)
+        device = _device()
+        moved = _device(latitude="52.383", last_location_update="2024-03-01T12:09:00.000+01:00")
+        coordinator = _coordinator(device)
+        coordinator.trips = TripTracker()
+        coordinator.trips.ingest([device], today)
+        coordinator.trips.ingest([moved], today)
+
+        self.now = datetime(2024, 3, 1, 23, 59)
+        self.track = MagicMock()
+        monkeypatch.setattr(sensor_platform.dt_util, "now", lambda: self.now)
+        monkeypatch.setattr(sensor_platform, "async_track_time_change", self.track)
+        return await _added(One2TrackTripSensorEntity(coordinator, device, DISTANCE))
+
+    @pytest.mark.asyncio
+    async def test_listens_for_midnight_until_removed(self, distance):
+        _, _, kwargs = self.track.mock_calls[0]
+        assert kwargs == {"hour": 0, "minute": 0, "second": 0}
+        assert distance.on_remove == [self.track.return_value]
+
+    @pytest.mark.asyncio
+    async def test_midnight_resets_without_an_update(self, distance):
+        assert distance.native_value == pytest.approx(1.11, abs=0.01)
+        handle_new_day = self.track.call_args.args[1]
+
+        self.now += timedelta(minutes=1)
+        handle_new_day(self.now)
+        handle_new_day(self.now)
+
+        assert distance.native_value == 0
+        distance.async_write_ha_state.assert_called_once()
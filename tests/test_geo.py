@@ -0,0 +1,36 @@
+"""Tests for the shared geometry helpers."""
+
+import pytest
+
+from custom_components.one2track.geo import (
+    METERS_PER_DEG_LAT,
+    bounds_around,
+    grid_cells,
+    haversine_m,
+)
+
+
+class TestHaversine:
+    def test_known_distance(self):
+        # One degree along a meridian
+        (distance,) = haversine_m([52.0], [4.9], [53.0], [4.9])
+        assert distance == pytest.approx(111_195, rel=0.001)
+
+    def test_batches_pairs(self):
+        distances = haversine_m([52.0, 52.0], [4.9, 4.9], [52.0, 52.0 + 0.001], [4.9, 4.9])
+        assert distances[0] == 0
+        assert distances[1] == pytest.approx(111.2, rel=0.01)
+
+
+class TestGrid:
+    def test_bounds_reach_out_in_meters(self):
+        min_lat, min_lon, max_lat, max_lon = bounds_around(60.0, 4.9, 1000)
+
+        assert (max_lat - min_lat) * METERS_PER_DEG_LAT == pytest.approx(2000)
+        # A degree of longitude is half as long at 60 degrees north
+        assert max_lon - min_lon == pytest.approx(2 * (max_lat - min_lat))
+
+    def test_cells_cover_the_bounds(self):
+        lat_cells, lon_cells = grid_cells((52.004, 4.905, 52.016, 4.905))
+
+        assert (list(lat_cells), list(lon_cells)) == ([5200, 5201], [490])
@@ -0,0 +1,117 @@
+"""Tests for the geofence engine."""
+
+from datetime import timedelta
+
+import pytest
+from conftest import START, make_snapshot
+
+from custom_components.one2track.geofence import (
+    DWELL,
+    ENTER,
+    EXIT,
+    Geofence,
+    GeofenceEngine,
+)
+
+SCHOOL = Geofence("school", "School", frozenset({"dev-1"}), 52.0, 4.9, 100, dwell=600)
+# Roughly 700 m x 700 m square around (52.0, 5.0)
+CLUB = Geofence(
+    "club",
+    "Sports club",
+    frozenset({"dev-1"}),
+    points=((51.997, 4.995), (51.997, 5.005), (52.003, 5.005), (52.003, 4.995)),
+)
+
+
+def _kinds(events):
+    return [(event.kind, event.fence.fence_id) for event in events]
+
+
+class TestGeofence:
+    def test_circle_signed_distance(self):
+        assert SCHOOL.signed_distance(52.0, 4.9) == pytest.approx(-100)
+        assert SCHOOL.signed_distance(52.002, 4.9) == pytest.approx(122.4, abs=0.5)
+
+    def test_polygon_signed_distance(self):
+        assert CLUB.signed_distance(52.0, 5.0) < -300
+        assert CLUB.signed_distance(52.004, 5.0) == pytest.approx(111.2, abs=0.5)
+        assert CLUB.signed_distance(52.0, 5.01) > 0
+
+    def test_rejects_incomplete_shapes(self):
+        with pytest.raises(ValueError):
+            Geofence("x", "X", frozenset(), 52.0, 4.9)
+        with pytest.raises(ValueError):
+            Geofence("x", "X", frozenset(), points=((52.0, 4.9), (52.1, 4.9)))
+
+    def test_round_trips_through_dict(self):
+        assert Geofence.from_dict(CLUB.as_dict()) == CLUB
+        assert Geofence.from_dict(SCHOOL.as_dict()) == SCHOOL
+
+
+class TestGeofenceEngine:
+    def test_enter_and_exit(self):
+        engine = GeofenceEngine([SCHOOL, CLUB])
+        assert engine.evaluate([make_snapshot(0, 52.01)]) == []
+
+        assert _kinds(engine.evaluate([make_snapshot(1, 52.0005)])) == [(ENTER, "school")]
+        assert _kinds(engine.evaluate([make_snapshot(2, 52.0, lon=5.0)])) == [
+            (EXIT, "school"),
+            (ENTER, "club"),
+        ]
+
+    def test_first_position_sets_state_silently(self):
+        engine = GeofenceEngine([SCHOOL])
+
+        assert engine.evaluate([make_snapshot(0, 52.0)]) == []
+        assert engine.check_dwell(START + timedelta(hours=1)) == []
+        assert _kinds(engine.evaluate([make_snapshot(1, 52.01)])) == [(EXIT, "school")]
+
+    def test_accuracy_hysteresis_at_the_edge(self):
+        engine = GeofenceEngine([SCHOOL])
+        engine.evaluate([make_snapshot(0, 52.01)])
+        engine.evaluate([make_snapshot(1, 52.0)])
+
+        # About 40 m outside the radius, but the fix is only good to 60 m
+        assert engine.evaluate([make_snapshot(2, 52.00126, accuracy=60)]) == []
+        assert _kinds(engine.evaluate([make_snapshot(3, 52.00126, accuracy=10)])) == [
+            (EXIT, "school")
+        ]
+
+    def test_ignores_poor_fixes(self):
+        engine = GeofenceEngine([SCHOOL])
+        engine.evaluate([make_snapshot(0, 52.01)])
+
+        assert engine.evaluate([make_snapshot(1, 52.0, accuracy=1000)]) == []
+
+    def test_only_devices_of_the_fence(self):
+        engine = GeofenceEngine([SCHOOL])
+        engine.evaluate([make_snapshot(0, 52.01, uuid="other")])
+
+        assert engine.evaluate([make_snapshot(1, 52.0, uuid="other")]) == []
+
+    def test_dwell_fires_once(self):
+        engine = GeofenceEngine([SCHOOL])
+        engine.evaluate([make_snapshot(0, 52.01)])
+        engine.evaluate([make_snapshot(1, 52.0)])
+
+        assert engine.check_dwell(START + timedelta(minutes=5)) == []
+        events = engine.check_dwell(START + timedelta(minutes=11))
+        assert _kinds(events) == [(DWELL, "school")]
+        assert events[0].as_event_data()["device_uuid"] == "dev-1"
+        assert engine.check_dwell(START + timedelta(minutes=30)) == []
+
+    def test_remove_fence_drops_state(self):
+        engine = GeofenceEngine([SCHOOL])
+        engine.evaluate([make_snapshot(0, 52.01)])
+        engine.evaluate([make_snapshot(1, 52.0)])
+
+        assert engine.remove_fence("school") is True
+        assert engine.remove_fence("school") is False
+        assert engine.evaluate([make_snapshot(2, 52.01)]) == []
+        assert engine.check_dwell(START + timedelta(hours=1)) == []
+
+    def test_only_nearby_fences_are_candidates(self):
+        far = Geofence("far", "Far", frozenset({"dev-1"}), 40.0, 10.0, 100)
+        engine = GeofenceEngine([SCHOOL, far])
+
+        assert engine._nearby(52.0, 4.9, 10) == [SCHOOL]
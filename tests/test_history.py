@@ -0,0 +1,72 @@
+"""Tests for the per-device location history ring buffer."""
+
+from datetime import timedelta
+
+from conftest import START, make_snapshot
+
+from custom_components.one2track.history import LocationHistory
+from custom_components.one2track.models import DeviceSnapshot
+
+
+class TestLocationHistory:
+    def test_appends_only_newer_fixes(self):
+        history = LocationHistory(10, timedelta(hours=24))
+
+        assert history.append(make_snapshot(0)) is True
+        assert history.append(make_snapshot(0, lat=53.0)) is False
+        assert history.append(make_snapshot(1)) is True
+        assert len(history) == 2
+
+    def test_evicts_oldest_when_full(self):
+        history = LocationHistory(3, timedelta(hours=24))
+        for minute in range(5):
+            history.append(make_snapshot(minute, lat=50 + minute))
+
+        entries = history.window()
+        assert [e["latitude"] for e in entries] == [52.0, 53.0, 54.0]
+        assert entries[0]["timestamp"] == (START + timedelta(minutes=2)).isoformat()
+
+    def test_evicts_by_age(self):
+        history = LocationHistory(10, timedelta(minutes=30))
+        for minute in (0, 20, 40, 60):
+            history.append(make_snapshot(minute))
+
+        history.evict_before(START + timedelta(minutes=65))
+        assert len(history) == 2
+
+        history.evict_before(START + timedelta(hours=5))
+        assert len(history) == 0
+        assert history.window() == []
+
+    def test_window_filters_by_time(self):
+        history = LocationHistory(4, timedelta(hours=24))
+        for minute in range(6):  # wraps around the buffer
+            history.append(make_snapshot(minute, lat=50 + minute))
+
+        entries = history.window(START + timedelta(minutes=3), START + timedelta(minutes=4))
+        assert [e["latitude"] for e in entries] == [53.0, 54.0]
+
+    def test_entry_fields(self):
+        history = LocationHistory(2, timedelta(hours=24))
+        history.append(make_snapshot(accuracy=None, location_type="WIFI", speed="1.5"))
+
+        (entry,) = history.window()
+        assert entry == {
+            "timestamp": START.isoformat(),
+            "latitude": 52.0,
+            "longitude": 4.9,
+            "accuracy": None,
+            "speed": 1.5,
+            "battery": None,
+            "location_type": "WIFI",
+        }
+
+    def test_ignores_fixes_without_position(self):
+        history = LocationHistory(2, timedelta(hours=24))
+        fix = make_snapshot(0)
+        no_position = DeviceSnapshot.from_device(
+            {"uuid": "dev-1", "name": "Watch", "serial_number": "SN1", "last_location": {}}
+        )
+
+        assert history.append(no_position) is False
+        assert history.append(fix) is True
@@ -0,0 +1,110 @@
+"""End-to-end tests of GpsClient against the local One2Track stand-in."""
+
+import pytest
+from aiohttp.test_utils import TestServer
+from mock_server import MockAccount, MockOne2Track
+
+from custom_components.one2track.client import DeviceCommand, One2TrackConfig, RetryPolicy
+from custom_components.one2track.client.gps_client import GpsClient
+from custom_components.one2track.client.session import SharedSession
+
+ACCOUNT = MockAccount(username="parent", password="secret", account_id="acc1", device_count=3)
+
+
+@pytest.fixture
+async def portal():
+    mock = MockOne2Track([ACCOUNT], seed=1)
+    server = TestServer(mock.app)
+    await server.start_server()
+    yield mock, str(server.make_url(""))
+    await server.close()
+
+
+@pytest.fixture
+async def session():
+    pool = SharedSession()
+    session = pool.acquire()
+    yield session
+    await pool.release(session)
+
+
+def _client(session, base_url: str, password: str = "secret") -> GpsClient:
+    config = One2TrackConfig(username="parent", password=password, id="acc1")
+    return GpsClient(
+        config, session, base_url=base_url, retry=RetryPolicy(attempts=3, base_delay=0)
+    )
+
+
+class TestAgainstMockPortal:
+    @pytest.mark.asyncio
+    async def test_install_and_update(self, portal, session):
+        mock, base_url = portal
+        client = _client(session, base_url)
+
+        assert await client.install() == "acc1"
+        devices = await client.update()
+
+        assert [d["uuid"] for d in devices] == [f"acc1-uuid-{i:05d}" for i in range(3)]
+        assert mock.requests["POST /auth/users/sign_in"] == 1
+
+    @pytest.mark.asyncio
+    async def test_wrong_password(self, portal, session):
+        _, base_url = portal
+        client = _client(session, base_url, password="nope")
+
+        with pytest.raises(Exception, match="Invalid username or password"):
+            await client.install()
+
+    @pytest.mark.asyncio
+    async def test_commands_reuse_csrf_token(self, portal, session):
+        mock, base_url = portal
+        client = _client(session, base_url)
+        await client.install()
+
+        assert await client.force_update("acc1-uuid-00000") is True
+        assert await client.power_off("acc1-uuid-00001") is True
+        assert await client.send_message("acc1-uuid-00002", "Dinner!") is True
+
+        assert mock.requests["POST /api/devices/{uuid}/functions"] == 2
+        assert mock.requests["POST /devices/{uuid}/messages"] == 1
+        # One sign-in page for the login, one for the post-login token
+        assert mock.requests["GET /auth/users/sign_in"] == 2
+
+    @pytest.mark.asyncio
+    async def test_relogin_after_session_expiry(self, portal, session):
+        mock, base_url = portal
+        client = _client(session, base_url)
+        await client.install()
+        await client.update()
+
+        mock.expire_sessions()
+        devices = await client.update()
+
+        assert len(devices) == 3
+        assert mock.requests["POST /auth/users/sign_in"] == 2
+
+    @pytest.mark.asyncio
+    async def test_command_after_session_expiry_logs_in_next_time(self, portal, session):
+        mock, base_url = portal
+        client = _client(session, base_url)
+        await client.install()
+
+        mock.expire_sessions()
+        (refused,) = await client.send_commands([DeviceCommand("acc1-uuid-00000", "force_update")])
+        (sent,) = await client.send_commands([DeviceCommand("acc1-uuid-00000", "force_update")])
+
+        assert (refused.success, refused.status, refused.retryable) == (False, 401, True)
+        assert (sent.success, sent.reauthenticated) == (True, True)
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried(self, portal, session):
+        mock, base_url = portal
+        client = _client(session, base_url)
+        await client.install()
+
+        client.retry = RetryPolicy(attempts=5, base_delay=0)
+        mock.error_rate = 0.2
+        for _ in range(20):
+            assert len(await client.update()) == 3
+
+        assert client.breaker.state == client.breaker.CLOSED
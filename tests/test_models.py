@@ -0,0 +1,83 @@
+"""Tests for the parsed device snapshot."""
+
+from datetime import UTC, datetime, timedelta, timezone
+
+from custom_components.one2track.models import DeviceSnapshot
+
+
+def _raw_device(**location) -> dict:
+    last_location = {
+        "last_communication": "2024-03-01T12:00:00.000+01:00",
+        "last_location_update": "2024-03-01T11:59:00.000+01:00",
+        "address": "Dam 1, Amsterdam",
+        "latitude": "52.373",
+        "longitude": "4.893",
+        "altitude": "4.5",
+        "location_type": "GPS",
+        "signal_strength": 80,
+        "satellite_count": 7,
+        "speed": "3.2",
+        "battery_percentage": 85,
+        "meta_data": {"tumble": "0", "steps": "1234", "accuracy_meters": 12.0},
+        "host": "gw.example",
+        "port": 5000,
+    }
+    last_location.update(location)
+    return {
+        "id": 1,
+        "serial_number": "SN1",
+        "name": "Watch",
+        "phone_number": "+31600000000",
+        "status": "GPS",
+        "uuid": "dev-1",
+        "last_location": last_location,
+        "simcard": {"balance_cents": 1234, "tariff_type": "prepaid"},
+    }
+
+
+class TestDeviceSnapshot:
+    def test_parses_values_once(self):
+        snapshot = DeviceSnapshot.from_device(_raw_device())
+
+        assert snapshot.latitude == 52.373
+        assert snapshot.longitude == 4.893
+        assert snapshot.altitude == 4.5
+        assert snapshot.speed == 3.2
+        assert snapshot.battery == 85
+        assert snapshot.steps == 1234
+        assert snapshot.accuracy == 12.0
+        assert snapshot.tumble is False
+        assert snapshot.balance == 12.34
+        assert snapshot.last_location_update == datetime(
+            2024, 3, 1, 11, 59, tzinfo=timezone(timedelta(hours=1))
+        )
+
+    def test_attributes_keep_api_values(self):
+        snapshot = DeviceSnapshot.from_device(_raw_device())
+
+        assert snapshot.attributes["last_communication"] == "2024-03-01T12:00:00.000+01:00"
+        assert snapshot.attributes["altitude"] == "4.5"
+        assert snapshot.attributes["tariff_type"] == "prepaid"
+        assert snapshot.attributes["balance_cents"] == 1234
+
+    def test_invalid_values_become_none(self):
+        snapshot = DeviceSnapshot.from_device(
+            _raw_device(latitude="", speed="fast", last_communication="yesterday", meta_data={})
+        )
+
+        assert snapshot.latitude is None
+        assert snapshot.speed is None
+        assert snapshot.last_communication is None
+        assert snapshot.steps is None
+        assert snapshot.tumble is None
+
+    def test_naive_timestamps_are_utc(self):
+        snapshot = DeviceSnapshot.from_device(
+            _raw_device(last_location_update="2024-03-01T10:59:00")
+        )
+        assert snapshot.last_location_update == datetime(2024, 3, 1, 10, 59, tzinfo=UTC)
+
+    def test_equal_input_gives_equal_snapshot(self):
+        assert DeviceSnapshot.from_device(_raw_device()) == DeviceSnapshot.from_device(
+            _raw_device()
+        )
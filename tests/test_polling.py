@@ -0,0 +1,123 @@
+"""Tests for the adaptive polling interval."""
+
+from datetime import UTC, datetime, timedelta
+
+from conftest import make_snapshot
+
+from custom_components.one2track.polling import (
+    BURST_INTERVAL,
+    BURST_WINDOW,
+    IDLE_POLLS_PER_STEP,
+    AdaptivePollInterval,
+)
+
+NOW = datetime(2024, 3, 1, 12, 0, tzinfo=UTC)
+
+
+def _device(uuid="dev-1", lat="52.1", speed="0.0", updated=None, status="GPS"):
+    if not isinstance(updated, str):
+        updated = (updated or NOW - timedelta(hours=2)).isoformat()
+    return make_snapshot(
+        lat=lat, uuid=uuid, status=status, speed=speed, last_location_update=updated
+    )
+
+
+def _poll_idle(poller: AdaptivePollInterval, times: int, devices=None) -> timedelta:
+    interval = poller.interval
+    for _ in range(times):
+        interval = poller.next_interval(devices or [_device()], NOW)
+    return interval
+
+
+class TestAdaptivePollInterval:
+    def test_steps_between_bounds(self):
+        poller = AdaptivePollInterval(timedelta(minutes=1), timedelta(minutes=30))
+        assert poller.steps == [timedelta(minutes=m) for m in (1, 5, 15, 30)]
+
+    def test_single_step_when_bounds_equal(self):
+        poller = AdaptivePollInterval(timedelta(minutes=2), timedelta(minutes=2))
+        assert poller.steps == [timedelta(minutes=2)]
+        assert _poll_idle(poller, 10) == timedelta(minutes=2)
+
+    def test_backs_off_step_by_step_while_idle(self):
+        poller = AdaptivePollInterval(timedelta(minutes=1), timedelta(minutes=15))
+
+        assert _poll_idle(poller, IDLE_POLLS_PER_STEP - 1) == timedelta(minutes=1)
+        assert _poll_idle(poller, 1) == timedelta(minutes=5)
+        assert _poll_idle(poller, IDLE_POLLS_PER_STEP) == timedelta(minutes=15)
+        assert _poll_idle(poller, IDLE_POLLS_PER_STEP * 3) == timedelta(minutes=15)
+
+    def test_speed_resets_to_fastest(self):
+        poller = AdaptivePollInterval(timedelta(minutes=1), timedelta(minutes=15))
+        _poll_idle(poller, IDLE_POLLS_PER_STEP * 2)
+
+        assert poller.next_interval([_device(speed="12.5")], NOW) == timedelta(minutes=1)
+
+    def test_position_change_counts_as_motion(self):
+        poller = AdaptivePollInterval(timedelta(minutes=1), timedelta(minutes=15))
+        _poll_idle(poller, IDLE_POLLS_PER_STEP)
+        assert poller.interval == timedelta(minutes=5)
+
+        assert poller.next_interval([_device(lat="52.2")], NOW) == timedelta(minutes=1)
+
+    def test_recent_location_update_counts_as_motion(self):
+        poller = AdaptivePollInterval(timedelta(minutes=1), timedelta(minutes=15))
+        _poll_idle(poller, IDLE_POLLS_PER_STEP)
+
+        recent = _device(updated=NOW - timedelta(minutes=1))
+        assert poller.next_interval([recent], NOW) == timedelta(minutes=1)
+
+    def test_offline_devices_are_ignored(self):
+        poller = AdaptivePollInterval(timedelta(minutes=1), timedelta(minutes=15))
+        offline = _device(speed="30", status="OFFLINE")
+
+        assert _poll_idle(poller, IDLE_POLLS_PER_STEP, [offline]) == timedelta(minutes=5)
+
+    def test_invalid_values_are_treated_as_stationary(self):
+        poller = AdaptivePollInterval(timedelta(minutes=1), timedelta(minutes=15))
+        broken = _device(speed="n/a", updated="yesterday")
+
+        assert _poll_idle(poller, IDLE_POLLS_PER_STEP, [broken]) == timedelta(minutes=5)
+
+
+class TestBurstPolling:
+    def _idle_poller(self) -> AdaptivePollInterval:
+        poller = AdaptivePollInterval(timedelta(minutes=1), timedelta(minutes=15))
+        _poll_idle(poller, IDLE_POLLS_PER_STEP * 3)
+        assert poller.interval == timedelta(minutes=15)
+        return poller
+
+    def test_polls_fast_until_location_advances(self):
+        poller = self._idle_poller()
+        stale = _device()
+
+        assert poller.start_burst([stale], NOW) == BURST_INTERVAL
+        assert poller.next_interval([stale], NOW + timedelta(seconds=15)) == BURST_INTERVAL
+
+        fresh = _device(updated=NOW + timedelta(seconds=20))
+        assert poller.next_interval([fresh], NOW + timedelta(seconds=30)) == timedelta(minutes=1)
+
+    def test_waits_for_every_burst_device(self):
+        poller = self._idle_poller()
+        poller.start_burst([_device("a"), _device("b")], NOW)
+
+        later = NOW + timedelta(seconds=30)
+        devices = [_device("a", updated=later), _device("b")]
+        assert poller.next_interval(devices, later) == BURST_INTERVAL
+
+    def test_burst_ends_after_the_window(self):
+        poller = self._idle_poller()
+        poller.start_burst([_device()], NOW)
+
+        interval = poller.next_interval([_device()], NOW + BURST_WINDOW)
+        assert interval == timedelta(minutes=15)
+
+    def test_burst_never_slows_a_faster_minimum(self):
+        poller = AdaptivePollInterval(timedelta(seconds=10), timedelta(minutes=15))
+
+        assert poller.start_burst([_device()], NOW) == timedelta(seconds=10)
+
+    def test_no_burst_without_devices(self):
+        poller = self._idle_poller()
+
+        assert poller.start_burst([], NOW) == timedelta(minutes=15)
@@ -0,0 +1,170 @@
+"""Tests for request retries and the circuit breaker."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiohttp import ClientConnectionError
+
+from custom_components.one2track.client.client_types import CircuitOpenError, One2TrackConfig
+from custom_components.one2track.client.gps_client import GpsClient
+from custom_components.one2track.client.resilience import CircuitBreaker, RetryPolicy
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _response(status: int):
+    response = MagicMock()
+    response.status = status
+    return response
+
+
+class TestRetryPolicy:
+    def test_delay_is_bounded_and_grows(self):
+        policy = RetryPolicy(attempts=5, base_delay=1.0, max_delay=4.0)
+        for attempt in range(6):
+            delay = policy.delay(attempt)
+            assert 0 <= delay <= min(4.0, 2**attempt)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=FakeClock())
+        for _ in range(3):
+            breaker.before_request()
+            breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+
+    def test_half_open_allows_single_probe(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 11
+        breaker.before_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError, match="probe"):
+            breaker.before_request()
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.before_request()
+
+    def test_failed_probe_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 11
+        breaker.before_request()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+
+    def test_released_probe_lets_next_request_probe(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 11
+        breaker.before_request()
+        breaker.release_probe()
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.before_request()
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(failure_threshold=2, clock=FakeClock())
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestRequestRetries:
+    @pytest.fixture
+    def client(self):
+        config = One2TrackConfig(username="user", password="pass", id="acc")
+        c = GpsClient(
+            config,
+            AsyncMock(),
+            retry=RetryPolicy(attempts=3, base_delay=0),
+            breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60, clock=FakeClock()),
+        )
+        c._cookie = "existing_session"
+        return c
+
+    @pytest.mark.asyncio
+    async def test_get_retried_after_network_error_and_5xx(self, client):
+        client.session.get = AsyncMock(
+            side_effect=[ClientConnectionError("reset"), _response(503), _response(200)]
+        )
+
+        async with client._request("https://example.invalid/") as response:
+            assert response.status == 200
+        assert client.session.get.call_count == 3
+        assert client.breaker.state == CircuitBreaker.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_get_gives_up_after_attempts(self, client):
+        client.session.get = AsyncMock(side_effect=ClientConnectionError("down"))
+
+        with pytest.raises(ClientConnectionError):
+            async with client._request("https://example.invalid/"):
+                pass
+        assert client.session.get.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_post_is_not_retried(self, client):
+        client.session.post = AsyncMock(side_effect=ClientConnectionError("reset"))
+
+        with pytest.raises(ClientConnectionError):
+            async with client._request("https://example.invalid/", data={"a": "b"}):
+                pass
+        assert client.session.post.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_fails_fast(self, client):
+        client.session.get = AsyncMock(side_effect=ClientConnectionError("down"))
+        with pytest.raises(ClientConnectionError):
+            async with client._request("https://example.invalid/"):
+                pass
+
+        client.session.get.reset_mock()
+        with pytest.raises(CircuitOpenError):
+            await client.update()
+        client.session.get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_probe_releases_circuit(self, client):
+        client.session.get = AsyncMock(side_effect=ClientConnectionError("down"))
+        with pytest.raises(ClientConnectionError):
+            async with client._request("https://example.invalid/"):
+                pass
+        assert client.breaker.state == CircuitBreaker.OPEN
+
+        async def hang(*args, **kwargs):
+            await asyncio.sleep(10)
+
+        client.breaker._clock.now = 61
+        client.session.get = AsyncMock(side_effect=hang)
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0.01):
+                async with client._request("https://example.invalid/"):
+                    pass
+
+        client.session.get = AsyncMock(return_value=_response(200))
+        async with client._request("https://example.invalid/") as response:
+            assert response.status == 200
+        assert client.breaker.state == CircuitBreaker.CLOSED
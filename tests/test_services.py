@@ -0,0 +1,138 @@
+"""Tests for the device command services."""
+
+from types import SimpleNamespace
+
+import pytest
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.one2track.client import CommandResult
+from custom_components.one2track.command_queue import SENT, CommandQueue
+from custom_components.one2track.common import DOMAIN
+from custom_components.one2track.device_index import get_device_index
+from custom_components.one2track.services import (
+    SERVICE_FORCE_UPDATE,
+    SERVICE_SEND_MESSAGE,
+    async_setup_services,
+)
+
+
+class FakeWorker:
+    """A command worker that reports every command sent, or never answers."""
+
+    def __init__(self, answers: bool = True) -> None:
+        self.queue = CommandQueue()
+        self.answers = answers
+        self.wakes = 0
+
+    def wake(self) -> None:
+        self.wakes += 1
+
+    async def async_wait(self, command_id: str, timeout: float):
+        if not self.answers:
+            return None
+        command = next(item for item in self.queue.due() if item.command_id == command_id)
+        result = CommandResult(command.device_uuid, command.command, True, 0.25, status=200)
+        return command, SENT, result
+
+
+class FakeServices:
+    def __init__(self) -> None:
+        self.handlers = {}
+
+    def has_service(self, domain: str, service: str) -> bool:
+        return False
+
+    def async_register(self, domain, service, handler, **kwargs) -> None:
+        self.handlers[service] = handler
+
+
+@pytest.fixture
+async def hass():
+    hass = SimpleNamespace(
+        data={DOMAIN: {"entry-a": {"command_worker": FakeWorker()}}}, services=FakeServices()
+    )
+    hass.data[DOMAIN]["entry-b"] = {"command_worker": FakeWorker(answers=False)}
+    index = get_device_index(hass)
+    index.set_devices("entry-a", ["a1", "a2"])
+    index.set_devices("entry-b", ["b1"])
+    for uuid in ("a1", "a2", "b1"):
+        index.add_entity(f"device_tracker.{uuid}", uuid)
+        index.add_entity(f"sensor.{uuid}_battery", uuid)
+    await async_setup_services(hass)
+    return hass
+
+
+def _queued(hass, entry_id: str) -> list[tuple[str, str, str | None]]:
+    return [item.key for item in hass.data[DOMAIN][entry_id]["command_worker"].queue.due()]
+
+
+async def _call(hass, service: str, **data):
+    return await hass.services.handlers[service](SimpleNamespace(data={"wait": False, **data}))
+
+
+class TestCommandServices:
+    @pytest.mark.asyncio
+    async def test_every_target_is_queued_once(self, hass):
+        response = await _call(
+            hass,
+            SERVICE_SEND_MESSAGE,
+            entity_id=["device_tracker.a1", "sensor.a1_battery", "device_tracker.a2"],
+            message="Dinner",
+        )
+
+        assert [command["device_uuid"] for command in response["commands"]] == ["a1", "a2"]
+        assert _queued(hass, "entry-a") == [
+            ("a1", SERVICE_SEND_MESSAGE, "Dinner"),
+            ("a2", SERVICE_SEND_MESSAGE, "Dinner"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_targets_go_to_their_own_account(self, hass):
+        await _call(
+            hass, SERVICE_FORCE_UPDATE, entity_id=["device_tracker.b1", "sensor.a2_battery"]
+        )
+
+        assert _queued(hass, "entry-a") == [("a2", SERVICE_FORCE_UPDATE, None)]
+        assert _queued(hass, "entry-b") == [("b1", SERVICE_FORCE_UPDATE, None)]
+        assert hass.data[DOMAIN]["entry-a"]["command_worker"].wakes == 1
+        assert hass.data[DOMAIN]["entry-b"]["command_worker"].wakes == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("target", ["sensor.unknown", "device_tracker.gone"])
+    async def test_unknown_target_queues_nothing(self, hass, target):
+        # A device whose account was unloaded resolves, but has no worker
+        get_device_index(hass).add_entity("device_tracker.gone", "gone")
+
+        with pytest.raises(HomeAssistantError):
+            await _call(hass, SERVICE_FORCE_UPDATE, entity_id=["device_tracker.a1", target])
+
+        assert _queued(hass, "entry-a") == []
+
+    @pytest.mark.asyncio
+    async def test_without_wait_only_the_queued_commands_are_returned(self, hass):
+        response = await _call(hass, SERVICE_FORCE_UPDATE, entity_id="device_tracker.a1")
+
+        (command,) = response["commands"]
+        assert command.keys() == {"command_id", "device_uuid", "command"}
+
+    @pytest.mark.asyncio
+    async def test_wait_returns_each_outcome(self, hass):
+        response = await _call(
+            hass,
+            SERVICE_FORCE_UPDATE,
+            entity_id=["device_tracker.a1", "device_tracker.b1"],
+            wait=True,
+        )
+
+        sent, pending = response["commands"]
+        assert sent["device_uuid"] == "a1"
+        assert sent["status"] == SENT
+        assert sent["http_status"] == 200
+        assert sent["attempts"] == 1
+        assert sent["latency_ms"] == {"total": 250.0}
+        assert pending == {
+            "command_id": pending["command_id"],
+            "device_uuid": "b1",
+            "command": SERVICE_FORCE_UPDATE,
+            "status": "pending",
+        }
@@ -0,0 +1,70 @@
+"""Tests for the shared, reference-counted HTTP session."""
+
+import pytest
+
+from custom_components.one2track.client import One2TrackConfig, get_client
+from custom_components.one2track.client.session import SharedSession, shared_session
+
+
+class TestSharedSession:
+    @pytest.mark.asyncio
+    async def test_session_shared_until_last_release(self):
+        pool = SharedSession()
+        first = pool.acquire()
+        second = pool.acquire()
+
+        assert first is second
+        assert pool.refs == 2
+
+        await pool.release(first)
+        assert not first.closed
+
+        await pool.release(second)
+        assert first.closed
+        assert pool.refs == 0
+
+    @pytest.mark.asyncio
+    async def test_new_session_after_close(self):
+        pool = SharedSession()
+        first = pool.acquire()
+        await pool.release(first)
+
+        second = pool.acquire()
+        assert second is not first
+        assert not second.closed
+        await pool.release(second)
+
+    @pytest.mark.asyncio
+    async def test_connector_is_tuned(self):
+        pool = SharedSession()
+        session = pool.acquire()
+        assert session.connector.limit_per_host > 0
+        assert session.connector.use_dns_cache
+        await pool.release(session)
+
+
+class TestGetClient:
+    @pytest.mark.asyncio
+    async def test_clients_share_session_and_release_on_close(self):
+        config = One2TrackConfig(username="user", password="pass")
+        a = get_client(config)
+        b = get_client(config)
+
+        assert a.session is b.session
+        await a.close()
+        await a.close()  # closing twice only drops one reference
+        assert not b.session.closed
+
+        await b.close()
+        assert b.session.closed
+        assert shared_session.refs == 0
+
+    @pytest.mark.asyncio
+    async def test_explicit_session_is_not_closed(self):
+        pool = SharedSession()
+        session = pool.acquire()
+        client = get_client(One2TrackConfig(username="user", password="pass"), session)
+
+        await client.close()
+        assert not session.closed
+        await pool.release(session)
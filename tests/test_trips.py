@@ -0,0 +1,133 @@
+"""Tests for the trip and distance statistics."""
+
+import dataclasses
+from datetime import date, timedelta
+
+import pytest
+from conftest import START, make_snapshot
+
+from custom_components.one2track.trips import TripTracker, suppress_jitter
+
+TODAY = date(2024, 3, 1)
+# One thousandth of a degree of latitude is roughly 111 meters
+STEP = 0.001
+
+
+class TestTripTracker:
+    def test_accumulates_distance_and_moving_time(self):
+        tracker = TripTracker()
+        for minute in range(4):
+            tracker.ingest([make_snapshot(minute, lat=52.0 + minute * STEP)], TODAY)
+
+        stats = tracker.stats["dev-1"]
+        assert stats.distance_km(TODAY) == pytest.approx(0.33, abs=0.01)
+        assert stats.trips(TODAY) == 1
+        assert stats.moving_minutes(TODAY) == 3.0
+
+    def test_ignores_jitter_within_accuracy(self):
+        tracker = TripTracker()
+        tracker.ingest([make_snapshot(0)], TODAY)
+        tracker.ingest([make_snapshot(1, lat=52.0001)], TODAY)
+        tracker.ingest([make_snapshot(2, lat=51.9999)], TODAY)
+
+        assert tracker.stats["dev-1"].distance_m == 0
+        assert tracker.stats["dev-1"].trip_count == 0
+
+    def test_ignores_wifi_jitter(self):
+        tracker = TripTracker()
+        tracker.ingest([make_snapshot(0, accuracy=20, location_type="WIFI")], TODAY)
+        tracker.ingest([make_snapshot(1, lat=52.0006, accuracy=20, location_type="WIFI")], TODAY)
+
+        assert tracker.stats["dev-1"].distance_m == 0
+
+    def test_skips_inaccurate_fixes(self):
+        tracker = TripTracker()
+        tracker.ingest([make_snapshot(0)], TODAY)
+        tracker.ingest([make_snapshot(1, lat=52.05, accuracy=1500)], TODAY)
+
+        assert tracker.stats["dev-1"].distance_m == 0
+
+    def test_counts_new_trip_after_stationary_gap(self):
+        tracker = TripTracker()
+        tracker.ingest([make_snapshot(0)], TODAY)
+        tracker.ingest([make_snapshot(1, lat=52.0 + STEP)], TODAY)
+        # Stationary for half an hour, reported every ten minutes
+        for minute in (11, 21, 31):
+            tracker.ingest([make_snapshot(minute, lat=52.0 + STEP)], TODAY)
+        tracker.ingest([make_snapshot(32, lat=52.0 + 2 * STEP)], TODAY)
+
+        stats = tracker.stats["dev-1"]
+        assert stats.trips(TODAY) == 2
+        assert stats.moving_minutes(TODAY) == 2.0
+
+    def test_ignores_stale_fixes(self):
+        tracker = TripTracker()
+        tracker.ingest([make_snapshot(5)], TODAY)
+        tracker.ingest([make_snapshot(1, lat=52.01)], TODAY)
+
+        assert tracker.stats["dev-1"].distance_m == 0
+
+    def test_resets_on_new_day(self):
+        tracker = TripTracker()
+        tracker.ingest([make_snapshot(0)], TODAY)
+        tracker.ingest([make_snapshot(1, lat=52.0 + STEP)], TODAY)
+        tomorrow = TODAY + timedelta(days=1)
+
+        stats = tracker.stats["dev-1"]
+        assert stats.distance_km(tomorrow) == 0
+        tracker.ingest([make_snapshot(24 * 60, lat=52.0 + 2 * STEP)], tomorrow)
+        assert stats.distance_km(tomorrow) == pytest.approx(0.11, abs=0.01)
+        assert stats.trips(tomorrow) == 1
+
+    def test_tracks_devices_independently(self):
+        tracker = TripTracker()
+        tracker.ingest([make_snapshot(0, uuid="a"), make_snapshot(0, uuid="b")], TODAY)
+        tracker.ingest(
+            [make_snapshot(1, lat=52.0 + STEP, uuid="a"), make_snapshot(1, uuid="b")], TODAY
+        )
+
+        assert tracker.stats["a"].distance_m > 100
+        assert tracker.stats["b"].distance_m == 0
+
+
+class TestJitterSuppression:
+    def test_keeps_previous_position_for_jitter(self):
+        previous = make_snapshot(0, accuracy=30)
+        device = suppress_jitter(previous, make_snapshot(1, lat=52.0003, accuracy=20))
+
+        assert device.jitter is True
+        assert (device.latitude, device.longitude, device.position_accuracy) == (52.0, 4.9, 30)
+        # Everything but the position is as reported, for the sensors
+        assert device.accuracy == 20
+        assert device.last_location_update == START + timedelta(minutes=1)
+
+    def test_anchor_is_the_acceptedmake_snapshot(self):
+        accepted = make_snapshot(0, accuracy=30)
+        first = suppress_jitter(accepted, make_snapshot(1, lat=52.0002, accuracy=5))
+        second = suppress_jitter(first, make_snapshot(2, lat=52.0002, accuracy=5))
+
+        assert second.anchor is accepted
+        assert second.position_accuracy == 30
+
+    def test_passes_real_movement(self):
+        previous = make_snapshot(0)
+        device = make_snapshot(1, lat=52.0 + STEP)
+
+        assert suppress_jitter(previous, device) is device
+
+    def test_passes_fix_with_speed(self):
+        previous = make_snapshot(0, accuracy=30)
+        device = dataclasses.replace(make_snapshot(1, lat=52.0001, accuracy=30), speed=4.0)
+
+        assert suppress_jitter(previous, device) is device
+
+    def test_anchor_does_not_drift(self):
+        previous = make_snapshot(0, accuracy=30)
+        flags = []
+        for minute, lat in enumerate((52.0002, 52.0004, 52.0006), start=1):
+            previous = suppress_jitter(previous, make_snapshot(minute, lat=lat, accuracy=30))
+            flags.append(previous.jitter)
+
+        # Each step is 22 m, but the third fix is 67 m from the anchor
+        assert flags == [True, True, False]
+        assert previous.latitude == 52.0006
@@ -0,0 +1,97 @@
+"""Tests for the grid-indexed zone lookup."""
+
+from custom_components.one2track.zones import (
+    ZoneArea,
+    ZoneIndex,
+    ZoneResolver,
+    zone_lookup_changed,
+)
+
+HOME = ZoneArea("zone.home", "Home", 52.0, 4.9, 100)
+SCHOOL = ZoneArea("zone.school", "School", 52.01, 4.9, 200)
+CAMPUS = ZoneArea("zone.campus", "Campus", 52.0105, 4.9, 1000)
+
+
+class TestZoneIndex:
+    def test_finds_zone_containing_position(self):
+        index = ZoneIndex([HOME, SCHOOL])
+
+        assert index.active_zone(52.0003, 4.9, 10) == HOME
+        assert index.active_zone(52.0101, 4.9, 10) == SCHOOL
+
+    def test_no_zone_outside_all_radii(self):
+        index = ZoneIndex([HOME, SCHOOL])
+
+        assert index.active_zone(52.005, 4.9, 10) is None
+
+    def test_accuracy_extends_the_match(self):
+        index = ZoneIndex([HOME])
+        # About 150 m north of home, 50 m outside its radius
+        assert index.active_zone(52.00135, 4.9, 10) is None
+        assert index.active_zone(52.00135, 4.9, 60) == HOME
+
+    def test_prefers_closest_zone(self):
+        index = ZoneIndex([SCHOOL, CAMPUS])
+
+        assert index.active_zone(52.0104, 4.9, 10) == CAMPUS
+        assert index.active_zone(52.0099, 4.9, 10) == SCHOOL
+
+    def test_ignores_passive_zones(self):
+        index = ZoneIndex([HOME._replace(passive=True)])
+
+        assert index.active_zone(52.0, 4.9, 10) is None
+
+    def test_only_nearby_zones_are_candidates(self):
+        far = [ZoneArea(f"zone.far_{i}", "Far", 40.0 + i, 10.0, 100) for i in range(50)]
+        index = ZoneIndex([HOME, *far])
+
+        assert index.candidates(52.0, 4.9, 10) == [HOME]
+
+    def test_huge_accuracy_scans_all_zones(self):
+        index = ZoneIndex([HOME, SCHOOL])
+
+        assert len(index.candidates(52.0, 4.9, 50_000)) == 2
+
+
+class TestZoneResolver:
+    def test_caches_per_position_and_rebuilds_after_invalidate(self):
+        loads = []
+
+        def load():
+            loads.append(1)
+            return [HOME]
+
+        resolver = ZoneResolver(load)
+        assert resolver.resolve("dev-1", 52.0, 4.9, 10) == HOME
+        assert resolver.resolve("dev-1", 52.0, 4.9, 10) == HOME
+        assert resolver.resolve("dev-2", 52.0, 4.9, 10) == HOME
+        assert len(loads) == 1
+
+        assert resolver.resolve("dev-1", 52.1, 4.9, 10) is None
+        resolver.invalidate()
+        assert resolver.resolve("dev-1", 52.1, 4.9, 10) is None
+        assert len(loads) == 2
+
+
+class TestZoneLookupChanged:
+    ATTRIBUTES = {
+        "latitude": 52.0,
+        "longitude": 4.9,
+        "radius": 100,
+        "passive": False,
+        "friendly_name": "Home",
+        "persons": [],
+    }
+
+    def test_occupancy_is_ignored(self):
+        occupied = {**self.ATTRIBUTES, "persons": ["person.kid"]}
+
+        assert not zone_lookup_changed(self.ATTRIBUTES, occupied)
+
+    def test_geometry_and_name_count(self):
+        for key, value in (("radius", 150), ("latitude", 52.1), ("friendly_name", "House")):
+            assert zone_lookup_changed(self.ATTRIBUTES, {**self.ATTRIBUTES, key: value})
+
+    def test_added_or_removed_zone(self):
+        assert zone_lookup_changed(None, self.ATTRIBUTES)
+        assert zone_lookup_changed(self.ATTRIBUTES, None)